@@ -0,0 +1,154 @@
+import gzip
+import hashlib
+import json
+import os
+import queue
+import re
+import shutil
+import threading
+import time
+import uuid
+
+from automate.storage import data_path
+
+
+ARTIFACTS_DIR = data_path("artifacts")
+
+
+class ArtifactCollector:
+    """Stores failure artifacts for one run in a run-scoped directory.
+
+    Only the driver round trips happen on the caller's thread, because the page
+    changes as soon as the next test starts. Hashing, compression and disk
+    writes are done by a background thread.
+    """
+
+    def __init__(self, suite_name, root=None, max_runs=20, max_bytes=200 * 1024 * 1024):
+        self.root = root or ARTIFACTS_DIR
+        self.max_runs = max_runs
+        self.max_bytes = max_bytes
+        run_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+        self.run_dir = os.path.join(self.root, f"{run_id}_{slugify(suite_name)}")
+        self.index = {}
+        self._attempts = {}
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._worker = threading.Thread(target=self._write_loop, name="artifact-writer", daemon=True)
+        self._worker.start()
+
+    def capture(self, driver, test_name):
+        self.add(test_name, *capture_state(driver, test_name))
+
+    def add(self, test_name, screenshot=None, dom=None, console=None):
+        """Queue artifacts captured elsewhere, e.g. received from a remote worker."""
+        # Each failed attempt keeps its own files; for a flaky test the first failure matters most
+        with self._lock:
+            attempt = self._attempts[test_name] = self._attempts.get(test_name, 0) + 1
+        self._queue.put((test_name, attempt, screenshot, dom, console))
+
+    def close(self):
+        self._queue.put(None)
+        self._worker.join()
+        if self.index:
+            with open(os.path.join(self.run_dir, "index.json"), 'w', encoding='utf-8') as f:
+                json.dump(self.index, f, indent=2)
+            print(f"Failure artifacts saved to: {self.run_dir}")
+        enforce_retention(self.root, self.max_runs, self.max_bytes, keep=self.run_dir)
+
+    def _write_loop(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            try:
+                self._write(*item)
+            except Exception as e:
+                # Keep the writer alive, or close() would never drain the queue
+                print(f"Error saving artifacts for '{item[0]}': {e}")
+
+    def _write(self, test_name, attempt, screenshot, dom, console):
+        os.makedirs(self.run_dir, exist_ok=True)
+        slug = f"{slugify(test_name)}.attempt{attempt}"
+        entry = {"test": test_name, "attempt": attempt}
+
+        if screenshot:
+            # Identical screenshots (e.g. the same error page) are stored once
+            digest = hashlib.sha256(screenshot).hexdigest()[:16]
+            image_name = f"{digest}.png"
+            image_path = os.path.join(self.run_dir, image_name)
+            if not os.path.exists(image_path):
+                with open(image_path, 'wb') as f:
+                    f.write(screenshot)
+            entry["screenshot"] = image_name
+
+        if dom is not None:
+            dom_name = f"{slug}.dom.html.gz"
+            with gzip.open(os.path.join(self.run_dir, dom_name), 'wt', encoding='utf-8') as f:
+                f.write(dom)
+            entry["dom"] = dom_name
+
+        if console is not None:
+            console_name = f"{slug}.console.json.gz"
+            with gzip.open(os.path.join(self.run_dir, console_name), 'wt', encoding='utf-8') as f:
+                json.dump(console, f)
+            entry["console"] = console_name
+
+        self.index[f"{test_name} (attempt {attempt})"] = entry
+
+
+def capture_state(driver, test_name):
+    """Screenshot, DOM and browser console of the current page; None for whatever is unavailable."""
+    try:
+        screenshot = driver.get_screenshot_as_png()
+    except Exception as e:
+        print(f"Error capturing screenshot for '{test_name}': {e}")
+        screenshot = None
+
+    try:
+        dom = driver.page_source
+    except Exception as e:
+        print(f"Error capturing DOM for '{test_name}': {e}")
+        dom = None
+
+    try:
+        console = driver.get_log('browser')
+    except Exception:
+        # Not every driver exposes browser logs
+        console = None
+
+    return screenshot, dom, console
+
+
+def enforce_retention(root, max_runs=20, max_bytes=200 * 1024 * 1024, keep=None):
+    if not os.path.isdir(root):
+        return
+
+    runs = [os.path.join(root, name) for name in os.listdir(root) if os.path.isdir(os.path.join(root, name))]
+    runs.sort(key=os.path.getmtime)
+    sizes = {run: _dir_size(run) for run in runs}
+    total = sum(sizes.values())
+
+    remaining = len(runs)
+    for run in runs:
+        if remaining <= max_runs and total <= max_bytes:
+            break
+        if run == keep:
+            continue
+        shutil.rmtree(run, ignore_errors=True)
+        remaining -= 1
+        total -= sizes[run]
+
+
+def slugify(value):
+    return re.sub(r'[^A-Za-z0-9._-]+', '_', value).strip('_') or "unnamed"
+
+
+def _dir_size(path):
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for filename in filenames:
+            try:
+                total += os.path.getsize(os.path.join(dirpath, filename))
+            except OSError:
+                pass
+    return total
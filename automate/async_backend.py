@@ -0,0 +1,483 @@
+"""asyncio backend speaking W3C WebDriver directly: one event loop drives many
+sessions through a single driver server, with the semantics of process_test_step."""
+import asyncio
+import json
+import socket
+import time
+
+from selenium.webdriver.common.by import By
+from selenium.common.exceptions import (TimeoutException, NoSuchElementException, WebDriverException,
+                                        ElementClickInterceptedException)
+
+from automate.automate import get_by_type
+from automate.fallback_handler import FallbackHandler
+from automate.planner import DOM_SUMMARY_SCRIPT, plan_candidates
+from automate.scheduling import ASSERTIONS, plan_steps, dependent_steps, get_test_budget
+from automate.timeouts import TimeoutController
+
+ELEMENT_KEY = "element-6066-11e4-a52e-4f735466cecf"
+
+DRIVER_EXECUTABLES = {
+    "chrome": "chromedriver",
+    "firefox": "geckodriver",
+    "edge": "msedgedriver",
+}
+
+W3C_ERRORS = {
+    "no such element": NoSuchElementException,
+    "timeout": TimeoutException,
+    "element click intercepted": ElementClickInterceptedException,
+}
+
+
+class AsyncDriverService:
+
+    def __init__(self, browser='chrome', executable=None, port=0):
+        self.browser = browser.lower()
+        self.executable = executable or DRIVER_EXECUTABLES.get(self.browser)
+        if not self.executable:
+            raise ValueError(f"Unsupported browser: {browser}")
+        self.port = port or free_port()
+        self.process = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.port}"
+
+    async def start(self, startup_timeout=10):
+        self.process = await asyncio.create_subprocess_exec(
+            self.executable, f"--port={self.port}",
+            stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.DEVNULL)
+
+        deadline = time.monotonic() + startup_timeout
+        while time.monotonic() < deadline:
+            try:
+                _, writer = await asyncio.open_connection("127.0.0.1", self.port)
+                writer.close()
+                return self
+            except OSError:
+                await asyncio.sleep(0.05)
+        await self.stop()
+        raise WebDriverException(f"{self.executable} did not start on port {self.port}")
+
+    async def stop(self):
+        if self.process and self.process.returncode is None:
+            self.process.terminate()
+            await self.process.wait()
+
+
+class AsyncWebDriver:
+    """Minimal keep-alive WebDriver client for a single session."""
+
+    def __init__(self, server_url, session_id=None, max_connections=4):
+        host_port = server_url.split("://", 1)[-1].rstrip("/")
+        host, _, port = host_port.partition(":")
+        self.host = host
+        self.port = int(port or 80)
+        self.session_id = session_id
+        self._idle = []
+        self._connections = asyncio.Semaphore(max_connections)
+
+    @classmethod
+    async def start(cls, server_url, browser='chrome', headless=False):
+        driver = cls(server_url)
+        capabilities = {"browserName": "MicrosoftEdge" if browser == "edge" else browser}
+        if headless:
+            options_key = {"chrome": "goog:chromeOptions", "edge": "ms:edgeOptions",
+                           "firefox": "moz:firefoxOptions"}[browser]
+            capabilities[options_key] = {"args": ["--headless"]}
+
+        value = await driver._request("POST", "/session", {"capabilities": {"alwaysMatch": capabilities}})
+        driver.session_id = value["sessionId"]
+        return driver
+
+    async def quit(self):
+        try:
+            await self.execute("DELETE", "")
+        finally:
+            for _, writer in self._idle:
+                writer.close()
+            self._idle = []
+
+    async def get(self, url):
+        await self.execute("POST", "/url", {"url": url})
+
+    async def current_url(self):
+        return await self.execute("GET", "/url")
+
+    async def execute_script(self, script, *args):
+        return await self.execute("POST", "/execute/sync", {"script": script, "args": list(args)})
+
+    async def find_element(self, by_type, value):
+        result = await self.execute("POST", "/element", _w3c_locator(by_type, value))
+        return AsyncElement(self, result[ELEMENT_KEY])
+
+    async def find_elements(self, by_type, value):
+        result = await self.execute("POST", "/elements", _w3c_locator(by_type, value))
+        return [AsyncElement(self, item[ELEMENT_KEY]) for item in result]
+
+    async def execute(self, method, path, payload=None):
+        return await self._request(method, f"/session/{self.session_id}{path}", payload)
+
+    async def _request(self, method, path, payload=None):
+        body = json.dumps(payload if payload is not None else {}).encode() if method == "POST" else b""
+        async with self._connections:
+            reader, writer = await self._connect()
+            try:
+                writer.write(
+                    f"{method} {path} HTTP/1.1\r\nHost: {self.host}:{self.port}\r\n"
+                    f"Content-Type: application/json;charset=UTF-8\r\nContent-Length: {len(body)}\r\n"
+                    f"Connection: keep-alive\r\n\r\n".encode() + body)
+                await writer.drain()
+                status, headers, data = await _read_response(reader)
+            except Exception:
+                writer.close()
+                raise
+            if headers.get("connection", "").lower() == "close":
+                writer.close()
+            else:
+                self._idle.append((reader, writer))
+
+        response = json.loads(data or b"{}")
+        value = response.get("value")
+        if status >= 400 or (isinstance(value, dict) and "error" in value):
+            error = value.get("error", "unknown error") if isinstance(value, dict) else "unknown error"
+            message = value.get("message", "") if isinstance(value, dict) else str(value)
+            raise W3C_ERRORS.get(error, WebDriverException)(f"{error}: {message}")
+        return value
+
+    async def _connect(self):
+        while self._idle:
+            reader, writer = self._idle.pop()
+            if not writer.is_closing() and not reader.at_eof():
+                return reader, writer
+            writer.close()
+        return await asyncio.open_connection(self.host, self.port)
+
+
+class AsyncElement:
+
+    def __init__(self, driver, element_id):
+        self.driver = driver
+        self.id = element_id
+
+    async def click(self):
+        await self.driver.execute("POST", f"/element/{self.id}/click")
+
+    async def clear(self):
+        await self.driver.execute("POST", f"/element/{self.id}/clear")
+
+    async def send_keys(self, text):
+        await self.driver.execute("POST", f"/element/{self.id}/value", {"text": str(text)})
+
+    async def is_displayed(self):
+        return await self.driver.execute("GET", f"/element/{self.id}/displayed")
+
+    async def is_enabled(self):
+        return await self.driver.execute("GET", f"/element/{self.id}/enabled")
+
+    def to_json(self):
+        return {ELEMENT_KEY: self.id}
+
+
+async def run_tests_async(file_path, browser='chrome', headless=True, concurrency=4, adaptive_timeouts=True,
+                          test_budget=None):
+    try:
+        with open(file_path, 'r') as file:
+            test_data = json.load(file)
+    except (FileNotFoundError, json.JSONDecodeError) as e:
+        print(f"Error loading test file: {e}")
+        return {"error": str(e)}
+
+    timeouts = TimeoutController() if adaptive_timeouts else None
+    service = await AsyncDriverService(browser).start()
+    slots = asyncio.Semaphore(concurrency)
+
+    async def run_one(test):
+        test_name = test.get("testName", "Unnamed Test")
+        async with slots:
+            print(f"Running test: {test_name}")
+            driver = None
+            try:
+                # A session that fails to start fails this test only
+                driver = await AsyncWebDriver.start(service.url, browser.lower(), headless)
+                await run_test_steps_async(driver, test.get("steps", []), timeouts,
+                                           get_test_budget(test, test_budget))
+                print(f"Test '{test_name}' passed")
+                return "PASS"
+            except Exception as e:
+                print(f"Test '{test_name}' failed: {e}")
+                return f"FAIL: {str(e)}"
+            finally:
+                if driver:
+                    try:
+                        await driver.quit()
+                    except Exception as e:
+                        print(f"Error closing the session of '{test_name}': {e}")
+
+    try:
+        outcomes = await asyncio.gather(*(run_one(test) for test in test_data), return_exceptions=True)
+    finally:
+        await service.stop()
+        if timeouts:
+            timeouts.save()
+
+    return {test.get("testName", "Unnamed Test"):
+            f"FAIL: {outcome}" if isinstance(outcome, BaseException) else outcome
+            for test, outcome in zip(test_data, outcomes)}
+
+
+async def run_test_steps_async(driver, steps, timeouts=None, budget=None):
+    deadline = time.monotonic() + budget if budget else None
+    failures = []
+
+    for group in plan_steps(steps):
+        indices = group["indices"]
+
+        if group["kind"] == ASSERTIONS:
+            # Independent assertions are verified concurrently
+            results = await asyncio.gather(
+                *(process_test_step_async(driver, steps[i], None, timeouts, deadline) for i in indices),
+                return_exceptions=True)
+            failures.extend(str(result) for result in results if isinstance(result, Exception))
+            continue
+
+        index = indices[0]
+        next_step = steps[index + 1] if index + 1 < len(steps) else None
+        try:
+            await process_test_step_async(driver, steps[index], next_step, timeouts, deadline)
+        except Exception:
+            skipped = dependent_steps(steps, index)
+            if skipped:
+                print(f"Step {index + 1} failed, skipping {len(skipped)} dependent step(s)")
+            raise
+
+    if failures:
+        raise AssertionError("; ".join(failures))
+
+
+async def process_test_step_async(driver, step, next_step=None, timeouts=None, deadline=None):
+    action = step.get("action")
+    locator = step.get("locator", {})
+    locator_type = locator.get("type")
+    locator_value = locator.get("value")
+
+    by_type = get_by_type(locator_type)
+    current_url = await driver.current_url()
+    timeout = _step_timeout(current_url, action, timeouts, deadline)
+
+    if action == "goto":
+        url = locator_value
+        if not url.startswith(('http://', 'https://')):
+            url = 'https://' + url
+        start = time.monotonic()
+        await driver.get(url)
+        if timeouts:
+            timeouts.record(url, action, time.monotonic() - start)
+
+    elif action == "input":
+        await asyncio.sleep(1)
+        input_value = step.get("input_value", "")
+        element = await _wait_for_element(driver, by_type, locator_value, timeout, timeouts, action, current_url)
+        if not element:
+            element = await fallback_async(driver, action, locator_type, locator_value, input_value, deadline)
+            if not element:
+                raise NoSuchElementException(
+                    f"Input element not found with locator: {locator_value} and no fallback succeeded")
+        await element.clear()
+        await element.send_keys(input_value)
+
+    elif action == "click":
+        await asyncio.sleep(2)
+        element = await _wait_for_element(driver, by_type, locator_value, timeout, timeouts, action, current_url)
+        if not element and not _is_link_to_redirect(step, next_step):
+            element = await fallback_async(driver, action, locator_type, locator_value, deadline=deadline)
+
+        if element:
+            try:
+                await element.click()
+            except ElementClickInterceptedException:
+                print("Click intercepted, trying JavaScript click")
+                await driver.execute_script("arguments[0].click();", element.to_json())
+            return
+
+        redirect_url = next_step.get("locator", {}).get("value") if next_step and \
+            next_step.get("action") == "waitForRedirect" else None
+        if redirect_url:
+            print(f"Link not found, but next step is waitForRedirect. Navigating directly to: {redirect_url}")
+            if not redirect_url.startswith(('http://', 'https://')):
+                redirect_url = 'https://' + redirect_url
+            await driver.get(redirect_url)
+            return
+
+        raise NoSuchElementException(
+            f"Clickable element not found with locator: {locator_value} and no fallback succeeded")
+
+    elif action == "waitForElementVisible":
+        element = await _wait_for_element(driver, by_type, locator_value, timeout, timeouts, action, current_url,
+                                          visible=True)
+        if not element:
+            element = await fallback_async(driver, action, locator_type, locator_value, deadline=deadline)
+            if not element:
+                raise TimeoutException(f"Element {locator_value} not visible after {timeout} seconds")
+
+    elif action == "waitForRedirect":
+        expected_url = locator_value
+        start = time.monotonic()
+        if not await _wait_until(lambda: _url_matches(driver, expected_url), timeout):
+            if timeouts:
+                timeouts.record_timeout(current_url, action, timeout)
+            current_url = await driver.current_url()
+            if expected_url in current_url:
+                print(f"URL partially matches expected URL. Current: {current_url}, Expected: {expected_url}")
+                return
+
+            raise TimeoutException(
+                f"URL did not redirect to {expected_url} after {timeout} seconds. Current URL: {current_url}")
+        if timeouts:
+            timeouts.record(current_url, action, time.monotonic() - start)
+
+    else:
+        raise ValueError(f"Unsupported action: {action}")
+
+
+async def fallback_async(driver, action, locator_type, locator_value, input_value=None, deadline=None,
+                         batch_size=8, probe_timeout=1.0):
+    """Probe the FallbackHandler candidates in overlapping batches.
+
+    Candidates keep their priority: within a batch the first one (in the
+    handler's order) that matches wins.
+    """
+    print(f"Executing async fallback for action: {action}, locator: {locator_type}={locator_value}")
+    strategies = FallbackHandler(None).build_strategies(action, locator_type, locator_value, input_value)
+    try:
+        summary = await driver.execute_script(DOM_SUMMARY_SCRIPT, 20000)
+    except WebDriverException as e:
+        print(f"Could not summarise the page for candidate pruning: {e}")
+        summary = None
+    primary = locator_value if locator_type == "xpath" else None
+    strategies = plan_candidates(strategies, summary, primary) or plan_candidates(strategies, None, primary)
+    visible = action in ("click", "waitForElementVisible")
+
+    async def probe(by_type, value):
+        try:
+            for element in await driver.find_elements(by_type, value):
+                if not visible or await element.is_displayed():
+                    return element
+        except WebDriverException:
+            pass
+        return None
+
+    end = time.monotonic() + probe_timeout
+    if deadline is not None:
+        end = min(end, deadline)
+
+    while True:
+        for i in range(0, len(strategies), batch_size):
+            batch = strategies[i:i + batch_size]
+            found = await asyncio.gather(*(probe(by_type, value) for by_type, value in batch))
+            for (by_type, value), element in zip(batch, found):
+                if element:
+                    print(f"Found element with fallback locator: {value}")
+                    return element
+        if time.monotonic() >= end:
+            return None
+        await asyncio.sleep(0.1)
+
+
+async def _wait_for_element(driver, by_type, locator_value, timeout, timeouts, action, origin, visible=False):
+    found = []
+
+    async def present():
+        for element in await driver.find_elements(by_type, locator_value):
+            if not visible or await element.is_displayed():
+                found.append(element)
+                return True
+        return False
+
+    start = time.monotonic()
+    if not await _wait_until(present, timeout):
+        if timeouts:
+            # Censored sample, as in timed_wait; without it budgets could only ever shrink
+            timeouts.record_timeout(origin, action, timeout)
+        return None
+    if timeouts:
+        timeouts.record(origin, action, time.monotonic() - start)
+    return found[0]
+
+
+async def _wait_until(condition, timeout, poll_frequency=0.1):
+    end = time.monotonic() + timeout
+    while True:
+        try:
+            if await condition():
+                return True
+        except WebDriverException:
+            pass
+        if time.monotonic() >= end:
+            return False
+        await asyncio.sleep(poll_frequency)
+
+
+async def _url_matches(driver, expected_url):
+    return await driver.current_url() == expected_url
+
+
+async def _read_response(reader):
+    status_line = await reader.readline()
+    if not status_line:
+        raise WebDriverException("Driver closed the connection")
+    status = int(status_line.split()[1])
+
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    if headers.get("transfer-encoding", "").lower() == "chunked":
+        chunks = []
+        while True:
+            size = int((await reader.readline()).split(b";")[0], 16)
+            if size == 0:
+                await reader.readline()
+                break
+            chunks.append(await reader.readexactly(size))
+            await reader.readline()
+        return status, headers, b"".join(chunks)
+
+    return status, headers, await reader.readexactly(int(headers.get("content-length", 0)))
+
+
+def _is_link_to_redirect(step, next_step):
+    return bool(next_step and next_step.get("action") == "waitForRedirect"
+                and "@href" in step.get("locator", {}).get("value", ""))
+
+
+def _step_timeout(current_url, action, timeouts=None, deadline=None, default=10):
+    timeout = timeouts.budget(current_url, action, default) if timeouts else default
+    if deadline is not None:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutException(f"Test time budget exhausted before '{action}' step")
+        timeout = min(timeout, remaining)
+    return timeout
+
+
+def _w3c_locator(by_type, value):
+    # Same translation Selenium applies for the locator strategies W3C dropped
+    if by_type == By.ID:
+        return {"using": "css selector", "value": f'[id="{value}"]'}
+    if by_type == By.NAME:
+        return {"using": "css selector", "value": f'[name="{value}"]'}
+    if by_type == By.CLASS_NAME:
+        return {"using": "css selector", "value": f".{value}"}
+    return {"using": by_type, "value": value}
+
+
+def free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
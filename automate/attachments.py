@@ -0,0 +1,368 @@
+import argparse
+import base64
+import hashlib
+import json
+import mimetypes
+import mmap
+import os
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from automate.storage import data_path, write_json_atomic
+
+
+UPLOADS_PATH = data_path("cache", "uploads.json")
+
+# Uploaded files are kept by the API for 48 hours; stop reusing them a little earlier
+UPLOAD_TTL = timedelta(hours=46)
+
+HASH_CHUNK = 1 << 20
+
+
+def guess_mime_type(file_path):
+    mime_type, _ = mimetypes.guess_type(file_path)
+
+    if not mime_type:
+        if file_path.lower().endswith('.md'):
+            mime_type = 'text/markdown'
+        elif file_path.lower().endswith('.html'):
+            mime_type = 'text/html'
+
+    return mime_type or 'application/octet-stream'
+
+
+class Attachment:
+    """A file mapped read-only into memory, hashed without copying it."""
+
+    def __init__(self, path):
+        self.path = path
+        self.mime_type = guess_mime_type(path)
+        self._file = open(path, 'rb')
+        self.size = os.fstat(self._file.fileno()).st_size
+        # mmap cannot map an empty file
+        self.data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else b""
+        self._sha256 = None
+
+    @property
+    def sha256(self):
+        if self._sha256 is None:
+            digest = hashlib.sha256()
+            view = memoryview(self.data)
+            for offset in range(0, self.size, HASH_CHUNK):
+                digest.update(view[offset:offset + HASH_CHUNK])
+            view.release()
+            self._sha256 = digest.hexdigest()
+        return self._sha256
+
+    def inline_part(self):
+        return {"inline_data": {"mime_type": self.mime_type, "data": base64.b64encode(self.data).decode('ascii')}}
+
+    def close(self):
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def upload_namespace(api_key=None, base_url=None):
+    """Cache namespace for uploads made with one API key against one endpoint.
+
+    File URIs are only valid for the account and server that issued them.
+    """
+    identity = f"{api_key or ''}|{(base_url or '').rstrip('/')}"
+    return hashlib.sha256(identity.encode('utf-8')).hexdigest()[:16]
+
+
+class AttachmentUploader:
+    """Uploads each distinct file once through the files API and reuses the reference.
+
+    References are cached by content hash in ``uploads.json`` so a snapshot that
+    did not change is not uploaded again by later calls or later runs. Entries
+    are keyed by ``namespace`` (see ``upload_namespace``) so references are
+    never reused against another account or server.
+    """
+
+    def __init__(self, client, cache_path=UPLOADS_PATH, namespace="default"):
+        self.client = client
+        self.cache_path = cache_path
+        self.namespace = namespace
+        self.uploads = {}
+        self._forgotten = set()
+        self._lock = threading.Lock()
+        self._hash_locks = {}
+        self.load()
+
+    def load(self):
+        self.uploads = self._read()
+
+    def save(self):
+        if not self.cache_path:
+            return
+        # Other uploaders (the other model tier, another run) share the file; merge rather than replace
+        with self._lock:
+            uploads = self._read()
+            uploads.update(self.uploads)
+            for key in self._forgotten:
+                uploads.pop(key, None)
+            now = datetime.now(timezone.utc)
+            uploads = {key: entry for key, entry in uploads.items() if _parse_time(entry["expires_at"]) > now}
+            write_json_atomic(self.cache_path, uploads)
+
+    def forget(self, uris):
+        """Drop cached references the API rejected, so the next ``part()`` uploads again."""
+        with self._lock:
+            stale = [key for key, entry in self.uploads.items() if entry["uri"] in uris]
+            for key in stale:
+                del self.uploads[key]
+                self._forgotten.add(key)
+        if stale:
+            print(f"Dropping {len(stale)} rejected upload reference(s)")
+            self.save()
+        return len(stale)
+
+    def part(self, path):
+        """A file_data part referencing the uploaded file, or an inline part if uploading fails."""
+        if not os.path.exists(path):
+            print(f"Warning: File not found at path: {path}")
+            return None
+
+        with Attachment(path) as attachment:
+            key = f"{self.namespace}:{attachment.sha256}"
+            with self._lock:
+                hash_lock, users = self._hash_locks.get(key, (None, 0))
+                hash_lock = hash_lock or threading.Lock()
+                self._hash_locks[key] = (hash_lock, users + 1)
+            try:
+                # Concurrent calls for the same content wait for a single upload
+                with hash_lock:
+                    return self._part(attachment, key)
+            finally:
+                with self._lock:
+                    hash_lock, users = self._hash_locks[key]
+                    if users == 1:
+                        del self._hash_locks[key]
+                    else:
+                        self._hash_locks[key] = (hash_lock, users - 1)
+
+    def _part(self, attachment, key):
+        entry = self._cached(key)
+        if entry:
+            print(f"Reusing uploaded file for {attachment.path}: {entry['name']}")
+        else:
+            try:
+                entry = self._upload(attachment)
+            except Exception as e:
+                print(f"Upload of {attachment.path} failed, sending it inline: {e}")
+                return attachment.inline_part()
+            with self._lock:
+                self.uploads[key] = entry
+                self._forgotten.discard(key)
+            self.save()
+        return {"file_data": {"mime_type": entry["mime_type"], "file_uri": entry["uri"]}}
+
+    def _read(self):
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return {}
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Error loading upload cache from {self.cache_path}: {e}")
+            return {}
+
+    def _cached(self, key):
+        with self._lock:
+            entry = self.uploads.get(key)
+        if entry and _parse_time(entry["expires_at"]) > datetime.now(timezone.utc):
+            return entry
+        return None
+
+    def _upload(self, attachment):
+        start = time.monotonic()
+        # The SDK streams the file from disk, so the page is not loaded into memory again
+        uploaded = self.client.files.upload(file=attachment.path, config={
+            "mime_type": attachment.mime_type,
+            "display_name": f"{os.path.basename(attachment.path)}-{attachment.sha256[:12]}",
+        })
+        expires_at = getattr(uploaded, "expiration_time", None)
+        expires_at = min(expires_at, datetime.now(timezone.utc) + UPLOAD_TTL) if expires_at else \
+            datetime.now(timezone.utc) + UPLOAD_TTL
+        print(f"Uploaded {attachment.path} ({attachment.size} bytes) as {uploaded.name} "
+              f"in {time.monotonic() - start:.2f}s")
+        return {
+            "name": uploaded.name,
+            "uri": uploaded.uri,
+            "mime_type": uploaded.mime_type or attachment.mime_type,
+            "size": attachment.size,
+            "expires_at": expires_at.isoformat(timespec="seconds"),
+        }
+
+
+class LocalFileServer:
+    """Stand-in for the files API speaking the resumable upload protocol.
+
+    Point a client at it with ``http_options={"base_url": server.url}``.
+    ``uploads`` counts finalised uploads so callers can check that nothing is
+    uploaded twice.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0):
+        self.files = {}
+        self.sessions = {}
+        self.uploads = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), _make_handler(self))
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def _make_handler(server):
+
+    class Handler(BaseHTTPRequestHandler):
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            command = self.headers.get("X-Goog-Upload-Command", "")
+
+            if self.path.split("?")[0].endswith("/files") and command == "start":
+                session_id = uuid.uuid4().hex
+                metadata = json.loads(body or b"{}").get("file", {})
+                with server._lock:
+                    server.sessions[session_id] = {
+                        "metadata": metadata,
+                        "mime_type": self.headers.get("X-Goog-Upload-Header-Content-Type") or
+                        metadata.get("mimeType") or metadata.get("mime_type"),
+                        "data": bytearray(),
+                    }
+                self._reply(200, {}, {"X-Goog-Upload-URL": f"{server.url}/upload/session/{session_id}",
+                                      "X-Goog-Upload-Status": "active"})
+                return
+
+            if self.path.startswith("/upload/session/"):
+                session_id = self.path.rsplit("/", 1)[-1]
+                with server._lock:
+                    session = server.sessions.get(session_id)
+                    if session is None:
+                        self._reply(404, {"error": {"code": 404, "message": "Unknown upload session"}})
+                        return
+                    offset = int(self.headers.get("X-Goog-Upload-Offset", len(session["data"])))
+                    if offset != len(session["data"]):
+                        self._reply(400, {"error": {"code": 400, "message": "Upload offset mismatch"}})
+                        return
+                    session["data"].extend(body)
+                    if "finalize" not in command:
+                        self._reply(200, {}, {"X-Goog-Upload-Status": "active"})
+                        return
+                    del server.sessions[session_id]
+                    resource = _file_resource(server, session)
+                    server.files[resource["name"]] = resource
+                    server.uploads += 1
+                self._reply(200, {"file": resource}, {"X-Goog-Upload-Status": "final"})
+                return
+
+            self._reply(404, {"error": {"code": 404, "message": f"Unsupported path {self.path}"}})
+
+        def do_GET(self):
+            name = self._file_name()
+            with server._lock:
+                resource = server.files.get(name)
+            if resource:
+                self._reply(200, resource)
+            else:
+                self._reply(404, {"error": {"code": 404, "message": f"File {name} not found"}})
+
+        def do_DELETE(self):
+            name = self._file_name()
+            with server._lock:
+                found = server.files.pop(name, None)
+            self._reply(200 if found else 404, {})
+
+        def _file_name(self):
+            path = self.path.split("?")[0]
+            return "files/" + path.rsplit("/files/", 1)[-1] if "/files/" in path else path
+
+        def _reply(self, status, payload, headers=None):
+            data = json.dumps(payload).encode('utf-8')
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def _file_resource(server, session):
+    file_id = uuid.uuid4().hex[:16]
+    now = datetime.now(timezone.utc)
+    data = bytes(session["data"])
+    return {
+        "name": f"files/{file_id}",
+        "displayName": session["metadata"].get("displayName") or session["metadata"].get("display_name"),
+        "mimeType": session["mime_type"] or "application/octet-stream",
+        "sizeBytes": str(len(data)),
+        "createTime": now.isoformat().replace("+00:00", "Z"),
+        "updateTime": now.isoformat().replace("+00:00", "Z"),
+        "expirationTime": (now + timedelta(hours=48)).isoformat().replace("+00:00", "Z"),
+        "sha256Hash": base64.b64encode(hashlib.sha256(data).hexdigest().encode('ascii')).decode('ascii'),
+        "uri": f"{server.url}/v1beta/files/{file_id}",
+        "state": "ACTIVE",
+        "source": "UPLOADED",
+    }
+
+
+def _parse_time(value):
+    return datetime.fromisoformat(value)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a local stand-in for the files upload API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args(argv)
+
+    server = LocalFileServer(args.host, args.port)
+    print(f"Local file API listening on {server.url}")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
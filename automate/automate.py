@@ -6,12 +6,25 @@ from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait, Select
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
+from selenium.common.exceptions import TimeoutException, NoSuchElementException, StaleElementReferenceException
 
+from automate.artifacts import ArtifactCollector
+from automate.checkpoint import CheckpointJournal
 from automate.fallback_handler import FallbackHandler
-
-
-def run_tests_from_file(file_path, browser='chrome', headless=False):
+from automate.flaky import FlakyHistory
+from automate.healing import collect_heals, write_back_heals
+from automate.telemetry import FallbackTelemetry
+from automate.results import ResultsStore, RunRecorder
+from automate.scheduling import ASSERTIONS, plan_steps, dependent_steps, get_test_budget
+from automate.storage import data_path
+from automate.timeouts import TimeoutController
+from automate.watchdog import MAX_HEAP_MB, MAX_RSS_MB, MemoryWatchdog, restore_session_state, save_session_state
+
+
+def run_tests_from_file(file_path, browser='chrome', headless=False, adaptive_timeouts=True, test_budget=None,
+                        retries=0, track_flakiness=True, record_results=True, collect_telemetry=True,
+                        write_back=False, min_heal_confidence=0.6, network=None, max_rss_mb=MAX_RSS_MB,
+                        max_heap_mb=MAX_HEAP_MB, checkpoint=True, resume=False):
     try:
         with open(file_path, 'r') as file:
             test_data = json.load(file)
@@ -19,60 +32,337 @@ def run_tests_from_file(file_path, browser='chrome', headless=False):
         print(f"Error loading test file: {e}")
         return {"error": str(e)}
 
-    driver = setup_webdriver(browser, headless)
-    fallback_handler = FallbackHandler(driver)
+    suite_name = os.path.splitext(os.path.basename(file_path))[0]
+    # Replayed pages answer instantly; learning wait budgets from them would starve live runs
+    timeouts = TimeoutController() if adaptive_timeouts and network != "replay" else None
+    artifacts = ArtifactCollector(suite_name)
+    history = FlakyHistory() if track_flakiness else None
+    recorder = RunRecorder(suite_name, browser) if record_results else None
+    telemetry = FallbackTelemetry(suite_name) if collect_telemetry else None
+    watchdog = MemoryWatchdog(max_rss_mb, max_heap_mb)
+    journal = CheckpointJournal(suite_name, test_data) if checkpoint else None
+    finished = journal.begin(resume) if journal else {}
+    if history:
+        # Quarantined independent tests go last so they do not hold up the main run
+        test_data = history.order_tests(suite_name, test_data)
+
+    proxy = None
+    if network:
+        # Record the suite's traffic once, then replay it without touching the network
+        from automate.replay import ReplayProxy, har_path
+
+        proxy = ReplayProxy(har_path(suite_name), network).start()
+    try:
+        driver = setup_webdriver(browser, headless, proxy.address if proxy else None)
+    except Exception:
+        if proxy:
+            proxy.stop()
+        if journal:
+            journal.close()
+        raise
+    fallback_handler = FallbackHandler(driver, timeouts=timeouts, telemetry=telemetry)
     test_results = {}
+    heals = {}
+    # Session state each test started from, so a retry does not lose what earlier tests set up
+    session = None
+    entry_sessions = {}
 
     try:
+        if journal and journal.session and len(finished) < len(test_data):
+            # Pick up the logged-in session where the interrupted run left it instead of repeating the login
+            try:
+                restore_session_state(driver, journal.session)
+            except Exception as e:
+                print(f"Could not restore the checkpointed session: {e}")
+
         for test in test_data:
             test_name = test.get("testName", "Unnamed Test")
-            print(f"Running test: {test_name}")
+            if test_name in finished:
+                entry = finished[test_name]
+                test_results[test_name] = entry["result"]
+                print(f"Skipping '{test_name}', finished before the interruption: {entry['result']}")
+                if not entry["flushed"]:
+                    if recorder:
+                        recorder.add_test(test_name, entry["result"], entry["duration"], entry["steps"],
+                                          entry["attempt"], entry.get("memory"))
+                    if history:
+                        history.record(suite_name, test_name, entry["result"] == "PASS", entry["steps"])
+                heals[test_name] = collect_heals(test_name, entry["steps"])
+                entry_sessions[test_name] = session
+                session = entry.get("session") or session
+                continue
+
+            entry_sessions[test_name] = session
+            step_log = []
+            start = time.monotonic()
+            test_results[test_name] = run_single_test(driver, test, fallback_handler, timeouts, test_budget,
+                                                      artifacts, step_log)
+            duration = time.monotonic() - start
+            memory = watchdog.sample(driver, test_name)
+            if recorder:
+                recorder.add_test(test_name, test_results[test_name], duration, step_log, memory=memory)
+            heals[test_name] = collect_heals(test_name, step_log)
+            if history:
+                history.record(suite_name, test_name, test_results[test_name] == "PASS", step_log)
+            if journal or retries:
+                session = save_session_state(driver)
+            if journal:
+                journal.record(test_name, test_results[test_name], duration, step_log, memory=memory,
+                               session=session)
+
+            reasons = watchdog.over_limit(memory)
+            if reasons and test is not test_data[-1]:
+                driver = watchdog.recycle(driver, lambda: setup_webdriver(browser, headless,
+                                                                          proxy.address if proxy else None), reasons)
+                fallback_handler = FallbackHandler(driver, timeouts=timeouts, telemetry=telemetry)
+
+        for attempt in range(1, retries + 1):
+            failed = [test for test in test_data if test_results[test.get("testName", "Unnamed Test")] != "PASS"]
+            if not failed:
+                break
+            print(f"Retry {attempt}/{retries}: re-running {len(failed)} failed test(s)")
+            for test in failed:
+                test_name = test.get("testName", "Unnamed Test")
+                step_log = []
+                start = time.monotonic()
+                result = run_on_fresh_driver(test, browser, headless, timeouts, test_budget, artifacts, step_log,
+                                             telemetry, proxy.address if proxy else None,
+                                             None if test.get("independent") else entry_sessions.get(test_name))
+                duration = time.monotonic() - start
+                if recorder:
+                    recorder.add_test(test_name, result, duration, step_log, attempt)
+                if journal:
+                    journal.record(test_name, result, duration, step_log, attempt)
+                heals[test_name] = collect_heals(test_name, step_log)
+                if history:
+                    history.record(suite_name, test_name, result == "PASS", step_log)
+                if result == "PASS":
+                    print(f"Test '{test_name}' passed on retry {attempt}")
+                test_results[test_name] = result
+
+        if write_back:
+            # Only locators from tests that passed end to end are trusted
+            write_back_heals(file_path, [heal for test_name, found in heals.items()
+                                         if test_results.get(test_name) == "PASS" for heal in found],
+                             min_heal_confidence)
+
+        if journal:
+            journal.complete()
 
-            try:
-                steps = test.get("steps", [])
-                for i, step in enumerate(steps):
-                    # Check if this is a click on a link and there's a next step
-                    next_step = steps[i + 1] if i + 1 < len(steps) else None
-                    process_test_step(driver, step, fallback_handler, next_step)
+    finally:
+        driver.quit()
+        watchdog.report()
+        if proxy:
+            from automate.replay import print_report
+
+            print_report(proxy.stop())
+        artifacts.close()
+        if timeouts:
+            timeouts.save()
+        if history:
+            history.save()
+            history.report(suite_name, test_data)
+        if recorder:
+            ResultsStore().append(recorder.finish())
+        if telemetry:
+            telemetry.save()
+        if journal:
+            journal.close(flushed=True)
 
-                test_results[test_name] = "PASS"
-                print(f"Test '{test_name}' passed")
+    return test_results
 
-            except Exception as e:
-                test_results[test_name] = f"FAIL: {str(e)}"
-                print(f"Test '{test_name}' failed: {e}")
-                driver.save_screenshot(f"{test_name.replace(' ', '_')}_failure.png")
 
+def run_on_fresh_driver(test, browser='chrome', headless=False, timeouts=None, test_budget=None, artifacts=None,
+                        step_log=None, telemetry=None, proxy=None, session=None):
+    """Run ``test`` in a new browser, first restoring ``session`` when the test relies on earlier ones."""
+    driver = setup_webdriver(browser, headless, proxy)
+    try:
+        if session:
+            try:
+                restore_session_state(driver, session)
+            except Exception as e:
+                print(f"Could not restore the session for '{test.get('testName', 'Unnamed Test')}': {e}")
+        fallback_handler = FallbackHandler(driver, timeouts=timeouts, telemetry=telemetry)
+        return run_single_test(driver, test, fallback_handler, timeouts, test_budget, artifacts, step_log)
     finally:
         driver.quit()
 
-    return test_results
+
+def run_single_test(driver, test, fallback_handler, timeouts=None, test_budget=None, artifacts=None,
+                    step_log=None):
+    test_name = test.get("testName", "Unnamed Test")
+    print(f"Running test: {test_name}")
+
+    try:
+        steps = test.get("steps", [])
+        run_test_steps(driver, steps, fallback_handler, timeouts, get_test_budget(test, test_budget), step_log)
+
+        print(f"Test '{test_name}' passed")
+        return "PASS"
+
+    except Exception as e:
+        print(f"Test '{test_name}' failed: {e}")
+        if artifacts:
+            artifacts.capture(driver, test_name)
+        return f"FAIL: {str(e)}"
 
 
-def setup_webdriver(browser='chrome', headless=False):
+def setup_webdriver(browser='chrome', headless=False, proxy=None):
     if browser.lower() == 'chrome':
         options = webdriver.ChromeOptions()
         if headless:
             options.add_argument('--headless')
+        _use_proxy(options, proxy)
         return webdriver.Chrome(options=options)
 
     elif browser.lower() == 'firefox':
         options = webdriver.FirefoxOptions()
         if headless:
             options.add_argument('--headless')
+        if proxy:
+            host, port = proxy.rsplit(":", 1)
+            options.set_preference("network.proxy.type", 1)
+            for scheme in ("http", "ssl"):
+                options.set_preference(f"network.proxy.{scheme}", host)
+                options.set_preference(f"network.proxy.{scheme}_port", int(port))
+            options.set_preference("network.proxy.allow_hijacking_localhost", True)
+            options.accept_insecure_certs = True
         return webdriver.Firefox(options=options)
 
     elif browser.lower() == 'edge':
         options = webdriver.EdgeOptions()
         if headless:
             options.add_argument('--headless')
+        _use_proxy(options, proxy)
         return webdriver.Edge(options=options)
 
     else:
         raise ValueError(f"Unsupported browser: {browser}")
 
 
-def process_test_step(driver, step, fallback_handler, next_step=None):
+def _use_proxy(options, proxy):
+    if not proxy:
+        return
+    # The replay proxy intercepts HTTPS with a self-signed certificate
+    options.add_argument(f'--proxy-server=http://{proxy}')
+    options.add_argument('--proxy-bypass-list=<-loopback>')
+    options.add_argument('--ignore-certificate-errors')
+    options.accept_insecure_certs = True
+
+
+def run_test_steps(driver, steps, fallback_handler, timeouts=None, budget=None, step_log=None):
+    deadline = time.monotonic() + budget if budget else None
+    failures = []
+
+    for group in plan_steps(steps):
+        indices = group["indices"]
+
+        start = time.monotonic()
+        fallback_mark = len(fallback_handler.fallback_log)
+        if fallback_handler.telemetry:
+            for index in indices:
+                fallback_handler.telemetry.observe_step(steps[index].get("action"),
+                                                        steps[index].get("locator", {}).get("value"))
+
+        if group["kind"] == ASSERTIONS:
+            errors = verify_steps(driver, [steps[i] for i in indices], fallback_handler, timeouts, deadline)
+            for index, error in zip(indices, errors):
+                _log_step(step_log, index, steps[index], "FAIL" if error else "PASS", start, error,
+                          fallback_handler.fallback_log[fallback_mark:])
+            failures.extend(error for error in errors if error)
+            continue
+
+        index = indices[0]
+        # Check if this is a click on a link and there's a next step
+        next_step = steps[index + 1] if index + 1 < len(steps) else None
+        try:
+            process_test_step(driver, steps[index], fallback_handler, next_step, timeouts, deadline)
+            _log_step(step_log, index, steps[index], "PASS", start, None, fallback_handler.fallback_log[fallback_mark:])
+        except Exception as e:
+            _log_step(step_log, index, steps[index], "FAIL", start, str(e),
+                      fallback_handler.fallback_log[fallback_mark:])
+            skipped = dependent_steps(steps, index)
+            if skipped:
+                print(f"Step {index + 1} failed, skipping {len(skipped)} dependent step(s)")
+                for skipped_index in skipped:
+                    _log_step(step_log, skipped_index, steps[skipped_index], "SKIP")
+            raise
+
+    if failures:
+        raise AssertionError("; ".join(failures))
+
+
+def _log_step(step_log, index, step, outcome, start=None, error=None, fallbacks=None):
+    if step_log is None:
+        return
+    locator_value = step.get("locator", {}).get("value")
+    entry = {
+        "index": index,
+        "action": step.get("action"),
+        "locator": locator_value,
+        "outcome": outcome,
+        "duration": round(time.monotonic() - start, 3) if start is not None else 0.0,
+        "fallbacks": [fallback for fallback in fallbacks or [] if fallback["locator"] == locator_value],
+    }
+    if error:
+        entry["error"] = error
+    step_log.append(entry)
+
+
+def verify_steps(driver, steps, fallback_handler, timeouts=None, deadline=None):
+    """Verify independent assertions together under one shared wait.
+
+    Returns one entry per step: None when it passed, otherwise the error message.
+    """
+    if len(steps) == 1:
+        try:
+            process_test_step(driver, steps[0], fallback_handler, None, timeouts, deadline)
+            return [None]
+        except Exception as e:
+            return [str(e)]
+
+    pending = {}
+    timeout = 0
+    for i, step in enumerate(steps):
+        locator = step.get("locator", {})
+        pending[i] = (get_by_type(locator.get("type")), locator.get("value"))
+        timeout = max(timeout, get_step_timeout(driver, step.get("action"), timeouts, deadline))
+
+    def all_visible(d):
+        for i, (by_type, locator_value) in list(pending.items()):
+            if any(element.is_displayed() for element in d.find_elements(by_type, locator_value)):
+                del pending[i]
+        return not pending
+
+    errors = [None] * len(steps)
+    try:
+        # Single-page apps re-render elements between find and is_displayed; just poll again
+        timed_wait(driver, all_visible, timeout, timeouts, "waitForElementVisible",
+                   ignored_exceptions=(StaleElementReferenceException,))
+        return errors
+    except TimeoutException:
+        pass
+
+    for i in sorted(pending):
+        locator = steps[i].get("locator", {})
+        element = fallback_handler.execute_fallback_script("waitForElementVisible", locator.get("type"),
+                                                           locator.get("value"), deadline=deadline)
+        if not element:
+            errors[i] = f"Element {locator.get('value')} not visible after {timeout} seconds"
+    return errors
+
+
+def get_step_timeout(driver, action, timeouts=None, deadline=None, default=10):
+    timeout = timeouts.budget(driver.current_url, action, default) if timeouts else default
+    if deadline is not None:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutException(f"Test time budget exhausted before '{action}' step")
+        timeout = min(timeout, remaining)
+    return timeout
+
+
+def process_test_step(driver, step, fallback_handler, next_step=None, timeouts=None, deadline=None):
     action = step.get("action")
     locator = step.get("locator", {})
     locator_type = locator.get("type")
@@ -80,23 +370,27 @@ def process_test_step(driver, step, fallback_handler, next_step=None):
 
     by_type = get_by_type(locator_type)
 
-    timeout = 10
+    timeout = get_step_timeout(driver, action, timeouts, deadline)
 
     if action == "goto":
         url = locator_value
         if not url.startswith(('http://', 'https://')):
             url = 'https://' + url
+        start = time.monotonic()
         driver.get(url)
+        if timeouts:
+            timeouts.record(url, action, time.monotonic() - start)
 
     elif action == "input":
         time.sleep(1)
         input_value = step.get("input_value", "")
         try:
-            element = find_element(driver, by_type, locator_value)
+            element = find_element(driver, by_type, locator_value, timeout, timeouts, action)
             element.clear()
             element.send_keys(input_value)
         except NoSuchElementException:
-            element = fallback_handler.execute_fallback_script("input", locator_type, locator_value, input_value)
+            element = fallback_handler.execute_fallback_script("input", locator_type, locator_value, input_value,
+                                                              deadline=deadline)
             if not element:
                 raise NoSuchElementException(
                     f"Input element not found with locator: {locator_value} and no fallback succeeded")
@@ -106,7 +400,7 @@ def process_test_step(driver, step, fallback_handler, next_step=None):
     elif action == "click":
         time.sleep(2)
         try:
-            element = find_element(driver, by_type, locator_value)
+            element = find_element(driver, by_type, locator_value, timeout, timeouts, action)
             try:
                 element.click()
                 return
@@ -129,7 +423,7 @@ def process_test_step(driver, step, fallback_handler, next_step=None):
                         redirect_url = 'https://' + redirect_url
                     driver.get(redirect_url)
                     return
-            result = fallback_handler.execute_fallback_script("click", locator_type, locator_value)
+            result = fallback_handler.execute_fallback_script("click", locator_type, locator_value, deadline=deadline)
             if result:
                 try:
                     result.click()
@@ -158,20 +452,17 @@ def process_test_step(driver, step, fallback_handler, next_step=None):
 
     elif action == "waitForElementVisible":
         try:
-            WebDriverWait(driver, timeout).until(
-                EC.visibility_of_element_located((by_type, locator_value))
-            )
+            timed_wait(driver, EC.visibility_of_element_located((by_type, locator_value)), timeout, timeouts, action)
         except TimeoutException:
-            element = fallback_handler.execute_fallback_script("waitForElementVisible", locator_type, locator_value)
+            element = fallback_handler.execute_fallback_script("waitForElementVisible", locator_type, locator_value,
+                                                             deadline=deadline)
             if not element:
                 raise TimeoutException(f"Element {locator_value} not visible after {timeout} seconds")
 
     elif action == "waitForRedirect":
         expected_url = locator_value
         try:
-            WebDriverWait(driver, timeout).until(
-                lambda d: d.current_url == expected_url
-            )
+            timed_wait(driver, lambda d: d.current_url == expected_url, timeout, timeouts, action)
         except TimeoutException:
             if expected_url in driver.current_url:
                 print(f"URL partially matches expected URL. Current: {driver.current_url}, Expected: {expected_url}")
@@ -202,19 +493,35 @@ def get_by_type(locator_type):
         return By.XPATH
 
 
-def find_element(driver, by_type, locator_value):
+def find_element(driver, by_type, locator_value, timeout=10, timeouts=None, action="find"):
     try:
-        element = WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located((by_type, locator_value))
-        )
+        element = timed_wait(driver, EC.presence_of_element_located((by_type, locator_value)), timeout, timeouts,
+                             action)
         return element
     except TimeoutException:
         raise NoSuchElementException(f"Element not found: {locator_value}")
 
 
+def timed_wait(driver, condition, timeout, timeouts=None, action=None, ignored_exceptions=None):
+    wait = WebDriverWait(driver, timeout, ignored_exceptions=ignored_exceptions)
+    if not timeouts:
+        return wait.until(condition)
+
+    origin = driver.current_url
+    start = time.monotonic()
+    try:
+        result = wait.until(condition)
+    except TimeoutException:
+        # A wrong locator that the fallback handler heals also ends up here, but it only
+        # widens the budget once timeouts make up more than the top percentile of samples
+        timeouts.record_timeout(origin, action, timeout)
+        raise
+    timeouts.record(origin, action, time.monotonic() - start)
+    return result
+
+
 def run_test(test_name):
-    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    file_path = os.path.join(project_root, "data", "autos", test_name)
+    file_path = data_path("autos", test_name)
 
     if not os.path.exists(file_path):
         print(f"File not found: {file_path}")
@@ -0,0 +1,332 @@
+import argparse
+import collections
+import json
+import os
+import re
+import threading
+import time
+
+from automate.corpus import CASES_DIR, load_corpus, parse_markdown
+from automate.prompts import (MAX_OUTPUT_TOKENS, PromptPlanner, estimate_file_tokens, estimate_output_tokens,
+                              estimate_tokens, render_prompt, run_chunks)
+from automate.responses import validate_suite
+
+
+FAST_MODEL = os.environ.get("SHASTER_FAST_MODEL", "gemini-2.0-flash-lite")
+STRONG_MODEL = os.environ.get("SHASTER_STRONG_MODEL", "gemini-2.0-flash")
+
+# Requests at or under both limits count as small and simple
+SMALL_INPUT_TOKENS = 20000
+SMALL_OUTPUT_TOKENS = 1500
+
+
+class ModelBackend:
+    """A model that turns a generation request into response text.
+
+    A request is a dict with ``prompt``, ``markdown``, ``md_path``, ``pages``
+    (snapshot paths) and ``max_output_tokens``; each backend decides how to
+    attach the files.
+    """
+
+    name = "backend"
+    tier = "strong"
+
+    def generate(self, request):
+        raise NotImplementedError
+
+
+class GeminiBackend(ModelBackend):
+
+    def __init__(self, model, tier="strong", api_key=None, temperature=0, top_p=0.5, top_k=40, client=None,
+                 base_url=None):
+        self.model = model
+        self.name = f"gemini:{model}"
+        self.tier = tier
+        self.api_key = api_key
+        self.base_url = base_url
+        self.temperature = temperature
+        self.top_p = top_p
+        self.top_k = top_k
+        self._client = client
+        self._uploader = None
+        self._lock = threading.Lock()
+
+    def generate(self, request):
+        client, uploader = self._connect()
+        parts = self._parts(uploader, request)
+        try:
+            return self._send(client, parts, request)
+        except Exception as e:
+            # Cached file references can be deleted or expire early on the server side
+            uris = {part["file_data"]["file_uri"] for part in parts if "file_data" in part}
+            if getattr(e, "code", None) not in (403, 404) or not uploader.forget(uris):
+                raise
+            print(f"{self.name} rejected a cached upload ({e}), uploading again")
+            return self._send(client, self._parts(uploader, request), request)
+
+    def _parts(self, uploader, request):
+        parts = [{"text": request["prompt"]}]
+        if request.get("md_path") and not request.get("split") == "case":
+            md_part = uploader.part(request["md_path"])
+            if md_part:
+                parts.append(md_part)
+        elif request.get("markdown"):
+            parts.append({"text": request["markdown"]})
+        for path in request.get("pages", []):
+            html_part = uploader.part(path)
+            if html_part:
+                parts.append(html_part)
+        return parts
+
+    def _send(self, client, parts, request):
+        from google.genai import types
+
+        response = client.models.generate_content(
+            model=self.model,
+            contents={"role": "user", "parts": parts},
+            config=types.GenerateContentConfig(
+                temperature=self.temperature,
+                top_p=self.top_p,
+                top_k=self.top_k,
+                max_output_tokens=request.get("max_output_tokens", MAX_OUTPUT_TOKENS),
+            )
+        )
+        return response.text
+
+    def _connect(self):
+        with self._lock:
+            if self._client is None:
+                from google import genai
+
+                api_key = self._api_key()
+                if not api_key:
+                    raise RuntimeError("Set GEMINI_API_KEY to use the Gemini backend")
+                http_options = {"base_url": self.base_url} if self.base_url else None
+                self._client = genai.Client(api_key=api_key, http_options=http_options)
+            if self._uploader is None:
+                from automate.attachments import AttachmentUploader, upload_namespace
+
+                self._uploader = AttachmentUploader(self._client,
+                                                    namespace=upload_namespace(self._api_key(), self.base_url))
+            return self._client, self._uploader
+
+    def _api_key(self):
+        return self.api_key or os.environ.get("GEMINI_API_KEY") or os.environ.get("GOOGLE_API_KEY")
+
+
+class StubBackend(ModelBackend):
+    """Deterministic offline provider that turns the case markdown into a plausible suite.
+
+    The same request always yields the same suite, so the whole pipeline can be
+    benchmarked without network access or model variance.
+    """
+
+    CLICK_PATTERN = re.compile(r'click(?: on)?(?: the)?\s+"([^"]+)"\s+(button|link)?', re.IGNORECASE)
+    INPUT_PATTERN = re.compile(r'(?:enter|input|type)\s+"([^"]+)"\s+(?:into|in)\s+(?:the\s+)?(.+?)\s+field',
+                               re.IGNORECASE)
+    WAIT_TEXT_PATTERN = re.compile(r'wait for\s+"([^"]+)"', re.IGNORECASE)
+    REDIRECT_PATTERN = re.compile(r'redirect to', re.IGNORECASE)
+    GOTO_PATTERN = re.compile(r'^(?:go to|navigate to|open)\b', re.IGNORECASE)
+
+    def __init__(self, name="stub", tier="fast", latency=0.0, fail_every=0):
+        self.name = name
+        self.tier = tier
+        self.latency = latency
+        self.fail_every = fail_every
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def generate(self, request):
+        with self._lock:
+            self.calls += 1
+            calls = self.calls
+        if self.latency:
+            time.sleep(self.latency)
+        if self.fail_every and calls % self.fail_every == 0:
+            raise RuntimeError(f"{self.name} simulated failure")
+
+        markdown = request.get("markdown") or ""
+        if not markdown and request.get("md_path"):
+            with open(request["md_path"], 'r', encoding='utf-8') as f:
+                markdown = f.read()
+
+        model = parse_markdown(markdown)
+        suite = []
+        for case in model["cases"]:
+            steps = [step for item in case["steps"] for step in self._steps(item)]
+            if steps:
+                suite.append({"testName": case["name"], "steps": steps})
+        return "```json\n" + json.dumps(suite, indent=2) + "\n```"
+
+    def _steps(self, item):
+        steps = []
+        for text in [item["text"]] + item["actions"]:
+            urls = [url for url in item["urls"] if url in text]
+            click = self.CLICK_PATTERN.search(text)
+            entered = self.INPUT_PATTERN.search(text)
+            waited = self.WAIT_TEXT_PATTERN.search(text)
+            if urls and self.REDIRECT_PATTERN.search(text):
+                steps.append({"action": "waitForRedirect", "locator": {"type": "url", "value": urls[0]}})
+            elif urls and (self.GOTO_PATTERN.search(text) or "navigate" in text.lower()):
+                steps.append({"action": "goto", "locator": {"type": "url", "value": urls[0]}})
+            elif entered:
+                field = entered.group(2).split()[-1].lower()
+                steps.append({"action": "input", "locator": {"type": "xpath", "value": f"//input[@name='{field}']"},
+                              "input_value": entered.group(1)})
+            elif click:
+                tag = "a" if (click.group(2) or "").lower() == "link" else "button"
+                steps.append({"action": "click",
+                              "locator": {"type": "xpath", "value": f"//{tag}[text()='{click.group(1)}']"}})
+            elif waited:
+                steps.append({"action": "waitForElementVisible",
+                              "locator": {"type": "xpath", "value": f"//*[contains(text(), '{waited.group(1)}')]"}})
+        return steps
+
+
+class BackendStats:
+    """Latency (EWMA) and recent failure rate of one backend."""
+
+    def __init__(self, window=20, alpha=0.3):
+        self.alpha = alpha
+        self.latency = None
+        self.outcomes = collections.deque(maxlen=window)
+        self.calls = 0
+        self.open_until = 0.0
+
+    def record(self, seconds, ok):
+        self.calls += 1
+        self.outcomes.append(ok)
+        if ok:
+            self.latency = seconds if self.latency is None else self.alpha * seconds + (1 - self.alpha) * self.latency
+
+    @property
+    def failure_rate(self):
+        return 0.0 if not self.outcomes else 1 - sum(self.outcomes) / len(self.outcomes)
+
+    def as_dict(self):
+        return {
+            "calls": self.calls,
+            "latency": round(self.latency, 3) if self.latency is not None else None,
+            "failure_rate": round(self.failure_rate, 2),
+        }
+
+
+class BackendRouter:
+    """Sends small, simple requests to fast backends and the rest to strong ones, failing over on errors.
+
+    Within a tier backends are ordered by observed latency. A backend whose
+    recent failure rate reaches ``max_failure_rate`` is skipped for
+    ``cooldown`` seconds unless nothing else is left.
+    """
+
+    def __init__(self, backends, max_failure_rate=0.5, min_calls=3, cooldown=60.0):
+        self.backends = list(backends)
+        self.max_failure_rate = max_failure_rate
+        self.min_calls = min_calls
+        self.cooldown = cooldown
+        self.stats = {backend.name: BackendStats() for backend in self.backends}
+        self._lock = threading.Lock()
+
+    def classify(self, request):
+        input_tokens = estimate_tokens(request.get("prompt", "")) + estimate_tokens(request.get("markdown") or "")
+        input_tokens += sum(estimate_file_tokens(path) for path in request.get("pages", []))
+        output_tokens = estimate_output_tokens(request.get("markdown") or "")
+        if input_tokens <= SMALL_INPUT_TOKENS and output_tokens <= SMALL_OUTPUT_TOKENS:
+            return "fast"
+        return "strong"
+
+    def order(self, tier):
+        now = time.monotonic()
+        with self._lock:
+            # Backends without a latency yet sort first within their tier so they get measured
+            ranked = sorted(self.backends, key=lambda backend: (backend.tier != tier,
+                                                                self.stats[backend.name].latency or 0.0))
+            healthy = [backend for backend in ranked if self.stats[backend.name].open_until <= now]
+            tripped = [backend for backend in ranked if self.stats[backend.name].open_until > now]
+        return healthy + tripped
+
+    def generate(self, request):
+        tier = self.classify(request)
+        errors = []
+        for backend in self.order(tier):
+            start = time.monotonic()
+            try:
+                text = backend.generate(request)
+            except Exception as e:
+                self._record(backend, time.monotonic() - start, False)
+                errors.append(f"{backend.name}: {e}")
+                print(f"Backend {backend.name} failed, failing over: {e}")
+                continue
+            self._record(backend, time.monotonic() - start, True)
+            return text
+        raise RuntimeError("All model backends failed: " + "; ".join(errors))
+
+    def report(self):
+        with self._lock:
+            return {name: stats.as_dict() for name, stats in self.stats.items()}
+
+    def _record(self, backend, seconds, ok):
+        with self._lock:
+            stats = self.stats[backend.name]
+            stats.record(seconds, ok)
+            if not ok and stats.calls >= self.min_calls and stats.failure_rate >= self.max_failure_rate:
+                stats.open_until = time.monotonic() + self.cooldown
+
+
+def default_router():
+    """Gemini fast and strong models, or the offline stub provider when ``SHASTER_BACKEND=stub``."""
+    if os.environ.get("SHASTER_BACKEND") == "stub":
+        print("SHASTER_BACKEND=stub, using the offline stub backend")
+        return BackendRouter([StubBackend()])
+    if not (os.environ.get("GEMINI_API_KEY") or os.environ.get("GOOGLE_API_KEY")):
+        # Falling back to the stub here would overwrite real suites with made-up ones
+        raise RuntimeError("GEMINI_API_KEY is not set; set it, or SHASTER_BACKEND=stub for the offline stub backend")
+    return BackendRouter([GeminiBackend(FAST_MODEL, tier="fast"), GeminiBackend(STRONG_MODEL, tier="strong")])
+
+
+def build_request(chunk, md_path=None, max_output_tokens=MAX_OUTPUT_TOKENS):
+    return {
+        "prompt": render_prompt(chunk["note"]),
+        "markdown": chunk["markdown"],
+        "md_path": md_path,
+        "pages": chunk["pages"],
+        "split": chunk["split"],
+        "max_output_tokens": max_output_tokens,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the generation pipeline over the case corpus")
+    parser.add_argument("--root", default=CASES_DIR)
+    parser.add_argument("--latency", type=float, default=0.05, help="Simulated stub latency in seconds")
+    parser.add_argument("--fail-every", type=int, default=0, help="Make the fast stub fail every N calls")
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args(argv)
+
+    router = BackendRouter([
+        StubBackend("stub-fast", tier="fast", latency=args.latency, fail_every=args.fail_every),
+        StubBackend("stub-strong", tier="strong", latency=args.latency * 3),
+    ])
+    planner = PromptPlanner()
+
+    start = time.monotonic()
+    tests = steps = invalid = 0
+    for key, model in load_corpus(args.root).items():
+        path = os.path.join(args.root, key)
+        with open(path, 'r', encoding='utf-8') as f:
+            markdown = f.read()
+        chunks = planner.plan(markdown, [])
+        suite = run_chunks(chunks, lambda chunk: router.generate(build_request(chunk, path)), args.workers)
+        tests += len(suite)
+        steps += sum(len(test["steps"]) for test in suite)
+        invalid += len(validate_suite(suite))
+
+    elapsed = time.monotonic() - start
+    print(f"{tests} tests, {steps} steps, {invalid} schema errors in {elapsed:.2f}s")
+    for name, stats in router.report().items():
+        print(f"  {name}: {stats}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
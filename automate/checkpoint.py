@@ -0,0 +1,96 @@
+import hashlib
+import json
+import os
+from datetime import datetime, timezone
+
+from automate.storage import data_path
+
+
+CHECKPOINT_DIR = data_path("checkpoints")
+
+
+def suite_digest(test_data):
+    return hashlib.sha256(json.dumps(test_data, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+class CheckpointJournal:
+    """Per-suite JSONL journal with one line per finished test, flushed to disk as the run goes.
+
+    Each line keeps the test's result, step log and the browser session state
+    after it, so an interrupted run can resume after the last finished test
+    without repeating it or the login that came before it. The journal is
+    removed once the suite completes.
+    """
+
+    def __init__(self, suite_name, test_data, root=CHECKPOINT_DIR):
+        self.suite_name = suite_name
+        self.digest = suite_digest(test_data)
+        self.path = os.path.join(root, f"{suite_name}.jsonl")
+        self.session = None
+        self._file = None
+
+    def begin(self, resume=False):
+        """Open the journal and return the tests already finished, keyed by name, when resuming."""
+        finished = self._load() if resume else {}
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        if finished:
+            print(f"Resuming {self.suite_name}: {len(finished)} test(s) already finished")
+            self._file = open(self.path, 'a', encoding='utf-8')
+        else:
+            self._file = open(self.path, 'w', encoding='utf-8')
+            self._write({"type": "start", "suite": self.suite_name, "digest": self.digest,
+                         "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds")})
+        return finished
+
+    def record(self, test_name, result, duration, step_log=None, attempt=0, memory=None, session=None):
+        self._write({"type": "test", "name": test_name, "result": result, "duration": round(duration, 3),
+                     "attempt": attempt, "steps": step_log or [], "memory": memory, "session": session})
+
+    def complete(self):
+        self.close()
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+    def close(self, flushed=False):
+        """Close the journal; ``flushed`` marks the tests so far as saved to the results store and history."""
+        if self._file:
+            if flushed:
+                self._write({"type": "flushed"})
+            self._file.close()
+            self._file = None
+
+    def _write(self, entry):
+        self._file.write(json.dumps(entry, separators=(",", ":")) + "\n")
+        self._file.flush()
+        # The point of the journal is to survive a crash, so do not leave it in the page cache
+        os.fsync(self._file.fileno())
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            print(f"No checkpoint for {self.suite_name}, running from the start")
+            return {}
+
+        finished = {}
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # The process was killed mid-write
+                    continue
+                if entry.get("type") == "start" and entry.get("digest") != self.digest:
+                    print(f"{self.suite_name} changed since it was checkpointed, running from the start")
+                    return {}
+                if entry.get("type") == "test":
+                    # Later lines (retries) override earlier ones
+                    entry["flushed"] = False
+                    finished[entry["name"]] = entry
+                    if entry.get("session"):
+                        self.session = entry["session"]
+                elif entry.get("type") == "flushed":
+                    # An interrupted run that still got to save its results; do not record them twice
+                    for test in finished.values():
+                        test["flushed"] = True
+        return finished
@@ -0,0 +1,281 @@
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from selenium import webdriver
+
+from automate.artifacts import ArtifactCollector
+from automate.async_backend import free_port
+from automate.automate import run_single_test
+from automate.fallback_handler import FallbackHandler
+from automate.flaky import FlakyHistory
+from automate.healing import collect_heals, write_back_heals
+from automate.telemetry import FallbackTelemetry
+from automate.results import ResultsStore, RunRecorder
+from automate.sharding import DurationModel, longest_first
+from automate.timeouts import TimeoutController
+from automate.watchdog import process_tree_rss
+
+BROWSER_BINARIES = {
+    "chrome": ["google-chrome", "google-chrome-stable", "chromium", "chromium-browser", "chrome"],
+    "edge": ["microsoft-edge", "microsoft-edge-stable", "msedge"],
+}
+
+
+class BrowserContextPool:
+    """Runs many isolated browser contexts inside one Chromium-based browser.
+
+    Each context is an incognito-like CDP browser context with its own cookies
+    and storage, driven by a lightweight WebDriver session attached to the
+    shared browser over its DevTools port.
+    """
+
+    def __init__(self, browser='chrome', headless=True, max_contexts=4, memory_cap_mb=None,
+                 watchdog_interval=2.0, binary=None):
+        self.browser = browser.lower()
+        if self.browser not in BROWSER_BINARIES:
+            raise ValueError(f"Context multiplexing is not supported for browser: {browser}")
+        self.headless = headless
+        self.max_contexts = max_contexts
+        self.memory_cap_mb = memory_cap_mb
+        self.watchdog_interval = watchdog_interval
+        self.binary = binary or _find_binary(BROWSER_BINARIES[self.browser])
+
+        self.process = None
+        self.port = None
+        self.profile_dir = None
+        self.rss_mb = None
+        self.healthy = False
+        self.active = {}
+        self._slots = threading.Semaphore(max_contexts)
+        self._lock = threading.Lock()
+        self._capacity = threading.Condition(self._lock)
+        self._stop = threading.Event()
+        self._watchdog = None
+
+    def start(self):
+        self._launch_browser()
+        self._watchdog = threading.Thread(target=self._watch, name="browser-watchdog", daemon=True)
+        self._watchdog.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        for driver in list(self.active):
+            self.close_context(driver)
+        self._kill_browser()
+
+    def open_context(self):
+        self._slots.acquire()
+        try:
+            with self._capacity:
+                # Hold new contexts back while the browser is over its memory cap
+                while (self._over_cap() and self.active) or not self.healthy:
+                    self._capacity.wait(self.watchdog_interval)
+
+            driver = self._attach()
+            context_id = driver.execute_cdp_cmd("Target.createBrowserContext", {})["browserContextId"]
+            target_id = driver.execute_cdp_cmd(
+                "Target.createTarget", {"url": "about:blank", "browserContextId": context_id})["targetId"]
+            driver.switch_to.window(target_id)
+
+            with self._lock:
+                self.active[driver] = (context_id, target_id)
+            return driver
+        except Exception:
+            self._slots.release()
+            raise
+
+    def close_context(self, driver):
+        with self._lock:
+            ids = self.active.pop(driver, None)
+        if ids is None:
+            return
+
+        context_id, target_id = ids
+        try:
+            driver.execute_cdp_cmd("Target.closeTarget", {"targetId": target_id})
+            driver.execute_cdp_cmd("Target.disposeBrowserContext", {"browserContextId": context_id})
+        except Exception as e:
+            print(f"Error disposing browser context {context_id}: {e}")
+        finally:
+            try:
+                # The session is attached, so quitting leaves the shared browser running
+                driver.quit()
+            except Exception:
+                pass
+            self._slots.release()
+            with self._capacity:
+                self._capacity.notify_all()
+
+    def _attach(self):
+        if self.browser == 'edge':
+            options = webdriver.EdgeOptions()
+            options.debugger_address = f"127.0.0.1:{self.port}"
+            return webdriver.Edge(options=options)
+
+        options = webdriver.ChromeOptions()
+        options.debugger_address = f"127.0.0.1:{self.port}"
+        return webdriver.Chrome(options=options)
+
+    def _launch_browser(self, startup_timeout=20):
+        if not self.binary:
+            raise FileNotFoundError(f"No {self.browser} binary found, pass binary= explicitly")
+
+        self.port = free_port()
+        self.profile_dir = tempfile.mkdtemp(prefix="shaster-browser-")
+        args = [self.binary, f"--remote-debugging-port={self.port}", f"--user-data-dir={self.profile_dir}",
+                "--no-first-run", "--no-default-browser-check", "about:blank"]
+        if self.headless:
+            args.insert(1, "--headless=new")
+        self.process = subprocess.Popen(args, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+        deadline = time.monotonic() + startup_timeout
+        while time.monotonic() < deadline:
+            if self._devtools_alive():
+                self.healthy = True
+                return
+            time.sleep(0.1)
+        self._kill_browser()
+        raise RuntimeError(f"{self.binary} did not expose DevTools on port {self.port}")
+
+    def _kill_browser(self):
+        self.healthy = False
+        if self.process and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+        if self.profile_dir:
+            shutil.rmtree(self.profile_dir, ignore_errors=True)
+            self.profile_dir = None
+
+    def _devtools_alive(self):
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{self.port}/json/version", timeout=2) as response:
+                return "Browser" in json.loads(response.read())
+        except Exception:
+            return False
+
+    def _over_cap(self):
+        return bool(self.memory_cap_mb and self.rss_mb and self.rss_mb > self.memory_cap_mb)
+
+    def _watch(self):
+        while not self._stop.wait(self.watchdog_interval):
+            rss = process_tree_rss(self.process.pid)
+            self.rss_mb = rss / (1024 * 1024) if rss is not None else None
+
+            alive = self.process.poll() is None and self._devtools_alive()
+            if not alive:
+                # Contexts on the dead browser fail on their own and are released by close_context
+                print("Browser health check failed, restarting shared browser")
+                self._kill_browser()
+                try:
+                    self._launch_browser()
+                except Exception as e:
+                    print(f"Error restarting browser: {e}")
+            elif self._over_cap():
+                print(f"Browser memory {self.rss_mb:.0f} MB is over the {self.memory_cap_mb} MB cap, "
+                      f"holding new contexts")
+
+            with self._capacity:
+                self._capacity.notify_all()
+
+
+def run_tests_multiplexed(file_path, browser='chrome', headless=True, max_contexts=4, memory_cap_mb=None,
+                          adaptive_timeouts=True, test_budget=None, track_flakiness=True, record_results=True,
+                          collect_telemetry=True, write_back=False, min_heal_confidence=0.6):
+    try:
+        with open(file_path, 'r') as file:
+            test_data = json.load(file)
+    except (FileNotFoundError, json.JSONDecodeError) as e:
+        print(f"Error loading test file: {e}")
+        return {"error": str(e)}
+
+    suite_name = os.path.splitext(os.path.basename(file_path))[0]
+    timeouts = TimeoutController() if adaptive_timeouts else None
+    artifacts = ArtifactCollector(suite_name)
+    history = FlakyHistory() if track_flakiness else None
+    recorder = RunRecorder(suite_name, browser) if record_results else None
+    telemetry = FallbackTelemetry(suite_name) if collect_telemetry else None
+    pool = BrowserContextPool(browser, headless, max_contexts, memory_cap_mb).start()
+    heals = {}
+
+    def run_one(test):
+        test_name = test.get("testName", "Unnamed Test")
+        step_log = []
+        start = time.monotonic()
+        try:
+            driver = pool.open_context()
+        except Exception as e:
+            # Fail this test only, so the results of the others are kept
+            print(f"Test '{test_name}' failed: could not open a browser context: {e}")
+            result = f"FAIL: could not open a browser context: {e}"
+        else:
+            try:
+                fallback_handler = FallbackHandler(driver, timeouts=timeouts, telemetry=telemetry)
+                result = run_single_test(driver, test, fallback_handler, timeouts, test_budget, artifacts,
+                                         step_log)
+            except Exception as e:
+                result = f"FAIL: {str(e)}"
+            finally:
+                try:
+                    pool.close_context(driver)
+                except Exception as e:
+                    print(f"Error closing the browser context of '{test_name}': {e}")
+        if recorder:
+            recorder.add_test(test_name, result, time.monotonic() - start, step_log)
+        heals[test_name] = collect_heals(test_name, step_log)
+        if history:
+            history.record(suite_name, test_name, result == "PASS", step_log)
+        return test_name, result
+
+    # Quarantined tests run in their own lane once the main lane has finished
+    main_lane, quarantine_lane = test_data, []
+    if history:
+        main_lane = [test for test in test_data
+                     if not history.is_quarantined(suite_name, test.get("testName", "Unnamed Test"))]
+        quarantine_lane = [test for test in test_data if test not in main_lane]
+    # Longest first, so the last contexts to finish are not stuck on one long test
+    model = DurationModel({suite_name: test_data})
+    main_lane = longest_first(suite_name, main_lane, model)
+
+    results = {}
+    try:
+        with ThreadPoolExecutor(max_workers=max_contexts) as executor:
+            results.update(executor.map(run_one, main_lane))
+            results.update(executor.map(run_one, quarantine_lane))
+
+        if write_back:
+            write_back_heals(file_path, [heal for test_name, found in heals.items()
+                                         if results.get(test_name) == "PASS" for heal in found],
+                             min_heal_confidence)
+    finally:
+        pool.stop()
+        artifacts.close()
+        if timeouts:
+            timeouts.save()
+        if history:
+            history.save()
+            history.report(suite_name, test_data)
+        if recorder:
+            ResultsStore().append(recorder.finish())
+        if telemetry:
+            telemetry.save()
+
+    return results
+
+
+def _find_binary(candidates):
+    for candidate in candidates:
+        path = shutil.which(candidate)
+        if path:
+            return path
+    return None
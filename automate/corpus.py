@@ -0,0 +1,256 @@
+import argparse
+import glob
+import hashlib
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+from automate.storage import data_path, write_json_atomic
+from automate.textutils import extract_urls
+
+
+CASES_DIR = data_path("cases")
+CACHE_PATH = data_path("cache", "corpus.json")
+
+# Bump when the parsed model changes shape so stale cache entries are re-parsed
+MODEL_VERSION = 1
+
+# Below this many files the pool costs more to start than it saves
+PARALLEL_THRESHOLD = 4
+
+HEADING_PATTERN = re.compile(r'^(#{1,6})\s+(.*?)\s*$')
+BOLD_LABEL_PATTERN = re.compile(r'^\*\*(.+?):?\*\*:?\s*(.*?)\s*$')
+NUMBERED_PATTERN = re.compile(r'^(\d+)[.)]\s+(.*?)\s*$')
+BULLET_PATTERN = re.compile(r'^[-*+]\s+(.*?)\s*$')
+EXPECTED_PATTERN = re.compile(r'^\*{0,2}Expected(?: Result)?s?:?\*{0,2}:?\s*(.*)$', re.IGNORECASE)
+CREDENTIAL_LABEL_PATTERN = re.compile(
+    r'^\*{0,2}(Username|User name|Email|E-mail|Login|Password)\*{0,2}:\*{0,2}\s*\*{0,2}(\S+?)\*{0,2}\.?$',
+    re.IGNORECASE)
+CREDENTIAL_INPUT_PATTERN = re.compile(
+    r'(?:enter|input|type)\s+"([^"]+)"\s+(?:into|in)\s+(?:the\s+)?(.+?)\s+field', re.IGNORECASE)
+CREDENTIAL_FIELDS = ("user", "email", "login", "password")
+EMPHASIS_PATTERN = re.compile(r'\*\*(.+?)\*\*')
+
+
+def parse_markdown(text):
+    """Structured model of a test-case markdown file.
+
+    Understands both layouts in data/cases: ``## Case N`` sections with bullet
+    steps, and a single case with bold section labels and numbered steps whose
+    sub-bullets hold the actions and expected results.
+    """
+    model = {
+        "title": None,
+        "case_id": None,
+        "preconditions": [],
+        "credentials": [],
+        "cases": [],
+        "urls": [],
+    }
+    case = None
+    step = None
+    section = None
+
+    def start_case(name):
+        new_case = {"name": name, "steps": [], "expected": []}
+        model["cases"].append(new_case)
+        return new_case
+
+    for raw_line in text.splitlines():
+        line = raw_line.strip()
+        if not line or line == "---":
+            continue
+        indented = raw_line[:len(raw_line) - len(raw_line.lstrip())] != ""
+
+        heading = HEADING_PATTERN.match(line)
+        if heading:
+            level, name = len(heading.group(1)), heading.group(2)
+            if re.match(r'^steps?:?$', name, re.IGNORECASE):
+                section = "steps"
+            elif level == 1 or (level == 2 and model["title"] is None and not name.lower().startswith("case")):
+                model["title"] = name
+            else:
+                case = start_case(name)
+                section = None
+            step = None
+            continue
+
+        label = BOLD_LABEL_PATTERN.match(line)
+        if label and not CREDENTIAL_LABEL_PATTERN.match(line) and not EXPECTED_PATTERN.match(line):
+            name, value = label.group(1).strip(), label.group(2)
+            lowered = name.lower()
+            if lowered == "test case id":
+                model["case_id"] = value
+            elif lowered == "title":
+                model["title"] = value
+            elif lowered.startswith("precondition"):
+                section = "preconditions"
+            elif lowered.startswith("postcondition"):
+                section = "postconditions"
+            elif "steps" in lowered:
+                section = "steps"
+                if case is None:
+                    case = start_case(model["title"] or model["case_id"] or "Case 1")
+            step = None
+            continue
+
+        credential = CREDENTIAL_LABEL_PATTERN.match(BULLET_PATTERN.sub(r'\1', line))
+        if credential:
+            model["credentials"].append({"field": credential.group(1), "value": credential.group(2)})
+            continue
+
+        numbered = NUMBERED_PATTERN.match(line)
+        bullet = BULLET_PATTERN.match(line)
+        item = numbered.group(2) if numbered else bullet.group(1) if bullet else line
+
+        if section == "preconditions":
+            model["preconditions"].append(_plain(item))
+            continue
+        if section != "steps":
+            continue
+
+        if case is None:
+            case = start_case(model["title"] or "Case 1")
+
+        expected = EXPECTED_PATTERN.match(item)
+        if expected:
+            target = step["expected"] if step else case["expected"]
+            target.append(_plain(expected.group(1)))
+            continue
+
+        if numbered or (bullet and not indented) or step is None:
+            step = {
+                "number": int(numbered.group(1)) if numbered else len(case["steps"]) + 1,
+                "text": _plain(item).rstrip(":"),
+                "actions": [],
+                "expected": [],
+                "urls": extract_urls(item),
+            }
+            case["steps"].append(step)
+        else:
+            step["actions"].append(_plain(item))
+            step["urls"].extend(extract_urls(item))
+
+        for value, field in CREDENTIAL_INPUT_PATTERN.findall(item):
+            if any(name in field.lower() for name in CREDENTIAL_FIELDS):
+                model["credentials"].append({"field": field, "value": value})
+
+    model["urls"] = list(dict.fromkeys(extract_urls(text)))
+    model["credentials"] = list({(c["field"], c["value"]): c for c in model["credentials"]}.values())
+    return model
+
+
+def parse_case_file(path):
+    with open(path, 'rb') as f:
+        data = f.read()
+    model = parse_markdown(data.decode('utf-8'))
+    model["sha256"] = hashlib.sha256(data).hexdigest()
+    return model
+
+
+class Corpus:
+    """Parsed models of every test-case markdown file, cached by mtime and content hash."""
+
+    def __init__(self, root=CASES_DIR, cache_path=CACHE_PATH, workers=None):
+        self.root = root
+        self.cache_path = cache_path
+        self.workers = workers
+        self.cache = self._load_cache()
+
+    def load(self):
+        paths = sorted(glob.glob(os.path.join(self.root, "**", "*.md"), recursive=True))
+        models = {}
+        stale = []
+
+        for path in paths:
+            key = os.path.relpath(path, self.root)
+            stat = os.stat(path)
+            entry = self.cache.get(key)
+            if entry and entry["mtime"] == stat.st_mtime and entry["size"] == stat.st_size:
+                models[key] = entry["model"]
+                continue
+            if entry and entry["model"]["sha256"] == _file_hash(path):
+                # Touched but unchanged; keep the parse and remember the new mtime
+                entry["mtime"], entry["size"] = stat.st_mtime, stat.st_size
+                models[key] = entry["model"]
+                continue
+            stale.append((key, path, stat))
+
+        if stale:
+            print(f"Parsing {len(stale)} of {len(paths)} test case files")
+        for (key, path, stat), model in zip(stale, self._parse_all([path for _, path, _ in stale])):
+            self.cache[key] = {"mtime": stat.st_mtime, "size": stat.st_size, "model": model}
+            models[key] = model
+
+        for key in set(self.cache) - set(models):
+            del self.cache[key]
+        if stale or len(self.cache) != len(models):
+            self._save_cache()
+        return models
+
+    def _parse_all(self, paths):
+        if len(paths) < PARALLEL_THRESHOLD or self.workers == 1:
+            return [parse_case_file(path) for path in paths]
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            return list(executor.map(parse_case_file, paths, chunksize=max(1, len(paths) // 32)))
+
+    def _load_cache(self):
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return {}
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Error loading corpus cache from {self.cache_path}: {e}")
+            return {}
+        if data.get("version") != MODEL_VERSION or data.get("root") != os.path.abspath(self.root):
+            return {}
+        return data.get("files", {})
+
+    def _save_cache(self):
+        if not self.cache_path:
+            return
+        write_json_atomic(self.cache_path, {"version": MODEL_VERSION, "root": os.path.abspath(self.root),
+                                            "files": self.cache}, indent=None)
+
+
+def load_corpus(root=CASES_DIR, cache_path=CACHE_PATH, workers=None):
+    return Corpus(root, cache_path, workers).load()
+
+
+def corpus_urls(models):
+    """Unique URLs across the corpus, in file then page order."""
+    return list(dict.fromkeys(url for model in models.values() for url in model["urls"]))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Parse every test case markdown file into a structured model")
+    parser.add_argument("--root", default=CASES_DIR)
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--json", action="store_true", help="Print the parsed models as JSON")
+    args = parser.parse_args(argv)
+
+    models = load_corpus(args.root, workers=args.workers)
+    if args.json:
+        print(json.dumps(models, indent=2))
+        return 0
+
+    for key, model in models.items():
+        steps = sum(len(case["steps"]) for case in model["cases"])
+        print(f"{key}: {model['title'] or '-'} | {len(model['cases'])} cases, {steps} steps, "
+              f"{len(model['urls'])} urls, {len(model['credentials'])} credentials")
+    return 0
+
+
+def _plain(text):
+    return EMPHASIS_PATTERN.sub(r'\1', text).strip()
+
+
+def _file_hash(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
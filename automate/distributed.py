@@ -0,0 +1,571 @@
+import argparse
+import base64
+import collections
+import glob
+import json
+import os
+import queue
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+from automate.artifacts import ArtifactCollector, capture_state
+from automate.flaky import FlakyHistory
+from automate.results import ResultsStore, RunRecorder
+from automate.sharding import DurationModel
+from automate.storage import data_path
+
+
+AUTOS_DIR = data_path("autos")
+
+DEFAULT_PORT = 8765
+HEARTBEAT_INTERVAL = 5.0
+# A worker that sends nothing for this long is treated as dead
+HEARTBEAT_TIMEOUT = 20.0
+# A test that takes its worker down this many times is failed instead of re-queued
+MAX_ATTEMPTS = 3
+
+
+def send_message(sock, lock, message):
+    data = (json.dumps(message, separators=(",", ":")) + "\n").encode("utf-8")
+    with lock:
+        sock.sendall(data)
+
+
+def work_units(tests):
+    """Split a suite into the units handed out to workers.
+
+    Tests marked ``"independent": true`` become units of their own. The rest
+    build on the session earlier tests leave behind (e.g. "Prepare: Login"),
+    so they stay together as one unit, in suite order.
+    """
+    chain = [test for test in tests if not test.get("independent")]
+    return ([chain] if chain else []) + [[test] for test in tests if test.get("independent")]
+
+
+class _WorkerConnection:
+
+    def __init__(self, sock, address):
+        self.sock = sock
+        self.name = f"{address[0]}:{address[1]}"
+        self.lock = threading.Lock()
+        self.credits = 0
+        self.in_flight = {}
+        self.steps = {}
+        self.alive = True
+
+
+class Coordinator:
+    """Hands out the tests of JSON suites to remote workers and collects what they report.
+
+    The protocol is newline-delimited JSON over TCP. Work goes out in units
+    (see ``work_units``) that a worker runs in order on a fresh browser.
+    Workers pull work by sending ``ready`` whenever a browser slot is free,
+    and stream ``step``, ``artifact`` and per-test ``result`` messages back.
+    A worker that disconnects or misses heartbeats has its in-flight units
+    put back at the front of the queue; their tests are run again from the
+    start, but only the results of tests not reported yet are kept.
+    """
+
+    def __init__(self, suite_paths, host="0.0.0.0", port=DEFAULT_PORT, heartbeat_timeout=HEARTBEAT_TIMEOUT,
+                 max_attempts=MAX_ATTEMPTS, track_flakiness=True, record_results=True):
+        self.host = host
+        self.port = port
+        self.heartbeat_timeout = heartbeat_timeout
+        self.max_attempts = max_attempts
+        self.history = FlakyHistory() if track_flakiness else None
+        self.record_results = record_results
+        self.suites = {}
+        self.pending = collections.deque()
+        self.remaining = 0
+        self._server = None
+        self._handlers = []
+        self._connections = []
+        self._cond = threading.Condition()
+        self._done = threading.Event()
+        self._load(suite_paths)
+
+    def _load(self, suite_paths):
+        for path in suite_paths:
+            try:
+                with open(path, 'r') as file:
+                    tests = json.load(file)
+            except (FileNotFoundError, json.JSONDecodeError) as e:
+                print(f"Error loading test file {path}: {e}")
+                continue
+
+            suite_name = os.path.splitext(os.path.basename(path))[0]
+            self.suites[suite_name] = {
+                "tests": tests,
+                "results": {},
+                "recorder": RunRecorder(suite_name, "distributed") if self.record_results else None,
+                "artifacts": ArtifactCollector(suite_name),
+            }
+
+        # Longest units go out first so no worker is left running a long one at the end;
+        # quarantined tests go last so they do not hold up the main run
+        model = DurationModel({name: suite["tests"] for name, suite in self.suites.items()})
+        items = [{"task": f"{suite_name}:{index}", "suite": suite_name, "tests": tests, "attempts": 0,
+                  "done": set()}
+                 for suite_name, suite in self.suites.items() for index, tests in enumerate(work_units(suite["tests"]))]
+        items.sort(key=lambda item: (self._quarantined(item),
+                                     -sum(model.estimate(item["suite"], test) for test in item["tests"])))
+        self.pending.extend(items)
+        self.remaining = sum(len(item["tests"]) for item in items)
+        if not self.remaining:
+            self._done.set()
+
+    def _quarantined(self, item):
+        return bool(self.history) and all(self.history.is_quarantined(item["suite"],
+                                                                      test.get("testName", "Unnamed Test"))
+                                          for test in item["tests"])
+
+    def start(self):
+        self._server = socket.create_server((self.host, self.port))
+        self._server.settimeout(0.5)
+        self.port = self._server.getsockname()[1]
+        threading.Thread(target=self._accept_loop, name="coordinator-accept", daemon=True).start()
+        print(f"Coordinator listening on {self.host}:{self.port} with {self.remaining} test(s) "
+              f"from {len(self.suites)} suite(s)")
+        return self
+
+    def wait(self):
+        try:
+            self._done.wait()
+            # Let workers receive their shutdown before the listener goes away
+            for handler in list(self._handlers):
+                handler.join(timeout=5)
+        finally:
+            self._server.close()
+            self._finish()
+        return {name: suite["results"] for name, suite in self.suites.items()}
+
+    def serve(self):
+        return self.start().wait()
+
+    def abort(self, reason):
+        """Fail every test that has not finished, e.g. when no worker is left to run it."""
+        with self._cond:
+            unfinished = list(self.pending)
+            unfinished += [item for conn in self._connections for item in conn.in_flight.values()]
+            self.pending.clear()
+            for conn in self._connections:
+                conn.in_flight.clear()
+            failed = 0
+            for item in unfinished:
+                for index in self._unreported(item):
+                    self._record(item, index, f"FAIL: {reason}", 0.0, [])
+                    failed += 1
+            self._cond.notify_all()
+        if failed:
+            print(f"Failed {failed} unfinished test(s): {reason}")
+
+    def _accept_loop(self):
+        while not self._done.is_set():
+            try:
+                sock, address = self._server.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                return
+            handler = threading.Thread(target=self._handle, args=(sock, address), daemon=True)
+            self._handlers.append(handler)
+            handler.start()
+
+    def _handle(self, sock, address):
+        conn = _WorkerConnection(sock, address)
+        with self._cond:
+            self._connections.append(conn)
+        sock.settimeout(self.heartbeat_timeout)
+        reason = "disconnected"
+        try:
+            reader = sock.makefile('rb')
+            hello = json.loads(reader.readline() or b"{}")
+            conn.name = hello.get("worker", conn.name)
+            print(f"Worker {conn.name} connected with {hello.get('slots', 1)} slot(s)")
+            threading.Thread(target=self._feed, args=(conn,), daemon=True).start()
+            for line in reader:
+                self._dispatch(conn, json.loads(line))
+        except socket.timeout:
+            reason = f"missed heartbeats for {self.heartbeat_timeout}s"
+        except (OSError, ValueError) as e:
+            reason = str(e) or type(e).__name__
+        finally:
+            self._lost(conn, reason)
+
+    def _dispatch(self, conn, message):
+        kind = message.get("type")
+        if kind == "ready":
+            with self._cond:
+                conn.credits += 1
+                self._cond.notify_all()
+        elif kind == "step":
+            with self._cond:
+                item = conn.in_flight.get(message["task"])
+                if not item:
+                    return
+                conn.steps[message["task"]].setdefault(message["index"], []).append(message["entry"])
+            entry = message["entry"]
+            test_name = item["tests"][message["index"]].get("testName", "Unnamed Test")
+            print(f"[{conn.name}] {item['suite']} | {test_name} | step {entry['index'] + 1} {entry['action']}: "
+                  f"{entry['outcome']}")
+        elif kind == "artifact":
+            with self._cond:
+                item = conn.in_flight.get(message["task"])
+            if item:
+                screenshot = base64.b64decode(message["screenshot"]) if message.get("screenshot") else None
+                self.suites[item["suite"]]["artifacts"].add(message["test"], screenshot, message.get("dom"),
+                                                           message.get("console"))
+        elif kind == "result":
+            index = message["index"]
+            with self._cond:
+                item = conn.in_flight.get(message["task"])
+                step_log = conn.steps.get(message["task"], {}).pop(index, [])
+                # Results for a unit already re-queued elsewhere, or for a test an earlier
+                # attempt of the unit already reported, are dropped
+                recorded = bool(item) and index not in item["done"]
+                if recorded:
+                    self._record(item, index, message["result"], message.get("duration", 0.0), step_log)
+                if item and not self._unreported(item):
+                    del conn.in_flight[message["task"]]
+                    conn.steps.pop(message["task"], None)
+            if recorded:
+                print(f"[{conn.name}] {item['suite']} | {item['tests'][index].get('testName', 'Unnamed Test')}: "
+                      f"{message['result']} ({self.remaining} left)")
+
+    def _feed(self, conn):
+        while True:
+            with self._cond:
+                while conn.alive and not self._done.is_set() and not (conn.credits and self.pending):
+                    self._cond.wait()
+                if not conn.alive:
+                    return
+                if self._done.is_set():
+                    item = None
+                else:
+                    item = self.pending.popleft()
+                    item["attempts"] += 1
+                    conn.credits -= 1
+                    conn.in_flight[item["task"]] = item
+                    conn.steps[item["task"]] = {}
+            try:
+                if item is None:
+                    send_message(conn.sock, conn.lock, {"type": "shutdown"})
+                    return
+                send_message(conn.sock, conn.lock, {"type": "task", "task": item["task"], "suite": item["suite"],
+                                                    "tests": item["tests"]})
+            except OSError as e:
+                self._lost(conn, str(e))
+                return
+
+    def _lost(self, conn, reason):
+        with self._cond:
+            if not conn.alive:
+                return
+            conn.alive = False
+            lost = list(conn.in_flight.values())
+            conn.in_flight.clear()
+            for item in reversed(lost):
+                if item["attempts"] >= self.max_attempts:
+                    for index in self._unreported(item):
+                        self._record(item, index, f"FAIL: worker lost {item['attempts']} times while running this test",
+                                     0.0, [])
+                else:
+                    self.pending.appendleft(item)
+            self._cond.notify_all()
+        try:
+            conn.sock.close()
+        except OSError:
+            pass
+        if lost:
+            print(f"Worker {conn.name} lost ({reason}), re-queued {len(lost)} test(s)")
+        else:
+            print(f"Worker {conn.name} {reason}")
+
+    @staticmethod
+    def _unreported(item):
+        return [index for index in range(len(item["tests"])) if index not in item["done"]]
+
+    def _record(self, item, index, result, duration, step_log):
+        # Called with the condition held
+        item["done"].add(index)
+        suite = self.suites[item["suite"]]
+        test_name = item["tests"][index].get("testName", "Unnamed Test")
+        suite["results"][test_name] = result
+        if suite["recorder"]:
+            suite["recorder"].add_test(test_name, result, duration, step_log, item["attempts"] - 1)
+        if self.history:
+            self.history.record(item["suite"], test_name, result == "PASS", step_log)
+        self.remaining -= 1
+        if self.remaining <= 0:
+            self._done.set()
+            self._cond.notify_all()
+
+    def _finish(self):
+        store = ResultsStore()
+        for name, suite in self.suites.items():
+            suite["artifacts"].close()
+            if suite["recorder"]:
+                store.append(suite["recorder"].finish())
+            if self.history:
+                self.history.report(name, suite["tests"])
+        if self.history:
+            self.history.save()
+
+
+class _StreamingLog(list):
+    """Step log that also reports each entry the moment it is appended."""
+
+    def __init__(self, on_append):
+        super().__init__()
+        self.on_append = on_append
+
+    def append(self, entry):
+        super().append(entry)
+        self.on_append(entry)
+
+
+class _RemoteArtifacts:
+    """Stands in for an ArtifactCollector and sends captures to the coordinator instead of disk."""
+
+    def __init__(self, worker, task):
+        self.worker = worker
+        self.task = task
+
+    def capture(self, driver, test_name):
+        screenshot, dom, console = capture_state(driver, test_name)
+        self.worker.send({"type": "artifact", "task": self.task, "test": test_name,
+                          "screenshot": base64.b64encode(screenshot).decode("ascii") if screenshot else None,
+                          "dom": dom, "console": console})
+
+
+class Worker:
+    """Runs units of tests handed out by a coordinator, each on a fresh browser, one unit per slot at a time."""
+
+    def __init__(self, host="127.0.0.1", port=DEFAULT_PORT, slots=1, browser='chrome', headless=True,
+                 dry_run=False, step_delay=0.05, heartbeat_interval=HEARTBEAT_INTERVAL, crash_after=None,
+                 connect_timeout=30.0, name=None):
+        self.host = host
+        self.port = port
+        self.slots = slots
+        self.browser = browser
+        self.headless = headless
+        self.dry_run = dry_run
+        self.step_delay = step_delay
+        self.heartbeat_interval = heartbeat_interval
+        self.crash_after = crash_after
+        self.connect_timeout = connect_timeout
+        self.name = name or f"{socket.gethostname()}-{os.getpid()}"
+        self.timeouts = None
+        self.received = 0
+        self._sock = None
+        self._lock = threading.Lock()
+        self._tasks = queue.Queue()
+        self._stop = threading.Event()
+
+    def send(self, message):
+        send_message(self._sock, self._lock, message)
+
+    def run(self):
+        self._sock = self._connect()
+        if not self.dry_run:
+            from automate.timeouts import TimeoutController
+
+            self.timeouts = TimeoutController()
+        self.send({"type": "hello", "worker": self.name, "slots": self.slots})
+        threading.Thread(target=self._heartbeat, name="worker-heartbeat", daemon=True).start()
+        slots = [threading.Thread(target=self._run_slot, name=f"worker-slot-{i}", daemon=True)
+                 for i in range(self.slots)]
+        for slot in slots:
+            slot.start()
+
+        try:
+            for line in self._sock.makefile('rb'):
+                message = json.loads(line)
+                if message.get("type") == "shutdown":
+                    break
+                if message.get("type") == "task":
+                    self.received += 1
+                    if self.crash_after and self.received > self.crash_after:
+                        print(f"Worker {self.name} crashing on purpose with a test in flight")
+                        os._exit(1)
+                    self._tasks.put(message)
+        except OSError as e:
+            print(f"Lost connection to the coordinator: {e}")
+        finally:
+            self._stop.set()
+            for _ in slots:
+                self._tasks.put(None)
+            for slot in slots:
+                slot.join()
+            if self.timeouts:
+                self.timeouts.save()
+            self._sock.close()
+        print(f"Worker {self.name} finished after {self.received} test(s)")
+        return 0
+
+    def _connect(self):
+        deadline = time.monotonic() + self.connect_timeout
+        while True:
+            try:
+                sock = socket.create_connection((self.host, self.port), timeout=5)
+            except OSError:
+                if time.monotonic() >= deadline:
+                    raise
+                time.sleep(0.2)
+                continue
+            # Tasks can run far longer than the connect timeout; the coordinator's heartbeat covers liveness
+            sock.settimeout(None)
+            return sock
+
+    def _heartbeat(self):
+        while not self._stop.wait(self.heartbeat_interval):
+            try:
+                self.send({"type": "heartbeat"})
+            except OSError:
+                return
+
+    def _run_slot(self):
+        while not self._stop.is_set():
+            try:
+                self.send({"type": "ready"})
+            except OSError:
+                return
+            item = self._tasks.get()
+            if item is None or not self._run_unit(item):
+                return
+
+    def _run_unit(self, item):
+        """Run the tests of one unit in order; False once the coordinator is gone."""
+        # Cookies and storage must not leak from one unit into the next, so every unit gets its own browser
+        driver = None
+        try:
+            for index, test in enumerate(item["tests"]):
+                step_log = _StreamingLog(lambda entry, task=item["task"], index=index: self.send(
+                    {"type": "step", "task": task, "index": index, "entry": entry}))
+                start = time.monotonic()
+                if self.dry_run:
+                    result = self._simulate(test, step_log)
+                else:
+                    driver, result = self._run_test(driver, item["task"], test, step_log)
+                try:
+                    self.send({"type": "result", "task": item["task"], "index": index, "result": result,
+                               "duration": time.monotonic() - start})
+                except OSError:
+                    return False
+        finally:
+            if driver:
+                driver.quit()
+        return True
+
+    def _run_test(self, driver, task, test, step_log):
+        from automate.automate import run_single_test, setup_webdriver
+        from automate.fallback_handler import FallbackHandler
+
+        try:
+            if driver is None:
+                driver = setup_webdriver(self.browser, self.headless)
+        except Exception as e:
+            return None, f"FAIL: could not start {self.browser}: {e}"
+        fallback_handler = FallbackHandler(driver, timeouts=self.timeouts)
+        result = run_single_test(driver, test, fallback_handler, self.timeouts, None, _RemoteArtifacts(self, task),
+                                 step_log)
+        return driver, result
+
+    def _simulate(self, test, step_log):
+        """Pretend to run every step, for exercising the protocol without a browser."""
+        for index, step in enumerate(test.get("steps", [])):
+            time.sleep(self.step_delay)
+            step_log.append({"index": index, "action": step.get("action"),
+                             "locator": step.get("locator", {}).get("value"), "outcome": "PASS",
+                             "duration": self.step_delay, "fallbacks": []})
+        return "PASS"
+
+
+def suite_paths(names):
+    """Suite files for the given paths or names under data/autos; every suite there when none are given."""
+    if not names:
+        return sorted(glob.glob(os.path.join(AUTOS_DIR, "*.json")))
+    return [name if os.path.exists(name) else os.path.join(AUTOS_DIR, name) for name in names]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run test suites across worker processes on several machines")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    def add_worker_options(subparser):
+        subparser.add_argument("--slots", type=int, default=1, help="Browsers per worker")
+        subparser.add_argument("--browser", default="chrome")
+        subparser.add_argument("--headed", action="store_true")
+        subparser.add_argument("--dry-run", action="store_true", help="Simulate steps instead of opening browsers")
+
+    coordinator_parser = subparsers.add_parser("coordinator", help="Serve suites to workers")
+    coordinator_parser.add_argument("suites", nargs="*", help="Suite paths or names under data/autos (default: all)")
+    coordinator_parser.add_argument("--host", default="0.0.0.0")
+    coordinator_parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    coordinator_parser.add_argument("--heartbeat-timeout", type=float, default=HEARTBEAT_TIMEOUT)
+    coordinator_parser.add_argument("--no-record", action="store_true",
+                                    help="Do not store results or flakiness history (e.g. for dry runs)")
+
+    worker_parser = subparsers.add_parser("worker", help="Run tests handed out by a coordinator")
+    worker_parser.add_argument("--host", default="127.0.0.1")
+    worker_parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    worker_parser.add_argument("--crash-after", type=int, help="Exit abruptly on receiving test N+1 (for testing)")
+    add_worker_options(worker_parser)
+
+    local_parser = subparsers.add_parser("local", help="Coordinator plus worker processes on this machine")
+    local_parser.add_argument("suites", nargs="*")
+    local_parser.add_argument("--workers", type=int, default=2)
+    local_parser.add_argument("--crash-one", action="store_true", help="Make the first worker die mid-run")
+    add_worker_options(local_parser)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "worker":
+        return Worker(args.host, args.port, args.slots, args.browser, not args.headed, args.dry_run,
+                      crash_after=args.crash_after).run()
+
+    if args.command == "coordinator":
+        results = Coordinator(suite_paths(args.suites), args.host, args.port, args.heartbeat_timeout,
+                              track_flakiness=not args.no_record, record_results=not args.no_record).serve()
+    else:
+        # Simulated runs would otherwise pollute the results store and flakiness history
+        coordinator = Coordinator(suite_paths(args.suites), "127.0.0.1", 0, track_flakiness=not args.dry_run,
+                                  record_results=not args.dry_run).start()
+        workers = []
+        for index in range(args.workers):
+            command = [sys.executable, "-m", "automate.distributed", "worker", "--port", str(coordinator.port),
+                       "--slots", str(args.slots), "--browser", args.browser]
+            command += ["--headed"] if args.headed else []
+            command += ["--dry-run"] if args.dry_run else []
+            command += ["--crash-after", "1"] if args.crash_one and index == 0 else []
+            workers.append(subprocess.Popen(command))
+
+        def watch_workers():
+            for worker in workers:
+                worker.wait()
+            # Nothing would ever pick up tests re-queued after the last worker died
+            coordinator.abort("every worker process exited")
+
+        threading.Thread(target=watch_workers, daemon=True).start()
+        try:
+            results = coordinator.wait()
+        finally:
+            for worker in workers:
+                try:
+                    worker.wait(timeout=10)
+                except subprocess.TimeoutExpired:
+                    worker.kill()
+
+    print("\nTest Results Summary:")
+    for suite_name, tests in results.items():
+        for test_name, result in tests.items():
+            print(f"{suite_name} | {test_name}: {result}")
+    passed = all(result == "PASS" for tests in results.values() for result in tests.values())
+    return 0 if passed else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,5 +1,4 @@
 import traceback
-import re
 import time
 from selenium import webdriver
 from selenium.webdriver.common.by import By
@@ -9,38 +8,163 @@ from selenium.common.exceptions import TimeoutException, NoSuchElementException
 
 from urllib.parse import urlparse
 
+from automate.planner import get_dom_summary, plan_candidates
+from automate.textutils import (ATTR_EQUALS_PATTERN, DIRECT_TEXT_PATTERN, LEADING_TAG_PATTERN, SPAN_TEXT_PATTERN,
+                                case_variations, extract_tag_name, extract_text_value, extract_words,
+                                split_identifier, xpath_attribute_value, xpath_attributes)
+
 
 class FallbackHandler:
 
-    def __init__(self, driver, timeout=0.5, fallback_delay=0.5):
+    def __init__(self, driver, timeout=0.5, fallback_delay=0.5, timeouts=None, telemetry=None, plan_candidates=True,
+                 max_candidate_cost=20):
         self.driver = driver
         self.timeout = timeout
         self.fallback_delay = fallback_delay
+        self.timeouts = timeouts
+        self.telemetry = telemetry
+        self.plan_candidates = plan_candidates
+        self.max_candidate_cost = max_candidate_cost
         self.strategy_cache = {}
-
-    def execute_fallback_script(self, current_action, locator_type, locator_value, input_value=None):
+        self._origin = None
+        self._probe_timeout = timeout
+        self._probe_delay = fallback_delay
+        self._visible_timeout = 3
+        self._deadline = None
+        self.fallback_log = []
+        self._families = {}
+        self._tried = 0
+        self._winner = None
+
+    def execute_fallback_script(self, current_action, locator_type, locator_value, input_value=None, deadline=None):
         print(f"Executing fallback for action: {current_action}, locator: {locator_type}={locator_value}")
 
+        start = time.monotonic()
+        element = None
+        self._families = {}
+        self._tried = 0
+        self._winner = None
         try:
-            locator = {"type": locator_type, "value": locator_value}
+            self._deadline = deadline
+            self._update_budgets()
+            element = self._dispatch_fallback(current_action, locator_type, locator_value, input_value)
+            return element
+        except Exception as e:
+            print(f"Error in fallback handler for {current_action}: {str(e)}")
+            print(traceback.format_exc())
+            return None
+        finally:
+            duration = time.monotonic() - start
+            family = self._families.get(self._winner) if element is not None else None
+            self.fallback_log.append({
+                "action": current_action,
+                "locator": locator_value,
+                "found": element is not None,
+                "duration": round(duration, 3),
+                "tried": self._tried,
+                "winner": self._winner[1] if element is not None and self._winner else None,
+                "winner_by": self._winner[0] if element is not None and self._winner else None,
+                "matches": self._count_matches(self._winner) if element is not None and self._winner else 0,
+                "family": family,
+            })
+            if self.telemetry:
+                self.telemetry.observe_fallback(current_action, locator_value, self._tried, family, duration,
+                                                element is not None)
+
+    def _dispatch_fallback(self, current_action, locator_type, locator_value, input_value=None):
+        locator = {"type": locator_type, "value": locator_value}
+
+        if current_action == "click":
+            return self._handle_click_fallback(locator)
+
+        elif current_action == "input":
+            return self._handle_input_fallback(locator, input_value)
+
+        elif current_action == "select":
+            return self._handle_select_fallback(locator, input_value)
+
+        elif current_action == "waitForElementVisible":
+            return self._handle_wait_visible_fallback(locator)
+
+        return None
 
-            if current_action == "click":
-                return self._handle_click_fallback(locator)
+    def build_strategies(self, current_action, locator_type, locator_value, input_value=None):
+        """Candidate (by, value) locators for an action, in the order the fallback tries them."""
+        self._families = {}
+        locator = {"type": locator_type, "value": locator_value}
 
-            elif current_action == "input":
-                return self._handle_input_fallback(locator, input_value)
+        if current_action == "click":
+            return self._click_strategies(locator)
+        elif current_action == "input":
+            return self._input_strategies(locator)
+        elif current_action == "select":
+            return self._select_strategies(locator, input_value)
+        elif current_action == "waitForElementVisible":
+            return self._wait_visible_strategies(locator)
 
-            elif current_action == "select":
-                return self._handle_select_fallback(locator, input_value)
+        return []
 
-            elif current_action == "waitForElementVisible":
-                return self._handle_wait_visible_fallback(locator)
+    def strategy_family(self, strategy):
+        """Name of the strategy group that first produced a candidate."""
+        return self._families.get(strategy)
 
-            return None
-        except Exception as e:
-            print(f"Error in fallback handler for {current_action}: {str(e)}")
-            print(traceback.format_exc())
-            return None
+    def _count_matches(self, strategy):
+        # How ambiguous the healed locator is; used to judge whether it is safe to persist
+        try:
+            return len(self.driver.find_elements(*strategy))
+        except Exception:
+            return 0
+
+    def _label(self, strategies, family):
+        # Candidates not yet attributed were produced by the section just run
+        for strategy in strategies:
+            self._families.setdefault(strategy, family)
+
+    def _update_budgets(self):
+        if not self.timeouts:
+            return
+
+        self._origin = self.driver.current_url
+        self._probe_timeout = self.timeouts.budget(self._origin, "fallback_probe", self.timeout)
+        # Fast pages do not need to settle as long between probes as the default assumes
+        self._probe_delay = min(self.fallback_delay, self._probe_timeout)
+        self._visible_timeout = self.timeouts.budget(self._origin, "fallback_visible", 3)
+
+    def _budget_exhausted(self):
+        if self._deadline is not None and time.monotonic() >= self._deadline:
+            print("Fallback time budget exhausted, giving up on remaining strategies")
+            return True
+        return False
+
+    def _clip(self, timeout):
+        if self._deadline is None:
+            return timeout
+        return max(0, min(timeout, self._deadline - time.monotonic()))
+
+    def _record_probe(self, action, start):
+        if self.timeouts:
+            self.timeouts.record(self._origin, action, time.monotonic() - start)
+
+    def _plan(self, strategies, locator):
+        """Drop duplicate and impossible candidates before any of them is probed."""
+        if not self.plan_candidates or not strategies:
+            return strategies
+
+        primary = locator.get("value") if locator.get("type") == "xpath" else None
+        max_cost = self.max_candidate_cost
+        if self._deadline is not None:
+            # Never plan more probes than the remaining budget can pay for
+            per_probe = self._probe_timeout + self._probe_delay
+            if per_probe > 0:
+                affordable = max(1, (self._deadline - time.monotonic()) / per_probe)
+                max_cost = affordable if max_cost is None else min(max_cost, affordable)
+
+        planned = plan_candidates(strategies, get_dom_summary(self.driver), primary, max_cost)
+        if not planned:
+            # Nothing on the page can match yet; it may still be rendering
+            planned = plan_candidates(strategies, None, primary, max_cost)
+        print(f"Planned {len(planned)} of {len(strategies)} fallback candidates")
+        return planned
 
     def _handle_click_fallback(self, locator):
         locator_type = locator.get("type")
@@ -51,13 +175,26 @@ class FallbackHandler:
         if cached_element:
             return cached_element
 
+        fallback_strategies = self._plan(self._click_strategies(locator), locator)
+        element = self._try_clickable_locators(fallback_strategies)
+
+        self._cache_successful_strategy(element, cache_key)
+
+        return element
+
+    def _click_strategies(self, locator):
+        locator_type = locator.get("type")
+        locator_value = locator.get("value")
+
         fallback_strategies = []
         html_tagname = self._extract_tag_name(locator_value)
 
         self._add_contains_strategy(fallback_strategies, locator_value)
+        self._label(fallback_strategies, "contains")
 
         if "//label" in locator_value:
             self._check_separate_words(locator_type, locator_value, fallback_strategies)
+            self._label(fallback_strategies, "separate_words")
 
         if "text()" in locator_value:
             text = self._extract_text_value(locator_value)
@@ -67,6 +204,7 @@ class FallbackHandler:
                     sanitized_text = self._sanitize_xpath_value(text)
                     fallback_strategies.append((By.XPATH, f"//input[@value={sanitized_text}]"))
                     fallback_strategies.append((By.XPATH, f"//input[contains(@value, {sanitized_text})]"))
+                    self._label(fallback_strategies, "label_value")
 
             if text:
                 case_variations = self._generate_case_variations(text)
@@ -81,28 +219,29 @@ class FallbackHandler:
                     for variation in case_variations:
                         fallback_strategies.append((By.XPATH, f"//{html_tagname}[text()='{variation}']"))
                         fallback_strategies.append((By.XPATH, f"//{html_tagname}[contains(text(), '{variation}')]"))
+                self._label(fallback_strategies, "case_variations")
 
             fallback_strategies.append((By.XPATH, locator_value.replace("//button", "//button/span")))
             fallback_strategies.append((By.XPATH, locator_value.replace("//button", "//button/a")))
             fallback_strategies.append((By.XPATH, locator_value.replace("//a", "//button/span")))
             fallback_strategies.append((By.XPATH, locator_value.replace("//a", "//button/a")))
+            self._label(fallback_strategies, "tag_rewrite")
 
         if locator_type in ["id", "name"] or "@name" in locator_value or "@id" in locator_value:
             fallback_strategies += self._check_id_name(locator_type, locator_value, "*", "")
+            self._label(fallback_strategies, "id_name")
 
         if not "//label" in locator_value:
             self._check_separate_words(locator_type, locator_value, fallback_strategies)
+            self._label(fallback_strategies, "separate_words")
 
         if locator_type == "xpath" and "//button" in locator_value:
             fallback_strategies.append((By.XPATH, locator_value.replace("//button", "//a")))
             fallback_strategies.append((By.XPATH, locator_value.replace("//button", "//div[contains(@class, 'btn')]")))
             fallback_strategies.append((By.XPATH, locator_value.replace("//button", "//span[contains(@class, 'btn')]")))
+            self._label(fallback_strategies, "tag_rewrite")
 
-        element = self._try_clickable_locators(fallback_strategies)
-
-        self._cache_successful_strategy(element, fallback_strategies, cache_key)
-
-        return element
+        return fallback_strategies
 
     def _handle_input_fallback(self, locator, input_value):
         locator_type = locator.get("type")
@@ -113,21 +252,34 @@ class FallbackHandler:
         if cached_element:
             return cached_element
 
+        fallback_strategies = self._plan(self._input_strategies(locator), locator)
+        element = self._try_locators(fallback_strategies)
+
+        self._cache_successful_strategy(element, cache_key)
+
+        return element
+
+    def _input_strategies(self, locator):
+        locator_type = locator.get("type")
+        locator_value = locator.get("value")
+
         fallback_strategies = []
 
         if locator_type == "xpath" and "//input" in locator_value:
             self._add_contains_strategy(fallback_strategies, locator_value)
+            self._label(fallback_strategies, "contains")
 
         if locator_type in ["id", "name"] or "name" in locator_value or "id" in locator_value:
             fallback_strategies += self._check_id_name(locator_type, locator_value, "input", "textarea")
+            self._label(fallback_strategies, "id_name")
 
         fallback_strategies.append((By.XPATH, locator_value.replace("//input", "//textarea")))
-        self._add_attribute_strategies(fallback_strategies, locator_value, "//input", ["id", "name", "placeholder"])
-        element = self._try_locators(fallback_strategies)
+        self._label(fallback_strategies, "tag_rewrite")
+        self._add_attribute_strategies(fallback_strategies, locator_value, "//input",
+                                       ["id", "name", "data-testid", "placeholder"])
+        self._label(fallback_strategies, "attributes")
 
-        self._cache_successful_strategy(element, fallback_strategies, cache_key)
-
-        return element
+        return fallback_strategies
 
     def _handle_select_fallback(self, locator, input_value):
         locator_type = locator.get("type")
@@ -138,26 +290,40 @@ class FallbackHandler:
         if cached_element:
             return cached_element
 
+        fallback_strategies = self._plan(self._select_strategies(locator, input_value), locator)
+        element = self._try_locators(fallback_strategies)
+
+        self._cache_successful_strategy(element, cache_key)
+
+        return element
+
+    def _select_strategies(self, locator, input_value):
+        locator_type = locator.get("type")
+        locator_value = locator.get("value")
+
         fallback_strategies = []
 
         if locator_type == "xpath" and "//select" in locator_value:
             self._add_contains_strategy(fallback_strategies, locator_value)
+            self._label(fallback_strategies, "contains")
             self._add_custom_select_strategies(fallback_strategies, locator_value, input_value)
+            self._label(fallback_strategies, "custom_select")
 
         if input_value:
             sanitized_input = self._sanitize_xpath_value(input_value)
             fallback_strategies.append((By.XPATH,
                                         f"//input[@type='radio' and @{locator_type}='{locator_value}' and @value={sanitized_input}]"))
+            self._label(fallback_strategies, "radio_value")
 
         elif locator_type in ["id", "name"]:
             fallback_strategies += self._check_id_name(locator_type, locator_value, "select", "option")
+            self._label(fallback_strategies, "id_name")
 
-        self._add_attribute_strategies(fallback_strategies, locator_value, "//select", ["id", "name", "class"])
-        element = self._try_locators(fallback_strategies)
-
-        self._cache_successful_strategy(element, fallback_strategies, cache_key)
+        self._add_attribute_strategies(fallback_strategies, locator_value, "//select",
+                                       ["id", "name", "data-testid", "class"])
+        self._label(fallback_strategies, "attributes")
 
-        return element
+        return fallback_strategies
 
     def _handle_wait_visible_fallback(self, locator):
         locator_type = locator.get("type")
@@ -168,10 +334,39 @@ class FallbackHandler:
         if cached_element:
             return cached_element
 
+        fallback_strategies = self._plan(self._wait_visible_strategies(locator), locator)
+
+        for by_type, locator in fallback_strategies:
+            if self._budget_exhausted():
+                break
+            self._tried += 1
+            try:
+                start = time.monotonic()
+                element = WebDriverWait(self.driver, self._clip(self._visible_timeout)).until(
+                    EC.visibility_of_element_located((by_type, locator))
+                )
+                self._record_probe("fallback_visible", start)
+                print(f"Found visible element with fallback locator: {locator}")
+                self._winner = (by_type, locator)
+
+                self.strategy_cache[cache_key] = (by_type, locator)
+
+                return element
+            except (TimeoutException, NoSuchElementException):
+                time.sleep(self._probe_delay)  # Add delay between attempts
+                continue
+
+        return None
+
+    def _wait_visible_strategies(self, locator):
+        locator_type = locator.get("type")
+        locator_value = locator.get("value")
+
         fallback_strategies = []
 
         if locator_type == "xpath":
             self._add_contains_strategy(fallback_strategies, locator_value)
+            self._label(fallback_strategies, "contains")
 
             if "//button" in locator_value:
                 fallback_strategies.append((By.XPATH, locator_value.replace("//button", "//a")))
@@ -179,27 +374,15 @@ class FallbackHandler:
             elif "//a" in locator_value:
                 fallback_strategies.append((By.XPATH, locator_value.replace("//a", "//button")))
                 fallback_strategies.append((By.XPATH, locator_value.replace("//a", "//*")))
+            self._label(fallback_strategies, "tag_rewrite")
 
             text_value = self._extract_text_value(locator_value)
             if text_value:
                 sanitized_text = self._sanitize_xpath_value(text_value)
                 fallback_strategies.append((By.XPATH, f"//*[contains(text(), {sanitized_text})]"))
+                self._label(fallback_strategies, "text")
 
-        for by_type, locator in fallback_strategies:
-            try:
-                element = WebDriverWait(self.driver, 3).until(
-                    EC.visibility_of_element_located((by_type, locator))
-                )
-                print(f"Found visible element with fallback locator: {locator}")
-
-                self.strategy_cache[cache_key] = (by_type, locator)
-
-                return element
-            except (TimeoutException, NoSuchElementException):
-                time.sleep(self.fallback_delay)  # Add delay between attempts
-                continue
-
-        return None
+        return fallback_strategies
 
     def _handle_link_fallback(self, locator, url):
         print(f"Link element not found. Attempting to navigate directly to: {url}")
@@ -226,9 +409,10 @@ class FallbackHandler:
             sanitized_text = self._sanitize_xpath_value(text_value)
             contains_strategies.append((By.XPATH, f"//a[contains(text(), {sanitized_text})]"))
 
+        contains_strategies = self._plan(contains_strategies, locator)
         element = self._try_clickable_locators(contains_strategies)
 
-        self._cache_successful_strategy(element, contains_strategies, cache_key)
+        self._cache_successful_strategy(element, cache_key)
 
         if element:
             return element
@@ -262,9 +446,12 @@ class FallbackHandler:
             print(f"Using cached strategy for {cache_key}")
             by_type, locator_value = self.strategy_cache[cache_key]
             try:
-                element = WebDriverWait(self.driver, self.timeout).until(
+                self._tried += 1
+                element = WebDriverWait(self.driver, self._probe_timeout).until(
                     condition_func((by_type, locator_value))
                 )
+                self._winner = (by_type, locator_value)
+                self._families[self._winner] = "cache"
                 return element
             except (TimeoutException, NoSuchElementException):
                 print("Cached strategy failed, trying other strategies")
@@ -273,7 +460,7 @@ class FallbackHandler:
 
     def _add_contains_strategy(self, strategies, locator_value):
         if "=" in locator_value:
-            attr_match = re.search(r'\[@([^=]+)=[\'\"]([^\'\"]+)[\'\"]\]', locator_value)
+            attr_match = ATTR_EQUALS_PATTERN.search(locator_value)
             if attr_match:
                 attr_name = attr_match.group(1)
                 attr_value = attr_match.group(2)
@@ -347,21 +534,19 @@ class FallbackHandler:
         if locator_type != "xpath":
             return
 
-        span_text_match = re.search(r'//([a-zA-Z0-9_-]+)/span\[contains\(text\(\),\s*[\'\"]([^\'\"]+)[\'\"]\)\]',
-                                    locator_value)
+        span_text_match = SPAN_TEXT_PATTERN.search(locator_value)
         if span_text_match:
             html_tag = span_text_match.group(1)
             text_value = span_text_match.group(2)
             self._process_text_value(html_tag, text_value, strategies, is_child_span=True)
 
-        direct_text_match = re.search(r'//([a-zA-Z0-9_-]+)\[contains\(text\(\),\s*[\'\"]([^\'\"]+)[\'\"]\)\]',
-                                      locator_value)
+        direct_text_match = DIRECT_TEXT_PATTERN.search(locator_value)
         if direct_text_match:
             html_tag = direct_text_match.group(1)
             text_value = direct_text_match.group(2)
             self._process_text_value(html_tag, text_value, strategies)
 
-        tag_match = re.match(r'//([a-zA-Z0-9_-]+)', locator_value)
+        tag_match = LEADING_TAG_PATTERN.match(locator_value)
         if not tag_match:
             return
 
@@ -380,11 +565,11 @@ class FallbackHandler:
 
             if len(words) > 1:
                 print(f"Found separate words in attribute {attr_name}: {words}")
-                self._add_attribute_strategies(html_tag, attr_name, words, strategies)
+                self._add_attribute_content_strategies(html_tag, attr_name, words, strategies)
 
                 for word in words:
                     if len(word) > 2:
-                        self._add_attribute_strategies(html_tag, attr_name, [word], strategies)
+                        self._add_attribute_content_strategies(html_tag, attr_name, [word], strategies)
 
     def _process_text_value(self, html_tag, text_value, strategies, is_child_span=False):
         if not text_value or not isinstance(text_value, str):
@@ -401,26 +586,7 @@ class FallbackHandler:
                         self._add_text_content_strategies(html_tag, [word], strategies, is_child_span=is_child_span)
 
     def _extract_words_from_value(self, attr_value):
-        words = []
-
-        if ' ' in attr_value:
-            words.extend([w for w in attr_value.split() if len(w) > 1])
-
-        if '_' in attr_value:
-            words.extend([w for w in attr_value.split('_') if len(w) > 1])
-
-        if '-' in attr_value:
-            words.extend([w for w in attr_value.split('-') if len(w) > 1])
-
-        if any(c.isupper() for c in attr_value) and not attr_value.isupper():
-            first_part = re.findall(r'^[a-z]+', attr_value)
-            if first_part and len(first_part[0]) > 1:
-                words.append(first_part[0])
-
-            camel_parts = re.findall(r'[A-Z][a-z]*', attr_value)
-            words.extend([w.lower() for w in camel_parts if len(w) > 1])
-
-        return list(set(words))
+        return list(extract_words(attr_value))
 
     def _add_text_content_strategies(self, html_tag, words, strategies, is_child_span=False):
         contains_conditions = []
@@ -446,7 +612,7 @@ class FallbackHandler:
             any_tag_xpath = f"//*[{' and '.join(contains_conditions)}]"
             strategies.append((By.XPATH, any_tag_xpath))
 
-    def _add_attribute_strategies(self, html_tag, attr_name, words, strategies):
+    def _add_attribute_content_strategies(self, html_tag, attr_name, words, strategies):
         contains_conditions = []
         for word in words:
             if len(word) > 1:
@@ -478,38 +644,48 @@ class FallbackHandler:
             strategies.append((By.XPATH, related_tag_xpath))
 
 
-    def _cache_successful_strategy(self, element, strategies, cache_key):
-        if element and strategies:
-            for i, (by_type, locator_value) in enumerate(strategies):
-                if i < len(strategies) - 1:
-                    self.strategy_cache[cache_key] = (by_type, locator_value)
-                    break
+    def _cache_successful_strategy(self, element, cache_key):
+        # Only the locator that actually matched is worth trying first next time
+        if element is not None and self._winner:
+            self.strategy_cache[cache_key] = self._winner
 
     def _try_locators(self, locator_strategies, element_type="element"):
         for by_type, locator in locator_strategies:
+            if self._budget_exhausted():
+                break
+            self._tried += 1
             try:
                 print(f"Trying {element_type} locator: {locator}")
-                element = WebDriverWait(self.driver, self.timeout).until(
+                start = time.monotonic()
+                element = WebDriverWait(self.driver, self._clip(self._probe_timeout)).until(
                     EC.presence_of_element_located((by_type, locator))
                 )
+                self._record_probe("fallback_probe", start)
                 print(f"Found {element_type} with locator: {locator}")
+                self._winner = (by_type, locator)
                 return element
             except (TimeoutException, NoSuchElementException):
-                time.sleep(self.fallback_delay)
+                time.sleep(self._probe_delay)
                 continue
         return None
 
     def _try_clickable_locators(self, locator_strategies, element_type="element"):
         for by_type, locator in locator_strategies:
+            if self._budget_exhausted():
+                break
+            self._tried += 1
             try:
                 print(f"Trying clickable {element_type} locator: {locator}")
-                element = WebDriverWait(self.driver, self.timeout).until(
+                start = time.monotonic()
+                element = WebDriverWait(self.driver, self._clip(self._probe_timeout)).until(
                     EC.element_to_be_clickable((by_type, locator))
                 )
+                self._record_probe("fallback_probe", start)
                 print(f"Found clickable {element_type} with locator: {locator}")
+                self._winner = (by_type, locator)
                 return element
             except (TimeoutException, NoSuchElementException):
-                time.sleep(self.fallback_delay)
+                time.sleep(self._probe_delay)
                 continue
         return None
 
@@ -524,89 +700,17 @@ class FallbackHandler:
         else:
             return f"'{value}'"
 
-    def _generate_case_variations(self, text):
-        case_variations = [text]
-
-        words = text.split()
-        if len(words) > 1:
-            case_variations.append(text.lower())
-
-            first_cap_rest_lower = words[0].capitalize() + ' ' + ' '.join(w.lower() for w in words[1:])
-            if first_cap_rest_lower != text:
-                case_variations.append(first_cap_rest_lower)
-
-            if len(words) >= 2:
-                first_lower_second_cap = words[0].lower() + ' ' + ' '.join(
-                    [words[1].capitalize()] + [w.lower() for w in words[2:]]
-                )
-                if first_lower_second_cap != text:
-                    case_variations.append(first_lower_second_cap)
-        else:
-            if text.lower() != text:
-                case_variations.append(text.lower())
-
-        case_variations = list(dict.fromkeys(case_variations))
-        return case_variations
-
     def _extract_tag_name(self, xpath):
-        pattern = r'\/([a-zA-Z0-9_-]+)(?:\[|\/?$|$)'
-        matches = re.findall(pattern, xpath)
-
-        if matches:
-            return matches[-1]
-
-        return None
+        return extract_tag_name(xpath)
 
     def _extract_attributes_from_xpath(self, xpath_expression):
-        attributes = {}
-
-        attr_pattern = r'\[@([^=]+)=[\'\"]([^\'\"]+)[\'\"]\]'
-        matches = re.findall(attr_pattern, xpath_expression)
-        for attr_name, attr_value in matches:
-            attributes[attr_name] = attr_value
-
-        contains_pattern = r'contains\(@([^,]+),\s*[\'\"]([^\'\"]+)[\'\"]\)'
-        matches = re.findall(contains_pattern, xpath_expression)
-        for attr_name, attr_value in matches:
-            attributes[attr_name] = attr_value
-
-        starts_with_pattern = r'starts-with\(@([^,]+),\s*[\'\"]([^\'\"]+)[\'\"]\)'
-        matches = re.findall(starts_with_pattern, xpath_expression)
-        for attr_name, attr_value in matches:
-            attributes[attr_name] = attr_value
-
-        ends_with_pattern = r'ends-with\(@([^,]+),\s*[\'\"]([^\'\"]+)[\'\"]\)'
-        matches = re.findall(ends_with_pattern, xpath_expression)
-        for attr_name, attr_value in matches:
-            attributes[attr_name] = attr_value
-
-        simple_attr_pattern = r'\[([a-zA-Z0-9_-]+)=[\'\"]([^\'\"]+)[\'\"]\]'
-        matches = re.findall(simple_attr_pattern, xpath_expression)
-        for attr_name, attr_value in matches:
-            if attr_name not in ['contains', 'starts-with', 'ends-with', 'text()']:
-                attributes[attr_name] = attr_value
-
-        return attributes
+        return xpath_attributes(xpath_expression)
 
     def _extract_attribute_value(self, locator_value, attribute):
-        if f"@{attribute}=" in locator_value:
-            value = locator_value.split(f"@{attribute}=")[1].split("]")[0].strip("'\"")
-            return value
-
-        attributes = self._extract_attributes_from_xpath(locator_value)
-        return attributes.get(attribute)
+        return xpath_attribute_value(locator_value, attribute)
 
     def _extract_text_value(self, locator_value):
-        if "text()=" in locator_value:
-            value = locator_value.split("text()=")[1].strip("'\"[]")
-            return value
-        elif "contains(text()," in locator_value:
-            start_index = locator_value.find("contains(text(),") + len("contains(text(),")
-            end_index = locator_value.find(")", start_index)
-            if 0 < start_index < end_index:
-                value = locator_value[start_index:end_index].strip().strip("'\"")
-                return value
-        return None
+        return extract_text_value(locator_value)
 
     def _get_domain_info(self):
         current_url = self.driver.current_url
@@ -630,53 +734,8 @@ class FallbackHandler:
         return domain, main_domain
 
     def _generate_case_variations(self, text):
-        if not text or not isinstance(text, str):
-            return []
-
-        variations = {text, text.lower(), text.upper(), text.capitalize()}
-
-        if any(c.isupper() for c in text) and not text.isupper():
-            snake_case = re.sub(r'([A-Z])', lambda x: '_' + x.group(1).lower(), text)
-            if snake_case.startswith('_'):
-                snake_case = snake_case[1:]
-            variations.add(snake_case)
-        elif '_' in text:
-            camel_case = re.sub(r'_([a-z])', lambda x: x.group(1).upper(), text)
-            variations.add(camel_case)
-
-        if '-' in text:
-            camel_case = re.sub(r'-([a-z])', lambda x: x.group(1).upper(), text)
-            variations.add(camel_case)
-
-            snake_case = text.replace('-', '_')
-            variations.add(snake_case)
-
-        return list(variations)
+        return list(case_variations(text))
 
     def _split_identifier(self, identifier):
         """Split an identifier into parts based on common separators"""
-        if not identifier or not isinstance(identifier, str):
-            return []
-
-        parts = []
-
-        # Split by underscore
-        if '_' in identifier:
-            parts.extend(identifier.split('_'))
-
-        # Split by dash
-        if '-' in identifier:
-            parts.extend(identifier.split('-'))
-
-        # Split camelCase
-        if any(c.isupper() for c in identifier) and not identifier.isupper():
-            # Add the parts split by uppercase letters
-            camel_parts = re.findall(r'[A-Z][a-z]*', identifier)
-            # Add the first part (before first uppercase)
-            first_part = re.findall(r'^[a-z]+', identifier)
-            if first_part:
-                parts.append(first_part[0])
-            parts.extend(camel_parts)
-
-        # Remove duplicates and empty strings
-        return [part for part in set(parts) if part]
+        return list(split_identifier(identifier))
@@ -0,0 +1,116 @@
+import json
+import os
+import threading
+
+from automate.storage import data_path, write_json_atomic
+
+
+HISTORY_PATH = data_path("history", "flaky.json")
+
+
+class FlakyHistory:
+    """Local pass/fail history per test and per step, with a flakiness score.
+
+    The score is the share of outcome flips within the recent window, so a test
+    that always fails (broken) scores 0 while one that alternates scores 1.
+    """
+
+    def __init__(self, path=HISTORY_PATH, window=20, quarantine_threshold=0.3, min_runs=5):
+        self.path = path
+        self.window = window
+        self.quarantine_threshold = quarantine_threshold
+        self.min_runs = min_runs
+        self.tests = {}
+        self.steps = {}
+        self._lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.tests = data.get("tests", {})
+            self.steps = data.get("steps", {})
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Error loading flaky history from {self.path}: {e}")
+
+    def save(self):
+        if not self.path:
+            return
+        with self._lock:
+            data = {"tests": self.tests, "steps": self.steps}
+        write_json_atomic(self.path, data)
+
+    def record(self, suite_name, test_name, passed, step_log=None):
+        with self._lock:
+            self._append(self.tests, history_key(suite_name, test_name), passed)
+            for entry in step_log or []:
+                if entry["outcome"] == "SKIP":
+                    continue
+                key = f"{history_key(suite_name, test_name)}::{entry['index']}:{entry['action']}"
+                self._append(self.steps, key, entry["outcome"] == "PASS")
+
+    def flakiness(self, suite_name, test_name):
+        return flakiness_score(self.tests.get(history_key(suite_name, test_name), []))
+
+    def step_flakiness(self, suite_name, test_name):
+        prefix = f"{history_key(suite_name, test_name)}::"
+        return {key[len(prefix):]: flakiness_score(outcomes)
+                for key, outcomes in self.steps.items() if key.startswith(prefix)}
+
+    def is_quarantined(self, suite_name, test_name):
+        outcomes = self.tests.get(history_key(suite_name, test_name), [])
+        return len(outcomes) >= self.min_runs and flakiness_score(outcomes) >= self.quarantine_threshold
+
+    def order_tests(self, suite_name, tests):
+        """Move quarantined tests to the end of the suite.
+
+        Tests share one browser session and later ones may rely on the state an
+        earlier one leaves behind (e.g. a login), so only tests marked
+        ``"independent": true`` are moved.
+        """
+        main_lane = []
+        quarantine_lane = []
+        for test in tests:
+            if test.get("independent") and self.is_quarantined(suite_name, test.get("testName", "Unnamed Test")):
+                quarantine_lane.append(test)
+            else:
+                main_lane.append(test)
+        return main_lane + quarantine_lane
+
+    def report(self, suite_name, tests):
+        flaky = []
+        for test in tests:
+            test_name = test.get("testName", "Unnamed Test")
+            score = self.flakiness(suite_name, test_name)
+            if score > 0:
+                flaky.append((score, test_name))
+
+        if not flaky:
+            return
+        print("\nFlaky tests:")
+        for score, test_name in sorted(flaky, reverse=True):
+            marker = " (quarantined)" if self.is_quarantined(suite_name, test_name) else ""
+            print(f"{test_name}: flakiness {score:.2f}{marker}")
+            for step, step_score in sorted(self.step_flakiness(suite_name, test_name).items()):
+                if step_score > 0:
+                    print(f"  step {step}: flakiness {step_score:.2f}")
+
+    def _append(self, store, key, passed):
+        outcomes = store.setdefault(key, [])
+        outcomes.append(1 if passed else 0)
+        if len(outcomes) > self.window:
+            del outcomes[:len(outcomes) - self.window]
+
+
+def flakiness_score(outcomes):
+    if len(outcomes) < 2:
+        return 0.0
+    flips = sum(1 for previous, current in zip(outcomes, outcomes[1:]) if previous != current)
+    return flips / (len(outcomes) - 1)
+
+
+def history_key(suite_name, test_name):
+    return f"{suite_name}::{test_name}"
@@ -0,0 +1,121 @@
+import difflib
+import json
+import os
+import time
+
+from selenium.webdriver.common.by import By
+
+from automate.storage import data_path, write_json_atomic
+
+
+HEALING_DIR = data_path("healing")
+
+LOCATOR_TYPES = {
+    By.ID: "id",
+    By.NAME: "name",
+    By.XPATH: "xpath",
+    By.CSS_SELECTOR: "css",
+    By.CLASS_NAME: "class",
+    By.LINK_TEXT: "link_text",
+    By.PARTIAL_LINK_TEXT: "partial_link_text",
+    By.TAG_NAME: "tag",
+}
+
+# How much a healed locator from each strategy family is trusted before
+# accounting for how many elements it matches.
+FAMILY_CONFIDENCE = {
+    "cache": 0.9,
+    "case_variations": 0.85,
+    "contains": 0.8,
+    "id_name": 0.8,
+    "attributes": 0.75,
+    "label_value": 0.7,
+    "radio_value": 0.7,
+    "custom_select": 0.6,
+    "tag_rewrite": 0.6,
+    "text": 0.6,
+    "separate_words": 0.5,
+}
+
+
+def heal_confidence(family, matches):
+    confidence = FAMILY_CONFIDENCE.get(family, 0.5)
+    if matches == 1:
+        return confidence
+    if 1 < matches <= 3:
+        return round(confidence * 0.7, 2)
+    return round(confidence * 0.4, 2)
+
+
+def collect_heals(test_name, step_log):
+    heals = []
+    for entry in step_log:
+        if entry["outcome"] != "PASS":
+            continue
+        for fallback in entry.get("fallbacks", []):
+            if not fallback["found"] or not fallback.get("winner") or fallback.get("winner_by") not in LOCATOR_TYPES:
+                continue
+            heals.append({
+                "test": test_name,
+                "step": entry["index"],
+                "before": fallback["locator"],
+                "after": {"type": LOCATOR_TYPES[fallback["winner_by"]], "value": fallback["winner"]},
+                "family": fallback.get("family"),
+                "matches": fallback.get("matches", 0),
+                "confidence": heal_confidence(fallback.get("family"), fallback.get("matches", 0)),
+            })
+    return heals
+
+
+def write_back_heals(file_path, heals, min_confidence=0.6, log_dir=HEALING_DIR):
+    """Rewrite a suite JSON with the locators the fallback actually matched.
+
+    Only heals at or above ``min_confidence`` are applied. The suite is replaced
+    atomically and every applied change is appended to a per-suite log with its
+    diff and confidence.
+    """
+    accepted = [heal for heal in heals if heal["confidence"] >= min_confidence]
+    if not accepted:
+        return []
+
+    with open(file_path, 'r', encoding='utf-8') as f:
+        original = f.read()
+    test_data = json.loads(original)
+    tests = {}
+    for test in test_data:
+        tests.setdefault(test.get("testName", "Unnamed Test"), test)
+
+    applied = []
+    for heal in accepted:
+        test = tests.get(heal["test"])
+        steps = test.get("steps", []) if test else []
+        if heal["step"] >= len(steps):
+            continue
+        step = steps[heal["step"]]
+        if step.get("locator", {}).get("value") != heal["before"]:
+            # The suite changed since the run started
+            continue
+
+        before = json.dumps(step, indent=2).splitlines()
+        step["locator"] = dict(heal["after"])
+        after = json.dumps(step, indent=2).splitlines()
+        diff = "\n".join(difflib.unified_diff(before, after, "before", "after", lineterm=""))
+        applied.append(dict(heal, diff=diff))
+
+    if not applied:
+        return []
+
+    write_json_atomic(file_path, test_data)
+
+    suite_name = os.path.splitext(os.path.basename(file_path))[0]
+    os.makedirs(log_dir, exist_ok=True)
+    with open(os.path.join(log_dir, f"{suite_name}.jsonl"), 'a', encoding='utf-8') as f:
+        for heal in applied:
+            f.write(json.dumps(dict(heal, suite=suite_name, time=time.strftime("%Y-%m-%dT%H:%M:%S"))) + "\n")
+
+    for heal in applied:
+        print(f"Healed locator written back ({heal['confidence']:.2f}): {heal['test']} step {heal['step'] + 1}: "
+              f"{heal['before']} -> {heal['after']['value']}")
+    return applied
+
+
@@ -0,0 +1,217 @@
+import codecs
+import io
+from html.parser import HTMLParser
+
+PARSERS = ("bs4", "lxml", "stream")
+CHUNK_SIZE = 64 * 1024
+
+# Elements kept in a distilled snapshot, with everything inside them
+DISTILLED_TAGS = {"a", "button", "input", "select", "option", "textarea", "label", "form", "h1", "h2", "h3", "h4",
+                  "h5", "h6", "summary", "details", "dialog"}
+DISTILLED_ROLES = {"button", "link", "textbox", "combobox", "checkbox", "radio", "tab", "menuitem", "option"}
+SKIPPED_TAGS = {"script", "style", "noscript", "template", "svg"}
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "param", "source", "track",
+             "wbr"}
+
+
+class BodyStreamParser(HTMLParser):
+    """Single-pass tokenizer that writes the <body> (or its distilled elements) straight to ``out``.
+
+    Markup is copied through as it arrives, so memory stays flat no matter how
+    large the page is.
+    """
+
+    def __init__(self, out, distilled=False):
+        super().__init__(convert_charrefs=False)
+        self.out = out
+        self.distilled = distilled
+        self.in_body = False
+        self.done = False
+        self.saw_body = False
+        self.skip_depth = 0
+        self.keep_stack = []
+
+    def handle_starttag(self, tag, attrs):
+        if self.done:
+            return
+        if tag == "body":
+            self.in_body = self.saw_body = True
+            if not self.distilled:
+                self.out.write(self.get_starttag_text())
+            return
+        if not self.in_body:
+            return
+        if self.skip_depth or (self.distilled and tag in SKIPPED_TAGS):
+            if tag not in VOID_TAGS:
+                self.skip_depth += 1
+            return
+
+        if self.distilled:
+            kept = bool(self.keep_stack) or tag in DISTILLED_TAGS or dict(attrs).get("role") in DISTILLED_ROLES
+            if not kept:
+                return
+            if tag not in VOID_TAGS:
+                self.keep_stack.append(tag)
+        self.out.write(self.get_starttag_text())
+
+    def handle_startendtag(self, tag, attrs):
+        if self.done or not self.in_body or self.skip_depth:
+            return
+        if self.distilled and not self.keep_stack and tag not in DISTILLED_TAGS:
+            return
+        self.out.write(self.get_starttag_text())
+
+    def handle_endtag(self, tag):
+        if self.done or not self.in_body:
+            return
+        if tag == "body":
+            if not self.distilled:
+                self.out.write("</body>")
+            self.in_body = False
+            self.done = True
+            return
+        if self.skip_depth:
+            if tag in SKIPPED_TAGS or tag not in VOID_TAGS:
+                self.skip_depth -= 1
+            return
+        if tag in VOID_TAGS:
+            return
+        if self.distilled:
+            if not self.keep_stack or tag not in self.keep_stack:
+                return
+            # Close any unclosed children along with the matched element
+            while self.keep_stack:
+                if self.keep_stack.pop() == tag:
+                    break
+        self.out.write(f"</{tag}>")
+
+    def handle_data(self, data):
+        if self._emitting():
+            self.out.write(data)
+
+    def handle_entityref(self, name):
+        if self._emitting():
+            self.out.write(f"&{name};")
+
+    def handle_charref(self, name):
+        if self._emitting():
+            self.out.write(f"&#{name};")
+
+    def handle_comment(self, data):
+        if self._emitting() and not self.distilled:
+            self.out.write(f"<!--{data}-->")
+
+    def _emitting(self):
+        if self.done or not self.in_body or self.skip_depth:
+            return False
+        return not self.distilled or bool(self.keep_stack)
+
+
+def extract_body(chunks, parser="stream", distilled=False, encoding="utf-8"):
+    """Body markup of a page given as an iterable of byte or str chunks.
+
+    ``bs4`` is the original full-tree path, ``lxml`` builds a C tree and
+    ``stream`` tokenizes incrementally without building a tree at all.
+    ``distilled`` keeps only interactable elements, labels and headings.
+    """
+    if parser not in PARSERS:
+        raise ValueError(f"Unsupported HTML parser: {parser}")
+    chunks = _decode(chunks, encoding)
+
+    if parser == "stream":
+        out = io.StringIO()
+        stream = BodyStreamParser(out, distilled)
+        # Held only until <body> shows up, which is after the (small) head on real pages
+        prelude = []
+        for chunk in chunks:
+            if not stream.saw_body:
+                prelude.append(chunk)
+            stream.feed(chunk)
+            if stream.saw_body:
+                prelude.clear()
+            if stream.done:
+                break
+        stream.close()
+        if stream.saw_body:
+            return out.getvalue()
+        # Fragments without a <body> tag: kept whole, or distilled as if they were the body
+        fragment = "".join(prelude)
+        return extract_body(["<body>", fragment, "</body>"], parser, True) if distilled else fragment
+
+    if parser == "lxml":
+        from lxml import etree, html as lxml_html
+
+        tree_parser = etree.HTMLParser()
+        for chunk in chunks:
+            tree_parser.feed(chunk)
+        root = tree_parser.close()
+        body = root.find("body") if root is not None else None
+        if body is None:
+            return ""
+        if not distilled:
+            return lxml_html.tostring(body, encoding="unicode")
+        _drop_skipped(body)
+        return "".join(lxml_html.tostring(element, encoding="unicode", with_tail=False)
+                       for element in _distilled_elements(body))
+
+    from bs4 import BeautifulSoup
+
+    text = "".join(chunks)
+    soup = BeautifulSoup(text, 'html.parser')
+    if soup.body is None:
+        return extract_body(["<body>", text, "</body>"], parser, True) if distilled else text
+    if not distilled:
+        return str(soup.body)
+    for skipped in soup.body.find_all(list(SKIPPED_TAGS)):
+        skipped.decompose()
+    kept = soup.body.find_all(lambda element: element.name in DISTILLED_TAGS or
+                              element.get("role") in DISTILLED_ROLES)
+    # Tags compare by content, so track identity to find the outermost kept elements
+    kept_ids = {id(element) for element in kept}
+    return "".join(str(element) for element in kept
+                   if not any(id(parent) in kept_ids for parent in element.parents))
+
+
+def fetch_body(url, parser="stream", distilled=False, headers=None, timeout=30):
+    """Stream a page and extract its body without holding the whole response text."""
+    import requests
+
+    with requests.get(url, headers=headers, timeout=timeout, stream=parser != "bs4") as response:
+        response.raise_for_status()
+        if parser == "bs4":
+            return extract_body([response.text], parser, distilled)
+        return extract_body(response.iter_content(CHUNK_SIZE), parser, distilled, response.encoding or "utf-8")
+
+
+def _decode(chunks, encoding):
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    for chunk in chunks:
+        yield decoder.decode(chunk) if isinstance(chunk, (bytes, bytearray)) else chunk
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+
+def _drop_skipped(body):
+    # Removed with everything inside, as on the stream and bs4 paths; text following them stays
+    for element in list(body.iter(*SKIPPED_TAGS)):
+        parent = element.getparent()
+        if parent is None:
+            continue
+        if element.tail:
+            previous = element.getprevious()
+            if previous is not None:
+                previous.tail = (previous.tail or "") + element.tail
+            else:
+                parent.text = (parent.text or "") + element.tail
+        parent.remove(element)
+
+
+def _distilled_elements(body):
+    for element in body.iter():
+        if not isinstance(element.tag, str) or element.tag in SKIPPED_TAGS:
+            continue
+        if element.tag in DISTILLED_TAGS or element.get("role") in DISTILLED_ROLES:
+            if not any(ancestor.tag in DISTILLED_TAGS or ancestor.get("role") in DISTILLED_ROLES
+                       for ancestor in element.iterancestors()):
+                yield element
@@ -0,0 +1,160 @@
+import re
+
+from selenium.webdriver.common.by import By
+
+
+# Collected once per fallback invocation; capped so huge pages stay cheap to ship back.
+# Values of 300 characters or more are not shipped; long_attrs/long_texts mark them as unknown.
+DOM_SUMMARY_SCRIPT = """
+var limit = arguments[0];
+var attrs = ['id', 'name', 'class', 'href', 'value', 'placeholder', 'type', 'data-testid', 'aria-label', 'for'];
+var summary = {tags: {}, attrs: {}, texts: {}, longAttrs: {}, longTexts: false};
+attrs.forEach(function (a) { summary.attrs[a] = {}; });
+var elements = document.getElementsByTagName('*');
+for (var i = 0; i < elements.length && i < limit; i++) {
+    var el = elements[i];
+    summary.tags[el.tagName.toLowerCase()] = 1;
+    for (var j = 0; j < attrs.length; j++) {
+        var value = el.getAttribute(attrs[j]);
+        if (value === null) { continue; }
+        if (value.length < 300) { summary.attrs[attrs[j]][value] = 1; } else { summary.longAttrs[attrs[j]] = 1; }
+    }
+    for (var k = 0; k < el.childNodes.length; k++) {
+        var node = el.childNodes[k];
+        if (node.nodeType === 3) {
+            var text = node.nodeValue.trim();
+            if (text.length >= 300) { summary.longTexts = true; } else if (text) { summary.texts[text] = 1; }
+        }
+    }
+}
+return {
+    tags: Object.keys(summary.tags),
+    texts: Object.keys(summary.texts),
+    attrs: Object.fromEntries(attrs.map(function (a) { return [a, Object.keys(summary.attrs[a])]; })),
+    long_attrs: Object.keys(summary.longAttrs),
+    long_texts: summary.longTexts,
+    truncated: elements.length > limit
+};
+"""
+
+TAG_PATTERN = re.compile(r'(?:^|/)([a-zA-Z][a-zA-Z0-9_-]*)(?=\[|/|$)')
+ATTR_EQUALS_PATTERN = re.compile(r'@([a-zA-Z_:][\w:.-]*)\s*=\s*([\'"])(.*?)\2')
+ATTR_CONTAINS_PATTERN = re.compile(r'contains\(\s*@([a-zA-Z_:][\w:.-]*)\s*,\s*([\'"])(.*?)\2\s*\)')
+TEXT_EQUALS_PATTERN = re.compile(r'text\(\)\s*=\s*([\'"])(.*?)\1')
+TEXT_CONTAINS_PATTERN = re.compile(r'contains\(\s*text\(\)\s*,\s*([\'"])(.*?)\1\s*\)')
+LOWER_CONTAINS_PATTERN = re.compile(
+    r'contains\(\s*translate\(\s*(text\(\)|@[\w:.-]+)\s*,[^)]*\)\s*,\s*([\'"])(.*?)\2\s*\)')
+QUOTED_PATTERN = re.compile(r'(\'[^\']*\'|"[^"]*")')
+NEGATION_PATTERN = re.compile(r'not\(|\sor\s|\|')
+
+
+def normalize_xpath(value):
+    """Canonical spelling of an XPath, leaving string literals untouched."""
+    parts = QUOTED_PATTERN.split(value.strip())
+    for i in range(0, len(parts), 2):
+        part = re.sub(r'\s+', ' ', parts[i])
+        parts[i] = re.sub(r'\s*([\[\](),=/|])\s*', r'\1', part)
+    return "".join(parts)
+
+
+def dedupe_strategies(strategies, primary=None):
+    """Drop repeated candidates and ones identical to the locator that already failed."""
+    seen = set()
+    if primary:
+        seen.add((By.XPATH, normalize_xpath(primary)))
+    unique = []
+    for by_type, value in strategies:
+        key = (by_type, normalize_xpath(value) if by_type == By.XPATH else value.strip())
+        if key in seen:
+            continue
+        seen.add(key)
+        unique.append((by_type, value))
+    return unique
+
+
+def can_match(by_type, value, summary):
+    """False only when the page summary proves the candidate cannot match anything."""
+    if by_type != By.XPATH or not summary or summary.get("truncated"):
+        return True
+    # Negations and unions can match without the literal being present
+    if NEGATION_PATTERN.search(value):
+        return True
+
+    tags = set(summary.get("tags", []))
+    # Attributes with a value too long to ship back could match anything
+    long_attrs = set(summary.get("long_attrs", []))
+    attrs = {name: set(values) for name, values in summary.get("attrs", {}).items() if name not in long_attrs}
+    texts = None if summary.get("long_texts") else summary.get("texts", [])
+
+    # Only tags on the main path, so predicates like [contains(...)] are not misread as tags
+    path = re.sub(r'\[[^\]]*\]', '', QUOTED_PATTERN.sub("''", value))
+    for tag in TAG_PATTERN.findall(path):
+        if tag.lower() not in tags:
+            return False
+
+    for name, _, expected in ATTR_EQUALS_PATTERN.findall(value):
+        if name in attrs and expected not in attrs[name]:
+            return False
+
+    for name, _, expected in ATTR_CONTAINS_PATTERN.findall(value):
+        if name in attrs and not any(expected in actual for actual in attrs[name]):
+            return False
+
+    if texts is not None:
+        for _, expected in TEXT_EQUALS_PATTERN.findall(value):
+            if expected.strip() not in texts:
+                return False
+
+        for _, expected in TEXT_CONTAINS_PATTERN.findall(value):
+            if not any(expected in text for text in texts):
+                return False
+
+    for source, _, expected in LOWER_CONTAINS_PATTERN.findall(value):
+        if source == "text()" and texts is not None:
+            pool = texts
+        elif source[1:] in attrs:
+            pool = attrs[source[1:]]
+        else:
+            continue
+        if not any(expected.lower() in actual.lower() for actual in pool):
+            return False
+
+    return True
+
+
+def estimate_cost(by_type, value):
+    """Cost of probing a candidate in units of one plain probe; whole-document scans cost more."""
+    if by_type != By.XPATH:
+        return 1.0
+    cost = 1.0
+    if value.startswith("//*"):
+        cost += 2.0
+    cost += 0.5 * value.count("contains(")
+    cost += 1.0 * value.count("translate(")
+    return cost
+
+
+def plan_candidates(strategies, summary=None, primary=None, max_cost=None):
+    """Deduplicate, prune against the DOM summary and cap the candidate list by cost.
+
+    The original priority order is kept.
+    """
+    planned = []
+    total_cost = 0.0
+    for by_type, value in dedupe_strategies(strategies, primary):
+        if not can_match(by_type, value, summary):
+            continue
+        cost = estimate_cost(by_type, value)
+        if max_cost is not None and planned and total_cost + cost > max_cost:
+            break
+        total_cost += cost
+        planned.append((by_type, value))
+    return planned
+
+
+def get_dom_summary(driver, element_limit=20000):
+    try:
+        return driver.execute_script(DOM_SUMMARY_SCRIPT, element_limit)
+    except Exception as e:
+        print(f"Could not summarise the page for candidate pruning: {e}")
+        return None
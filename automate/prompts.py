@@ -0,0 +1,247 @@
+import os
+import re
+import string
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+from automate.responses import generate_suite
+
+
+# Rough characters per token; markup tokenises denser than prose
+CHARS_PER_TOKEN = {"text/html": 3.0, "text/markdown": 4.0}
+DEFAULT_CHARS_PER_TOKEN = 4.0
+# Output cost of one generated step and of a test's wrapper, measured on data/autos
+TOKENS_PER_STEP = 70
+TOKENS_PER_TEST = 25
+
+CONTEXT_TOKENS = 1_000_000
+MAX_OUTPUT_TOKENS = 8192
+
+CASE_HEADING_PATTERN = re.compile(r'^##\s+(?!#)', re.MULTILINE)
+STEP_LINE_PATTERN = re.compile(r'^\s*(?:[-*+]|\d+[.)])\s+\S', re.MULTILINE)
+
+GENERATION_TEMPLATE = string.Template("""\
+You are a highly skilled test automation engineer. Your task is to convert human-readable test cases and HTML snapshots into a precise JSON test suite that can be used to automate browser tests.
+
+**KNOWLEDGE BASE:**
+The .html files are snapshots of pages that you will use to automating (they provided in order, so if you can't find element in first HTML it must be in second).
+When step requires input of possible-uniq data (username, email), generate a combination of random numbers or/and letters (sfih5$$gdu2, hiefueg9658@gmail.com).
+When step requires input of an email, use the outlook.com domain.
+Any password you generate should be longer than 12 characters.
+
+While identifying elements keep in mind that:
+Word 'title' always refers to <h> tag
+Words 'enter' or 'input' more likely refers to <input/> tag
+Words 'select' or 'pick' more likely refers to <input type='select/radio' /> tag or <select/> dropdown
+Phrase 'check ... field' more likely refers to <input type='radio/checkbox' /> tag
+
+Make difference between <button/> that redirects to another page and <a/> tag.
+Make difference between @name='displayname' and @name='displayName'.
+Never identify: <input/> with @placeholder, <div> with @class, any element with 'data-encore-id'.
+Always identify: <a/> with @href, <button/> with @data-testid or @text.
+
+Do not stop generating steps even if you not certain in your answer
+
+**Finding the Element (PRIMARY FOCUS):** For EACH test step, your primary task is to find the HTML element that *best corresponds* to the action described in the step.
+
+The JSON should follow this exact pattern:
+```json
+[{
+  "testName": "|Name of test case|",
+  "steps": [{
+    "action": "|Action type. Possible values: 'click', 'goto', 'input', 'select', 'waitForElementVisible', 'waitForRedirect'|",
+    "locator": {
+      "type": "|Locator type. Possible values: 'id', 'css', 'url', 'xpath'|",
+      "value": "|Locator value from the HTML - EXACT MATCH|"
+    },
+    "input_value": "|Value of input. Appears only if action is input or select|",
+  }]
+}]
+```
+
+EXAMPLE 1:
+Test Case: "Click the 'Log in' button."
+HTML: <button class="login-button primary"><span>Log in</span></button>
+JSON: [{
+  "testName": "Example Test",
+  "steps": [{
+    "action": "click",
+    "locator": {
+      "type": "xpath",
+      "value": "//button[text()='Log in']"
+    }
+  }]
+}]
+
+EXAMPLE 2:
+Test Case: "Enter any password into Password field"
+HTML: <input id="new-password" name="new-password" type="password" autocomplete="new-password" />
+JSON: [{
+  "testName": "Example Test",
+  "steps": [{
+    "action": "input",
+    "locator": {
+      "type": "xpath",
+      "value": "//input[@name='new-password']"
+    },
+    "input_value": "pas%sword142!@#"
+  }]
+}]
+
+${chunk_note}Now, process the following test case and HTML:
+""")
+
+
+@lru_cache(maxsize=32)
+def render_prompt(chunk_note=""):
+    """Generation prompt, substituted once per distinct chunk note."""
+    return GENERATION_TEMPLATE.substitute(chunk_note=f"{chunk_note}\n\n" if chunk_note else "")
+
+
+def estimate_tokens(text, mime_type="text/markdown"):
+    return int(len(text) / CHARS_PER_TOKEN.get(mime_type, DEFAULT_CHARS_PER_TOKEN)) + 1
+
+
+def estimate_file_tokens(path, mime_type="text/html"):
+    return int(os.path.getsize(path) / CHARS_PER_TOKEN.get(mime_type, DEFAULT_CHARS_PER_TOKEN)) + 1
+
+
+def estimate_output_tokens(markdown):
+    """Expected size of the generated suite, from the number of cases and step lines."""
+    cases = max(1, len(CASE_HEADING_PATTERN.findall(markdown)))
+    steps = max(1, len(STEP_LINE_PATTERN.findall(markdown)))
+    return cases * TOKENS_PER_TEST + steps * TOKENS_PER_STEP
+
+
+def split_cases(markdown):
+    """The markdown split into one document per ``## Case`` section, each keeping the shared preamble."""
+    starts = [match.start() for match in CASE_HEADING_PATTERN.finditer(markdown)]
+    if len(starts) < 2:
+        return [markdown]
+    preamble = markdown[:starts[0]]
+    bounds = starts + [len(markdown)]
+    return [preamble + markdown[bounds[i]:bounds[i + 1]].rstrip() + "\n" for i in range(len(starts))]
+
+
+class PromptPlanner:
+    """Splits a generation request that would not fit into several smaller calls.
+
+    Cases are grouped so each call's expected output stays under the output
+    headroom. If the snapshots alone overflow the input budget, they are
+    split into page groups and each call covers all cases on its pages.
+    ``shared_pages`` (fragments common to several pages) go ahead of the
+    pages in every call, and ``note`` is added to every call's note.
+    """
+
+    def __init__(self, context_tokens=CONTEXT_TOKENS, max_output_tokens=MAX_OUTPUT_TOKENS, output_headroom=0.75,
+                 input_headroom=0.9):
+        self.input_budget = int(context_tokens * input_headroom)
+        self.output_budget = int(max_output_tokens * output_headroom)
+
+    def plan(self, markdown, page_paths, shared_pages=(), note=""):
+        prompt_tokens = estimate_tokens(render_prompt("x" * (200 + len(note))))
+        shared_pages = list(shared_pages)
+        shared_tokens = sum(estimate_file_tokens(path) for path in shared_pages)
+        page_tokens = [estimate_file_tokens(path) for path in page_paths]
+        case_docs = split_cases(markdown) if markdown else [""]
+
+        page_groups = self._group(list(range(len(page_paths))), page_tokens,
+                                  self.input_budget - prompt_tokens - shared_tokens - estimate_tokens(markdown or ""))
+        if len(page_groups) > 1:
+            total = len(page_paths)
+            chunks = []
+            for group in page_groups:
+                first, last = group[0] + 1, group[-1] + 1
+                page_note = (f"The attached HTML files are pages {first}-{last} of {total} in this flow. "
+                             f"Only output the steps that happen on these pages, keeping each testName unchanged.")
+                chunks.append({"markdown": markdown, "pages": shared_pages + [page_paths[i] for i in group],
+                               "note": _join_notes(note, page_note), "split": "page"})
+            return chunks
+
+        pages = shared_pages + list(page_paths)
+        case_groups = self._group(case_docs, [estimate_output_tokens(doc) for doc in case_docs], self.output_budget)
+        if len(case_groups) == 1:
+            return [{"markdown": markdown, "pages": pages, "note": note, "split": None}]
+        return [{"markdown": _join_cases(group), "pages": pages, "note": note, "split": "case"}
+                for group in case_groups]
+
+    def describe(self, markdown, page_paths):
+        page_tokens = sum(estimate_file_tokens(path) for path in page_paths)
+        return {
+            "prompt_tokens": estimate_tokens(render_prompt()),
+            "markdown_tokens": estimate_tokens(markdown or ""),
+            "page_tokens": page_tokens,
+            "output_tokens": estimate_output_tokens(markdown or ""),
+            "input_budget": self.input_budget,
+            "output_budget": self.output_budget,
+        }
+
+    def _group(self, items, sizes, budget):
+        groups = [[]]
+        used = 0
+        for item, size in zip(items, sizes):
+            if groups[-1] and used + size > budget:
+                groups.append([])
+                used = 0
+            groups[-1].append(item)
+            used += size
+        return groups
+
+
+def run_chunks(chunks, generate, max_workers=4):
+    """Call ``generate(chunk)`` for every chunk concurrently and merge the suites they return.
+
+    Truncated answers are completed by re-requesting only their tail.
+    """
+    results = [None] * len(chunks)
+    errors = []
+    lock = threading.Lock()
+
+    def call(index):
+        try:
+            chunk = chunks[index]
+            results[index], _ = generate_suite(lambda note: generate(dict(chunk, note=note)), chunk["note"])
+        except Exception as e:
+            with lock:
+                errors.append(f"chunk {index + 1}/{len(chunks)}: {e}")
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(chunks)))) as executor:
+        list(executor.map(call, range(len(chunks))))
+
+    for error in errors:
+        print(f"Generation failed for {error}")
+    if errors and all(result is None for result in results):
+        raise RuntimeError(errors[0])
+    by_page = any(chunk["split"] == "page" for chunk in chunks)
+    return merge_suites([result for result in results if result is not None], by_page)
+
+
+def merge_suites(suites, by_page=False):
+    """Merge per-chunk suites in chunk order.
+
+    Case splits produce distinct tests; page splits produce the same tests
+    with the steps for successive pages, which are concatenated.
+    """
+    merged = {}
+    for suite in suites:
+        for test in suite:
+            name = test.get("testName", "Unnamed Test")
+            if name not in merged:
+                merged[name] = {**test, "steps": list(test.get("steps", []))}
+            elif by_page:
+                merged[name]["steps"].extend(test.get("steps", []))
+            else:
+                print(f"Duplicate test {name} across chunks, keeping the first")
+    return list(merged.values())
+
+
+def _join_cases(docs):
+    if len(docs) == 1:
+        return docs[0]
+    starts = [CASE_HEADING_PATTERN.search(doc).start() for doc in docs]
+    return docs[0][:starts[0]] + "\n".join(doc[start:] for doc, start in zip(docs, starts))
+
+
+def _join_notes(*notes):
+    return " ".join(note for note in notes if note)
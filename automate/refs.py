@@ -1,7 +1,8 @@
-import re
 from pathlib import Path
 from typing import List, Optional
 
+from automate.textutils import extract_urls
+
 
 def extract_urls_from_markdown(file_path: str) -> List[str]:
     path = Path(file_path)
@@ -14,10 +15,7 @@ def extract_urls_from_markdown(file_path: str) -> List[str]:
     with open(file_path, 'r', encoding='utf-8') as file:
         content = file.read()
 
-    url_pattern = r'https?://[^\s"\'\)\]<>]+(?:\([^\s]+\)|[^\s"\'\)\]<>])*'
-    urls = re.findall(url_pattern, content)
-
-    return urls
+    return extract_urls(content)
 
 
 def get_urls(test_case_file):
@@ -0,0 +1,209 @@
+import argparse
+import queue
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from automate.htmlparse import PARSERS
+from automate.snapshot import SNAPS_DIR, fetch_static_html, save_snapshot
+
+INTERACTABLE_PATTERN = re.compile(
+    r'<(?:button|input|select|textarea)\b|<a\b[^>]*\bhref=|\brole=["\'](?:button|link|textbox|combobox)["\']',
+    re.IGNORECASE)
+
+# Polled in the tab: the page is idle once no new resources were fetched and the
+# DOM stopped growing for the idle window.
+IDLE_PROBE_SCRIPT = """
+return [document.readyState, performance.getEntriesByType('resource').length,
+        document.getElementsByTagName('*').length];
+"""
+BODY_SCRIPT = "return document.body ? document.body.outerHTML : document.documentElement.outerHTML;"
+
+
+def count_interactables(html):
+    return len(INTERACTABLE_PATTERN.findall(html or ""))
+
+
+class RenderPool:
+    """Warm headless tabs that render client-side pages for snapshots.
+
+    Chromium-based browsers share one process through BrowserContextPool, so
+    every tab is a lightweight context; other browsers get one headless
+    driver per tab. Tabs are opened on first use and reused across URLs.
+    """
+
+    def __init__(self, browser='chrome', size=4, idle_ms=500, budget=15.0, poll_interval=0.1):
+        self.browser = browser.lower()
+        self.size = size
+        self.idle = idle_ms / 1000
+        self.budget = budget
+        self.poll_interval = poll_interval
+        self._contexts = None
+        self._tabs = queue.Queue()
+        self._opened = 0
+        self._unavailable = None
+        self._lock = threading.Lock()
+
+    def render(self, url):
+        tab = self._checkout()
+        try:
+            tab.set_page_load_timeout(self.budget)
+            start = time.monotonic()
+            tab.get(url)
+            idle = self.wait_for_network_idle(tab, start + self.budget)
+            if not idle:
+                print(f"{url} did not go idle within {self.budget}s, snapshotting what has rendered")
+            return tab.execute_script(BODY_SCRIPT)
+        except Exception:
+            self._discard(tab)
+            tab = None
+            raise
+        finally:
+            if tab is not None:
+                self._tabs.put(tab)
+
+    def wait_for_network_idle(self, tab, deadline):
+        last = None
+        quiet_since = time.monotonic()
+        while time.monotonic() < deadline:
+            state = tab.execute_script(IDLE_PROBE_SCRIPT)
+            now = time.monotonic()
+            if state != last:
+                last = state
+                quiet_since = now
+            elif state[0] == "complete" and now - quiet_since >= self.idle:
+                return True
+            time.sleep(self.poll_interval)
+        return False
+
+    def close(self):
+        while True:
+            try:
+                tab = self._tabs.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(tab)
+        if self._contexts:
+            self._contexts.stop()
+
+    def _checkout(self):
+        with self._lock:
+            if self._unavailable:
+                raise self._unavailable
+            if self._tabs.empty() and self._opened < self.size:
+                self._opened += 1
+                opening = True
+            else:
+                opening = False
+        if not opening:
+            return self._tabs.get()
+        try:
+            return self._open_tab()
+        except (FileNotFoundError, RuntimeError) as e:
+            # No usable browser; do not relaunch it for every remaining URL
+            with self._lock:
+                self._opened -= 1
+                self._unavailable = e
+            raise
+        except Exception:
+            with self._lock:
+                self._opened -= 1
+            raise
+
+    def _open_tab(self):
+        if self.browser in ("chrome", "edge"):
+            with self._lock:
+                if self._contexts is None:
+                    from automate.contexts import BrowserContextPool
+
+                    self._contexts = BrowserContextPool(self.browser, headless=True, max_contexts=self.size).start()
+            return self._contexts.open_context()
+
+        from automate.automate import setup_webdriver
+
+        return setup_webdriver(self.browser, headless=True)
+
+    def _discard(self, tab):
+        with self._lock:
+            self._opened -= 1
+        try:
+            if self._contexts:
+                self._contexts.close_context(tab)
+            else:
+                tab.quit()
+        except Exception:
+            pass
+
+
+def snapshot_urls(urls, output_dir=SNAPS_DIR, mode="auto", browser='chrome', concurrency=4, min_interactables=3,
+                  idle_ms=500, budget=15.0, parser="bs4"):
+    """Snapshot many URLs concurrently, returning saved paths in input order (None where it failed).
+
+    ``auto`` keeps the cheap static fetch when it already contains at least
+    ``min_interactables`` interactable elements and renders the rest in the
+    pool; ``static`` and ``render`` force one path.
+    """
+    pool = RenderPool(browser, concurrency, idle_ms, budget) if mode != "static" else None
+
+    def snapshot(url):
+        static_html = None
+        if mode != "render":
+            try:
+                static_html = fetch_static_html(url, parser)
+            except Exception as e:
+                print(f"Static fetch of {url} failed: {e}")
+            if mode == "static" or count_interactables(static_html) >= min_interactables:
+                return _save(url, static_html, output_dir, "static")
+
+        try:
+            start = time.monotonic()
+            html = pool.render(url)
+            print(f"Rendered {url} in {time.monotonic() - start:.1f}s "
+                  f"({count_interactables(html)} interactable elements)")
+            return _save(url, html, output_dir, "rendered")
+        except Exception as e:
+            print(f"Rendering {url} failed: {e}")
+            return _save(url, static_html, output_dir, "static")
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+            return list(executor.map(snapshot, urls))
+    finally:
+        if pool:
+            pool.close()
+
+
+def _save(url, html, output_dir, source):
+    if not html:
+        return None
+    try:
+        file_path = save_snapshot(url, html, output_dir)
+    except IOError as e:
+        print(f"Error saving HTML to file: {e}")
+        return None
+    print(f"Saved {source} HTML body from {url} to {file_path}")
+    return file_path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Snapshot pages, rendering client-side pages in headless tabs")
+    parser.add_argument("urls", nargs="+")
+    parser.add_argument("--output-dir", default=SNAPS_DIR)
+    parser.add_argument("--mode", choices=["auto", "static", "render"], default="auto")
+    parser.add_argument("--browser", default="chrome")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--idle-ms", type=int, default=500)
+    parser.add_argument("--budget", type=float, default=15.0)
+    parser.add_argument("--parser", choices=PARSERS, default="bs4", help="HTML parser for static fetches")
+    args = parser.parse_args(argv)
+
+    start = time.monotonic()
+    paths = snapshot_urls(args.urls, args.output_dir, args.mode, args.browser, args.concurrency,
+                          idle_ms=args.idle_ms, budget=args.budget, parser=args.parser)
+    print(f"{sum(1 for path in paths if path)}/{len(paths)} snapshots in {time.monotonic() - start:.1f}s")
+    return 0 if all(paths) else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
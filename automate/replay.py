@@ -0,0 +1,358 @@
+import argparse
+import base64
+import hashlib
+import json
+import os
+import ssl
+import subprocess
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, urlunsplit
+
+from automate.storage import data_path, write_json_atomic
+
+
+RECORDINGS_DIR = data_path("recordings")
+CERT_DIR = data_path("cache", "replay")
+
+MODES = ("record", "replay")
+
+# Not forwarded in either direction; bodies are stored decoded so the length is recomputed
+HOP_HEADERS = {"connection", "keep-alive", "proxy-authenticate", "proxy-authorization", "proxy-connection", "te",
+               "trailer", "transfer-encoding", "upgrade", "content-encoding", "content-length"}
+TEXT_TYPES = ("text/", "application/json", "application/javascript", "application/xml", "image/svg+xml",
+              "application/x-www-form-urlencoded")
+
+
+def har_path(suite_name, root=RECORDINGS_DIR):
+    return os.path.join(root, f"{suite_name}.har")
+
+
+def ensure_certificate(cert_dir=None):
+    """Self-signed certificate the proxy presents for every HTTPS host.
+
+    Browsers are started with certificate errors ignored, so one certificate
+    is enough and nothing has to be installed in a trust store.
+    """
+    cert_dir = cert_dir or CERT_DIR
+    cert_path = os.path.join(cert_dir, "proxy-cert.pem")
+    key_path = os.path.join(cert_dir, "proxy-key.pem")
+    if not (os.path.exists(cert_path) and os.path.exists(key_path)):
+        os.makedirs(cert_dir, exist_ok=True)
+        try:
+            subprocess.run(["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-keyout", key_path,
+                            "-out", cert_path, "-days", "825", "-subj", "/CN=shaster-replay-proxy"],
+                           check=True, capture_output=True)
+        except FileNotFoundError:
+            raise RuntimeError("openssl is needed to create the replay proxy certificate")
+    return cert_path, key_path
+
+
+def request_key(method, url, body=b""):
+    """Identity of a request for replay: method, URL without fragment, and a digest of the body."""
+    scheme, netloc, path, query, _ = urlsplit(url)
+    digest = hashlib.sha1(body).hexdigest()[:16] if body else ""
+    return method.upper(), urlunsplit((scheme, netloc, path or "/", query, "")), digest
+
+
+def _loose_key(key):
+    method, url, _ = key
+    scheme, netloc, path, _, _ = urlsplit(url)
+    return method, urlunsplit((scheme, netloc, path, "", ""))
+
+
+class ReplayProxy:
+    """Local HTTP(S) proxy that records page traffic into a HAR file or serves it back.
+
+    HTTPS is intercepted with a self-signed certificate. In ``replay`` mode
+    nothing goes to the network: requests are answered from the recording,
+    repeated requests are served in recorded order, and anything not found
+    is answered with 404 and reported as a miss.
+    """
+
+    def __init__(self, har, mode="replay", host="127.0.0.1", port=0, timeout=30):
+        if mode not in MODES:
+            raise ValueError(f"Unsupported network mode: {mode}")
+        self.har = har
+        self.mode = mode
+        self.timeout = timeout
+        self.entries = []
+        self.misses = []
+        self.hits = 0
+        self.loose_hits = 0
+        self._index = {}
+        self._loose_index = {}
+        self._served = {}
+        self._session = None
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), _make_handler(self))
+        self._server.daemon_threads = True
+        self._thread = None
+
+        cert_path, key_path = ensure_certificate()
+        self.ssl_context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+        self.ssl_context.load_cert_chain(cert_path, key_path)
+
+        if mode == "replay":
+            self._load()
+        else:
+            import requests
+
+            self._session = requests.Session()
+            self._session.trust_env = False
+
+    @property
+    def address(self):
+        host, port = self._server.server_address[:2]
+        return f"{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        report = self.report()
+        if self.mode == "record" and self.entries:
+            # A run that never got a page loaded must not wipe an earlier recording
+            self.save()
+        elif self.mode == "replay":
+            write_json_atomic(os.path.splitext(self.har)[0] + ".misses.json", report["misses"], indent=None)
+        return report
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def handle(self, method, url, headers, body):
+        """Status, reason, headers and body for one proxied request."""
+        if self.mode == "replay":
+            return self._replay(method, url, body)
+        return self._record(method, url, headers, body)
+
+    def report(self):
+        with self._lock:
+            return {
+                "mode": self.mode,
+                "har": self.har,
+                "requests": len(self.entries) if self.mode == "record" else self.hits + len(self.misses),
+                "hits": self.hits,
+                "loose_hits": self.loose_hits,
+                "misses": list(self.misses),
+            }
+
+    def save(self):
+        with self._lock:
+            har = {"log": {"version": "1.2", "creator": {"name": "shaster-replay", "version": "1"},
+                           "entries": list(self.entries)}}
+        write_json_atomic(self.har, har, indent=None)
+
+    def _load(self):
+        if not os.path.exists(self.har):
+            raise FileNotFoundError(f"No recording at {self.har}; run once with network mode 'record' first")
+        with open(self.har, 'r', encoding='utf-8') as f:
+            self.entries = json.load(f)["log"]["entries"]
+        for entry in self.entries:
+            request = entry["request"]
+            body = _decode_content(request.get("postData", {})) if request.get("postData") else b""
+            key = request_key(request["method"], request["url"], body)
+            self._index.setdefault(key, []).append(entry)
+            self._loose_index.setdefault(_loose_key(key), []).append(entry)
+
+    def _replay(self, method, url, body):
+        key = request_key(method, url, body)
+        with self._lock:
+            candidates = self._index.get(key)
+            pool = key
+            if not candidates:
+                # Same endpoint with a different query or body, e.g. cache busters and timestamps
+                pool = _loose_key(key)
+                candidates = self._loose_index.get(pool)
+            if not candidates:
+                self.misses.append({"method": method, "url": url})
+                return 404, "Not Recorded", [("Content-Type", "text/plain")], b"Not in recording\n"
+            served = self._served.get(pool, 0)
+            self._served[pool] = served + 1
+            self.hits += 1
+            if pool != key:
+                self.loose_hits += 1
+        # Repeated requests get the recorded responses in order, then the last one again
+        response = candidates[min(served, len(candidates) - 1)]["response"]
+        headers = [(header["name"], header["value"]) for header in response["headers"]]
+        return response["status"], response.get("statusText", ""), headers, _decode_content(response["content"])
+
+    def _record(self, method, url, headers, body):
+        started = datetime.now(timezone.utc)
+        start = time.monotonic()
+        forwarded = {name: value for name, value in headers.items() if name.lower() not in HOP_HEADERS}
+        try:
+            upstream = self._session.request(method, url, headers=forwarded, data=body or None,
+                                             allow_redirects=False, timeout=self.timeout)
+        except Exception as e:
+            with self._lock:
+                self.misses.append({"method": method, "url": url, "error": str(e)})
+            return 502, "Bad Gateway", [("Content-Type", "text/plain")], f"{e}\n".encode("utf-8")
+
+        elapsed = (time.monotonic() - start) * 1000
+        # Raw headers keep repeated fields such as Set-Cookie apart
+        response_headers = [(name, value) for name, value in upstream.raw.headers.items()
+                            if name.lower() not in HOP_HEADERS]
+        mime_type = upstream.headers.get("Content-Type", "")
+        entry = {
+            "startedDateTime": started.isoformat(),
+            "time": round(elapsed, 1),
+            "request": {
+                "method": method,
+                "url": url,
+                "httpVersion": "HTTP/1.1",
+                "headers": [{"name": name, "value": value} for name, value in forwarded.items()],
+                "queryString": [],
+                "headersSize": -1,
+                "bodySize": len(body),
+            },
+            "response": {
+                "status": upstream.status_code,
+                "statusText": upstream.reason or "",
+                "httpVersion": "HTTP/1.1",
+                "headers": [{"name": name, "value": value} for name, value in response_headers],
+                "content": _encode_content(upstream.content, mime_type),
+                "redirectURL": upstream.headers.get("Location", ""),
+                "headersSize": -1,
+                "bodySize": len(upstream.content),
+            },
+            "cache": {},
+            "timings": {"send": 0, "wait": round(elapsed, 1), "receive": 0},
+        }
+        if body:
+            entry["request"]["postData"] = _encode_content(body, headers.get("Content-Type", ""))
+        with self._lock:
+            self.entries.append(entry)
+        return upstream.status_code, upstream.reason or "", response_headers, upstream.content
+
+
+def _encode_content(data, mime_type):
+    content = {"size": len(data), "mimeType": mime_type}
+    if mime_type.startswith(TEXT_TYPES):
+        try:
+            content["text"] = data.decode("utf-8")
+            return content
+        except UnicodeDecodeError:
+            pass
+    content["text"] = base64.b64encode(data).decode("ascii")
+    content["encoding"] = "base64"
+    return content
+
+
+def _decode_content(content):
+    text = content.get("text", "")
+    if content.get("encoding") == "base64":
+        return base64.b64decode(text)
+    return text.encode("utf-8")
+
+
+def _make_handler(proxy):
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # host[:port] of the CONNECT tunnel this connection has become, if any
+        tunnel = None
+
+        def do_CONNECT(self):
+            self.send_response(200, "Connection Established")
+            self.end_headers()
+            try:
+                connection = proxy.ssl_context.wrap_socket(self.connection, server_side=True)
+            except (ssl.SSLError, OSError):
+                self.close_connection = True
+                return
+            # Keep serving requests, now decrypted, over the same connection
+            self.connection = connection
+            self.rfile = connection.makefile('rb', self.rbufsize)
+            self.wfile = connection.makefile('wb')
+            self.tunnel = self.path
+            self.close_connection = False
+
+        def do_GET(self):
+            self._proxy()
+
+        do_POST = do_PUT = do_PATCH = do_DELETE = do_HEAD = do_OPTIONS = do_GET
+
+        def _proxy(self):
+            if self.tunnel:
+                host = self.tunnel[:-4] if self.tunnel.endswith(":443") else self.tunnel
+                url = f"https://{host}{self.path}"
+            else:
+                url = self.path
+            body = self._read_body()
+            status, reason, headers, content = proxy.handle(self.command, url, dict(self.headers.items()), body)
+
+            self.send_response(status, reason)
+            for name, value in headers:
+                if name.lower() not in HOP_HEADERS:
+                    self.send_header(name, value)
+            self.send_header("Content-Length", str(len(content)))
+            self.end_headers()
+            if self.command != "HEAD":
+                self.wfile.write(content)
+
+        def _read_body(self):
+            if "chunked" not in self.headers.get("Transfer-Encoding", "").lower():
+                return self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            chunks = []
+            while True:
+                size = int(self.rfile.readline().split(b";", 1)[0].strip() or b"0", 16)
+                if not size:
+                    break
+                chunks.append(self.rfile.read(size))
+                self.rfile.readline()
+            # Skip the trailer section up to its closing blank line
+            while self.rfile.readline().strip():
+                pass
+            return b"".join(chunks)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def print_report(report):
+    if report["mode"] == "replay":
+        print(f"Network replay: {report['requests']} request(s), {report['hits']} served from {report['har']}")
+    else:
+        print(f"Network record: {report['requests']} request(s) saved to {report['har']}")
+    if report["loose_hits"]:
+        print(f"  {report['loose_hits']} matched only by path (query or body differed from the recording)")
+    for miss in report["misses"]:
+        print(f"  miss: {miss['method']} {miss['url']}" + (f" ({miss['error']})" if miss.get("error") else ""))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Record page traffic to HAR, or serve a recording back")
+    parser.add_argument("har", help="HAR file, or a suite name under data/recordings")
+    parser.add_argument("--mode", choices=MODES, default="replay")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8899)
+    args = parser.parse_args(argv)
+
+    har = args.har if args.har.endswith(".har") else har_path(args.har)
+    proxy = ReplayProxy(har, args.mode, args.host, args.port).start()
+    print(f"{args.mode.capitalize()} proxy on {proxy.address} for {har}; point the browser at it and ignore "
+          f"certificate errors. Ctrl+C to stop.")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    print_report(proxy.stop())
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,211 @@
+import json
+import re
+
+
+ACTIONS = {"goto", "click", "input", "select", "waitForElementVisible", "waitForRedirect"}
+LOCATOR_TYPES = {"id", "name", "xpath", "css", "class", "link_text", "partial_link_text", "tag", "url"}
+URL_ACTIONS = {"goto", "waitForRedirect"}
+VALUE_ACTIONS = {"input", "select"}
+
+FENCE_PATTERN = re.compile(r'```(?:json|JSON)?[ \t]*\n?(.*?)(?:```|$)', re.DOTALL)
+TRAILING_COMMA_PATTERN = re.compile(r',(\s*[}\]])')
+
+
+def extract_json_text(text):
+    """The JSON payload of a model response, fenced or bare, possibly cut short."""
+    text = text.strip()
+    fenced = FENCE_PATTERN.search(text)
+    if fenced and fenced.group(1).strip():
+        text = fenced.group(1).strip()
+
+    starts = [i for i in (text.find("["), text.find("{")) if i != -1]
+    return text[min(starts):] if starts else text
+
+
+def strip_trailing_commas(text):
+    """Remove commas before a closing bracket, outside of strings."""
+    out = []
+    last = 0
+    for start, end in _unquoted_spans(text):
+        out.append(text[last:start])
+        out.append(TRAILING_COMMA_PATTERN.sub(r'\1', text[start:end]))
+        last = end
+    out.append(text[last:])
+    return "".join(out)
+
+
+def repair_truncated(text):
+    """Cut a truncated document back to its last complete value and close the open brackets.
+
+    Returns ``(text, truncated)``. Text that already balances is returned unchanged.
+    """
+    stack = []
+    in_string = False
+    escaped = False
+    safe_end = 0
+    safe_stack = []
+
+    for i, char in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+            continue
+
+        if char == '"':
+            in_string = True
+        elif char in "[{":
+            stack.append("]" if char == "[" else "}")
+        elif char in "]}":
+            if not stack:
+                return text[:i], True
+            stack.pop()
+            safe_end, safe_stack = i + 1, list(stack)
+            if not stack:
+                # A complete top-level document; anything after it is noise
+                return text[:i + 1], False
+        elif char == "," and stack:
+            # Commas only ever follow a complete value
+            safe_end, safe_stack = i, list(stack)
+
+    if not stack and not in_string:
+        return text, False
+    if not safe_stack and safe_end == 0:
+        return "", True
+    return text[:safe_end] + "".join(reversed(safe_stack)), True
+
+
+def validate_step(step):
+    errors = []
+    if not isinstance(step, dict):
+        return ["step is not an object"]
+    action = step.get("action")
+    if action not in ACTIONS:
+        errors.append(f"unknown action {action!r}")
+    locator = step.get("locator")
+    if not isinstance(locator, dict):
+        errors.append("missing locator")
+    else:
+        if locator.get("type") not in LOCATOR_TYPES:
+            errors.append(f"unknown locator type {locator.get('type')!r}")
+        if not isinstance(locator.get("value"), str) or not locator.get("value"):
+            errors.append("empty locator value")
+        if action in URL_ACTIONS and locator.get("type") not in ("url", None):
+            errors.append(f"{action} needs a url locator")
+    if action in VALUE_ACTIONS and not isinstance(step.get("input_value"), str):
+        errors.append(f"{action} without input_value")
+    return errors
+
+
+def validate_suite(suite):
+    """Schema errors as ``(test_index, step_index, message)``; step_index is None for test-level errors."""
+    errors = []
+    if not isinstance(suite, list):
+        return [(None, None, "suite is not a list of tests")]
+    for t, test in enumerate(suite):
+        if not isinstance(test, dict):
+            errors.append((t, None, "test is not an object"))
+            continue
+        if not isinstance(test.get("testName"), str) or not test.get("testName"):
+            errors.append((t, None, "missing testName"))
+        steps = test.get("steps")
+        if not isinstance(steps, list) or not steps:
+            errors.append((t, None, "no steps"))
+            continue
+        for s, step in enumerate(steps):
+            errors.extend((t, s, message) for message in validate_step(step))
+    return errors
+
+
+def parse_response(text):
+    """Extract, repair and validate a generated suite.
+
+    Returns a dict with the ``suite`` (list of tests), whether the output was
+    ``truncated`` and the schema ``errors``. When the output was truncated
+    the last step, which may have been cut mid-way, is dropped if invalid.
+    """
+    payload = strip_trailing_commas(extract_json_text(text))
+    repaired, truncated = repair_truncated(payload)
+    if not repaired:
+        raise ValueError("Response contains no JSON")
+    suite = json.loads(strip_trailing_commas(repaired))
+    if isinstance(suite, dict):
+        suite = [suite]
+
+    if truncated and suite and isinstance(suite[-1], dict):
+        steps = suite[-1].get("steps")
+        if isinstance(steps, list) and steps and validate_step(steps[-1]):
+            steps.pop()
+        if not steps:
+            suite.pop()
+
+    return {"suite": suite, "truncated": truncated, "errors": validate_suite(suite)}
+
+
+def continuation_note(suite):
+    """Prompt addition asking only for the part of the suite after what was already generated."""
+    done = ", ".join(f"'{test.get('testName')}' ({len(test.get('steps', []))} steps)" for test in suite)
+    if not suite:
+        return ""
+    last = suite[-1]
+    return (f"A previous answer was cut off after these tests: {done}. Do not repeat them. "
+            f"Output only the remaining JSON: start with the test '{last.get('testName')}' containing only its "
+            f"steps after step {len(last.get('steps', []))}, then any tests that follow it.")
+
+
+def merge_continuation(suite, tail):
+    """Append a continuation: steps of a repeated last test are added to it, new tests follow."""
+    merged = [dict(test, steps=list(test.get("steps", []))) for test in suite]
+    names = {test.get("testName") for test in merged}
+    for test in tail:
+        name = test.get("testName")
+        if merged and name == merged[-1].get("testName"):
+            merged[-1]["steps"].extend(test.get("steps", []))
+        elif name not in names:
+            merged.append(dict(test, steps=list(test.get("steps", []))))
+            names.add(name)
+    return merged
+
+
+def generate_suite(generate, note="", max_continuations=2):
+    """Run ``generate(note)`` and re-request only the missing tail while the output is truncated."""
+    parsed = parse_response(generate(note))
+    suite = parsed["suite"]
+    attempts = 0
+    while parsed["truncated"] and attempts < max_continuations:
+        attempts += 1
+        print(f"Response truncated after {len(suite)} tests, requesting the rest ({attempts}/{max_continuations})")
+        tail_note = " ".join(part for part in (note, continuation_note(suite)) if part)
+        parsed = parse_response(generate(tail_note))
+        suite = merge_continuation(suite, parsed["suite"])
+
+    errors = validate_suite(suite)
+    for test_index, step_index, message in errors:
+        where = f"test {test_index + 1}" if test_index is not None else "suite"
+        if step_index is not None:
+            where += f" step {step_index + 1}"
+        print(f"Generated suite invalid at {where}: {message}")
+    return suite, errors
+
+
+def _unquoted_spans(text):
+    start = 0
+    in_string = False
+    escaped = False
+    for i, char in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+                start = i + 1
+        elif char == '"':
+            yield start, i
+            in_string = True
+    if not in_string:
+        yield start, len(text)
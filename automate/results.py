@@ -0,0 +1,225 @@
+import argparse
+import json
+import os
+import statistics
+import threading
+import time
+import uuid
+import xml.etree.ElementTree as ET
+from datetime import datetime, timedelta, timezone
+
+from automate.storage import data_path
+
+
+RESULTS_PATH = data_path("results", "runs.jsonl")
+
+
+class ResultsStore:
+    """Append-only JSONL store with one record per suite run."""
+
+    def __init__(self, path=RESULTS_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def append(self, run):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        line = json.dumps(run, separators=(",", ":"))
+        with self._lock, open(self.path, 'a', encoding='utf-8') as f:
+            f.write(line + "\n")
+
+    def runs(self, suite=None, since=None):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    run = json.loads(line)
+                except json.JSONDecodeError:
+                    # A run interrupted mid-write leaves a partial last line
+                    continue
+                if suite and run.get("suite") != suite:
+                    continue
+                if since and _parse_time(run["started_at"]) < since:
+                    continue
+                yield run
+
+    def latest(self, suite=None):
+        latest = None
+        for run in self.runs(suite):
+            latest = run
+        return latest
+
+    def get(self, run_id):
+        for run in self.runs():
+            if run["run_id"] == run_id:
+                return run
+        return None
+
+
+class RunRecorder:
+
+    def __init__(self, suite, browser=None):
+        self.run = {
+            "run_id": f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}",
+            "suite": suite,
+            "browser": browser,
+            "started_at": _now(),
+            "tests": [],
+        }
+        self._lock = threading.Lock()
+
+    def add_test(self, test_name, result, duration, step_log=None, attempt=0, memory=None):
+        passed = result == "PASS"
+        entry = {
+            "name": test_name,
+            "outcome": "passed" if passed else "failed",
+            "duration": round(duration, 3),
+            "attempt": attempt,
+            "steps": step_log or [],
+        }
+        if memory:
+            entry["memory"] = memory
+        if not passed:
+            entry["error"] = result[len("FAIL: "):] if result.startswith("FAIL: ") else result
+        with self._lock:
+            self.run["tests"].append(entry)
+
+    def finish(self):
+        self.run["finished_at"] = _now()
+        return self.run
+
+
+def final_tests(run):
+    """Last attempt of every test in a run, in first-seen order."""
+    tests = {}
+    for test in run["tests"]:
+        tests[test["name"]] = test
+    return list(tests.values())
+
+
+def to_json(run):
+    return json.dumps(run, indent=2)
+
+
+def to_junit_xml(run):
+    tests = final_tests(run)
+    suite = ET.Element("testsuite", {
+        "name": run["suite"],
+        "tests": str(len(tests)),
+        "failures": str(sum(1 for test in tests if test["outcome"] == "failed")),
+        "time": f"{sum(test['duration'] for test in tests):.3f}",
+        "timestamp": run["started_at"],
+    })
+
+    for test in tests:
+        case = ET.SubElement(suite, "testcase", {
+            "classname": run["suite"],
+            "name": test["name"],
+            "time": f"{test['duration']:.3f}",
+        })
+        if test["outcome"] == "failed":
+            failure = ET.SubElement(case, "failure", {"message": test.get("error", "")})
+            failure.text = "\n".join(
+                f"step {step['index'] + 1} {step['action']} {step['locator']}: {step['outcome']}"
+                f"{' - ' + step['error'] if step.get('error') else ''}"
+                for step in test["steps"])
+        fallbacks = sum(len(step.get("fallbacks", [])) for step in test["steps"])
+        if fallbacks or test["attempt"]:
+            ET.SubElement(case, "system-out").text = f"fallbacks={fallbacks} attempt={test['attempt']}"
+
+    suites = ET.Element("testsuites")
+    suites.append(suite)
+    ET.indent(suites)
+    return ET.tostring(suites, encoding="unicode", xml_declaration=True)
+
+
+def step_trends(store, days=7, suite=None, min_ratio=1.2):
+    """Steps whose median duration in the last ``days`` grew against the period before."""
+    now = datetime.now(timezone.utc)
+    current_start = now - timedelta(days=days)
+    previous_start = current_start - timedelta(days=days)
+
+    current = {}
+    previous = {}
+    for run in store.runs(suite, since=previous_start):
+        bucket = current if _parse_time(run["started_at"]) >= current_start else previous
+        for test in run["tests"]:
+            for step in test["steps"]:
+                if step["outcome"] != "PASS":
+                    continue
+                key = (run["suite"], test["name"], step["index"], step["action"])
+                bucket.setdefault(key, []).append(step["duration"])
+
+    trends = []
+    for key, durations in current.items():
+        if key not in previous:
+            continue
+        before = statistics.median(previous[key])
+        after = statistics.median(durations)
+        if before > 0 and after / before >= min_ratio:
+            trends.append({
+                "suite": key[0],
+                "test": key[1],
+                "step": key[2] + 1,
+                "action": key[3],
+                "before": round(before, 3),
+                "after": round(after, 3),
+                "ratio": round(after / before, 2),
+            })
+    return sorted(trends, key=lambda trend: trend["ratio"], reverse=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query and export recorded test runs")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser("export", help="Export a run as JUnit XML or JSON")
+    export_parser.add_argument("--run", default="latest", help="Run id, or 'latest'")
+    export_parser.add_argument("--suite", help="Suite name used with --run latest")
+    export_parser.add_argument("--format", choices=["junit", "json"], default="junit")
+    export_parser.add_argument("-o", "--output", help="Output file (stdout if omitted)")
+
+    slower_parser = subparsers.add_parser("slower", help="List steps that got slower")
+    slower_parser.add_argument("--days", type=int, default=7)
+    slower_parser.add_argument("--suite")
+    slower_parser.add_argument("--min-ratio", type=float, default=1.2)
+
+    args = parser.parse_args(argv)
+    store = ResultsStore()
+
+    if args.command == "export":
+        run = store.latest(args.suite) if args.run == "latest" else store.get(args.run)
+        if not run:
+            print("No matching run found")
+            return 1
+        output = to_junit_xml(run) if args.format == "junit" else to_json(run)
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                f.write(output)
+            print(f"Run {run['run_id']} exported to: {args.output}")
+        else:
+            print(output)
+
+    elif args.command == "slower":
+        trends = step_trends(store, args.days, args.suite, args.min_ratio)
+        if not trends:
+            print(f"No steps got slower in the last {args.days} days")
+        for trend in trends:
+            print(f"{trend['suite']} | {trend['test']} | step {trend['step']} {trend['action']}: "
+                  f"{trend['before']}s -> {trend['after']}s (x{trend['ratio']})")
+    return 0
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+def _parse_time(value):
+    return datetime.fromisoformat(value)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,58 @@
+PRECONDITION = "precondition"
+ASSERTIONS = "assertions"
+
+# Actions that only observe the page; everything else changes browser state
+# and is therefore a precondition for the steps that follow it.
+ASSERTION_ACTIONS = {"waitForElementVisible"}
+
+
+def assertion_indices(steps):
+    """Indices of the steps that can be verified independently of the steps around them.
+
+    A wait in the middle of a test usually guards the steps after it, so only
+    the trailing waits count unless a step says otherwise with ``"independent"``.
+    """
+    assertions = set()
+    trailing = True
+    for index in range(len(steps) - 1, -1, -1):
+        step = steps[index]
+        if "independent" in step:
+            independent = bool(step["independent"])
+        else:
+            independent = trailing and step.get("action") in ASSERTION_ACTIONS
+        if independent:
+            assertions.add(index)
+        else:
+            trailing = False
+    return assertions
+
+
+def plan_steps(steps):
+    """Group test steps into execution units.
+
+    Every state-changing step is its own precondition group; consecutive
+    independent assertions are batched so they can be verified together.
+    """
+    plan = []
+    assertions = assertion_indices(steps)
+    for index in range(len(steps)):
+        if index in assertions:
+            if plan and plan[-1]["kind"] == ASSERTIONS:
+                plan[-1]["indices"].append(index)
+            else:
+                plan.append({"kind": ASSERTIONS, "indices": [index]})
+        else:
+            plan.append({"kind": PRECONDITION, "indices": [index]})
+    return plan
+
+
+def dependent_steps(steps, failed_index):
+    """Indices of the steps that can no longer run once ``failed_index`` failed."""
+    if failed_index in assertion_indices(steps):
+        return []
+    return list(range(failed_index + 1, len(steps)))
+
+
+def get_test_budget(test, default=None):
+    budget = test.get("timeBudget", default)
+    return float(budget) if budget else None
@@ -0,0 +1,124 @@
+import argparse
+import heapq
+import json
+import os
+import statistics
+
+from automate.results import ResultsStore, final_tests
+
+
+# Used for tests without history when no recorded test has steps to learn from
+DEFAULT_SECONDS_PER_STEP = 2.0
+# Fixed cost of a test on top of its steps: context setup, first navigation
+TEST_OVERHEAD = 1.0
+
+
+def historical_durations(store=None, suite=None, runs=10):
+    """Median duration of each test's final attempt over its last ``runs`` recorded runs.
+
+    Keys are ``(suite, test name)``. Failed attempts are left out, since a
+    failure usually ends a test early or runs it into its budget.
+    """
+    store = store or ResultsStore()
+    samples = {}
+    for run in store.runs(suite):
+        for test in final_tests(run):
+            if test["outcome"] != "passed":
+                continue
+            durations = samples.setdefault((run["suite"], test["name"]), [])
+            durations.append(test["duration"])
+            if len(durations) > runs:
+                durations.pop(0)
+    return {key: statistics.median(durations) for key, durations in samples.items()}
+
+
+def seconds_per_step(durations, tests):
+    """Typical seconds per step, learned from tests that have both a history and a step count."""
+    rates = []
+    for (suite, name), duration in durations.items():
+        steps = len(tests.get((suite, name), {}).get("steps", []))
+        if steps:
+            rates.append(max(0.0, duration - TEST_OVERHEAD) / steps)
+    return statistics.median(rates) if rates else DEFAULT_SECONDS_PER_STEP
+
+
+class DurationModel:
+    """Expected duration of a test: its recorded median, or a step-count estimate for unknown tests."""
+
+    def __init__(self, suites, store=None):
+        self.tests = {(suite, test.get("testName", "Unnamed Test")): test
+                      for suite, tests in suites.items() for test in tests}
+        self.durations = historical_durations(store)
+        self.per_step = seconds_per_step(self.durations, self.tests)
+
+    def estimate(self, suite, test):
+        key = (suite, test.get("testName", "Unnamed Test"))
+        if key in self.durations:
+            return self.durations[key]
+        return TEST_OVERHEAD + len(test.get("steps", [])) * self.per_step
+
+    def is_known(self, suite, test):
+        return (suite, test.get("testName", "Unnamed Test")) in self.durations
+
+
+def longest_first(suite, tests, model):
+    """Tests ordered by expected duration, longest first; ties keep their order."""
+    return sorted(tests, key=lambda test: -model.estimate(suite, test))
+
+
+def plan_shards(items, shards, model):
+    """Split ``(suite, test)`` items into balanced shards (longest processing time first).
+
+    Each item goes to the currently lightest shard, taking the longest items
+    first, which keeps the slowest shard within 4/3 of the optimum. Every
+    shard lists its items longest first.
+    """
+    shards = max(1, shards)
+    plan = [{"items": [], "estimate": 0.0} for _ in range(shards)]
+    heap = [(0.0, index) for index in range(shards)]
+    ordered = sorted(items, key=lambda item: -model.estimate(*item))
+    for suite, test in ordered:
+        load, index = heapq.heappop(heap)
+        duration = model.estimate(suite, test)
+        plan[index]["items"].append((suite, test))
+        plan[index]["estimate"] += duration
+        heapq.heappush(heap, (load + duration, index))
+    return plan
+
+
+def main(argv=None):
+    from automate.distributed import suite_paths
+
+    parser = argparse.ArgumentParser(description="Plan duration-balanced shards from recorded test durations")
+    parser.add_argument("suites", nargs="*", help="Suite paths or names under data/autos (default: all)")
+    parser.add_argument("--shards", type=int, default=2)
+    parser.add_argument("--output-dir", help="Write each shard's tests as <dir>/shard-N/<suite>.json")
+    args = parser.parse_args(argv)
+
+    suites = {}
+    for path in suite_paths(args.suites):
+        with open(path, 'r') as f:
+            suites[os.path.splitext(os.path.basename(path))[0]] = json.load(f)
+    model = DurationModel(suites)
+    items = [(suite, test) for suite, tests in suites.items() for test in tests]
+    plan = plan_shards(items, args.shards, model)
+
+    total = sum(shard["estimate"] for shard in plan)
+    print(f"{len(items)} tests, ~{total:.1f}s in total, {model.per_step:.2f}s per step for unknown tests")
+    for number, shard in enumerate(plan, 1):
+        print(f"Shard {number}: ~{shard['estimate']:.1f}s")
+        for suite, test in shard["items"]:
+            source = "recorded" if model.is_known(suite, test) else "estimated"
+            print(f"  {model.estimate(suite, test):6.1f}s {source:9} {suite} | {test.get('testName', 'Unnamed Test')}")
+
+        if args.output_dir:
+            shard_dir = os.path.join(args.output_dir, f"shard-{number}")
+            os.makedirs(shard_dir, exist_ok=True)
+            for suite in dict.fromkeys(suite for suite, _ in shard["items"]):
+                with open(os.path.join(shard_dir, f"{suite}.json"), 'w', encoding='utf-8') as f:
+                    json.dump([test for name, test in shard["items"] if name == suite], f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,261 @@
+import argparse
+import hashlib
+import os
+from html.parser import HTMLParser
+
+from automate.htmlparse import VOID_TAGS
+from automate.prompts import estimate_file_tokens
+from automate.storage import data_path, write_atomic
+
+
+SNAPDIFF_DIR = data_path("cache", "snapdiff")
+
+# Subtrees smaller than this cost more as a reference than they save
+MIN_SHARED_CHARS = 120
+# Least recently used files go once the cache passes either limit
+MAX_CACHE_FILES = 200
+MAX_CACHE_BYTES = 100 * 1024 * 1024
+# Kept in place so every page still reads as a document in its own right
+STRUCTURAL_TAGS = {"html", "head", "body"}
+
+SHARED_NOTE = ("The first attached HTML file is not a page: it holds fragments that appear on several of the "
+               "pages. In a page, <shared-ref data-shared-id=\"ID\"></shared-ref> stands for the "
+               "<section data-shared-id=\"ID\"> fragment of that file, exactly as if its content were written "
+               "there. Locate elements in the pages as if every reference were expanded; never use shared-ref or "
+               "section[@data-shared-id] in a locator.")
+
+
+class _Element:
+
+    __slots__ = ("name", "attrs", "start", "end", "children", "digest")
+
+    def __init__(self, name, attrs, start, end=None):
+        self.name = name
+        self.attrs = attrs
+        self.start = start
+        self.end = end
+        # Child elements and whitespace-normalised text, in document order
+        self.children = []
+        self.digest = None
+
+
+class _OffsetParser(HTMLParser):
+    """Element tree with the source offsets of every element, so pages are cut without re-serialising.
+
+    Re-serialising (as bs4 does) changes attribute quoting and entity escaping,
+    and locators have to match the page's markup exactly.
+    """
+
+    def __init__(self, text):
+        super().__init__()
+        self.text = text
+        self.root = _Element(None, [], 0, len(text))
+        self.stack = [self.root]
+        self._line_starts = [0]
+        index = text.find("\n")
+        while index != -1:
+            self._line_starts.append(index + 1)
+            index = text.find("\n", index + 1)
+
+    def source_offset(self):
+        line, column = self.getpos()
+        return self._line_starts[line - 1] + column
+
+    def handle_starttag(self, tag, attrs):
+        start = self.source_offset()
+        element = _Element(tag, attrs, start)
+        self.stack[-1].children.append(element)
+        if tag in VOID_TAGS:
+            element.end = start + len(self.get_starttag_text())
+        else:
+            self.stack.append(element)
+
+    def handle_startendtag(self, tag, attrs):
+        start = self.source_offset()
+        self.stack[-1].children.append(_Element(tag, attrs, start, start + len(self.get_starttag_text())))
+
+    def handle_endtag(self, tag):
+        if not any(element.name == tag for element in self.stack[1:]):
+            return
+        start = self.source_offset()
+        end = self.text.find(">", start) + 1 or len(self.text)
+        # Elements left open inside this one (e.g. <li>, <p>) end where it ends
+        while True:
+            element = self.stack.pop()
+            element.end = end if element.name == tag else start
+            if element.name == tag:
+                return
+
+    def handle_data(self, data):
+        text = " ".join(data.split())
+        if text:
+            self.stack[-1].children.append(text)
+
+    def close(self):
+        super().close()
+        while len(self.stack) > 1:
+            self.stack.pop().end = len(self.text)
+        return self.root
+
+
+def _parse(text):
+    parser = _OffsetParser(text)
+    parser.feed(text)
+    return parser.close()
+
+
+def _fingerprint(root):
+    """Content digest of every element under ``root``, computed bottom-up without recursion.
+
+    Returns ``{digest: size}`` where size is the element's length in the source.
+    """
+    sizes = {}
+    stack = [(root, False)]
+    while stack:
+        element, visited = stack.pop()
+        if not visited:
+            stack.append((element, True))
+            stack.extend((child, False) for child in element.children if isinstance(child, _Element))
+            continue
+        digest = hashlib.sha1((element.name or "").encode("utf-8"))
+        for name, value in sorted(element.attrs, key=lambda attr: attr[0]):
+            digest.update(f"\0{name}={value}".encode("utf-8"))
+        for child in element.children:
+            digest.update(child.digest if isinstance(child, _Element) else
+                          hashlib.sha1(("#" + child).encode("utf-8")).digest())
+        element.digest = digest.digest()
+        if element.name:
+            sizes[element.digest] = element.end - element.start
+    return sizes
+
+
+def _shared_ranges(root, shared):
+    """Outermost shared elements in document order, as (start, end, digest)."""
+    ranges = []
+    stack = [root]
+    while stack:
+        element = stack.pop()
+        if element.name and element.name not in STRUCTURAL_TAGS and element.digest in shared:
+            ranges.append((element.start, element.end, element.digest))
+            continue
+        stack.extend(reversed([child for child in element.children if isinstance(child, _Element)]))
+    return ranges
+
+
+def dedupe_snapshots(paths, output_dir=SNAPDIFF_DIR, min_chars=MIN_SHARED_CHARS, max_files=MAX_CACHE_FILES,
+                     max_bytes=MAX_CACHE_BYTES):
+    """Split subtrees shared by several snapshots into one shared file.
+
+    Returns ``{"shared": path or None, "pages": [...], "fragments": n,
+    "original_chars": n, "deduped_chars": n}``. Pages keep their input order;
+    when nothing is shared the original paths are returned unchanged. Shared
+    fragments are cut out of the original markup, byte for byte.
+    """
+    texts = []
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            texts.append(f.read())
+    original_chars = sum(len(text) for text in texts)
+
+    result = {"shared": None, "pages": list(paths), "fragments": 0, "original_chars": original_chars,
+              "deduped_chars": original_chars}
+    if len(texts) < 2:
+        return result
+
+    roots = [_parse(text) for text in texts]
+    seen = {}
+    for root in roots:
+        for digest, size in _fingerprint(root).items():
+            if size >= min_chars:
+                seen[digest] = seen.get(digest, 0) + 1
+    shared = {digest for digest, pages in seen.items() if pages > 1}
+    if not shared:
+        return result
+
+    # Fragments are numbered by first appearance, walking the pages in order
+    fragments = {}
+    page_htmls = []
+    for text, root in zip(texts, roots):
+        pieces = []
+        position = 0
+        for start, end, digest in _shared_ranges(root, shared):
+            if digest not in fragments:
+                fragments[digest] = (f"S{len(fragments) + 1}", text[start:end])
+            pieces.append(text[position:start])
+            pieces.append(f'<shared-ref data-shared-id="{fragments[digest][0]}"></shared-ref>')
+            position = end
+        pieces.append(text[position:])
+        page_htmls.append("".join(pieces))
+
+    shared_html = "".join(f'<section data-shared-id="{fragment_id}">{markup}</section>\n'
+                          for fragment_id, markup in fragments.values())
+    deduped_chars = len(shared_html) + sum(len(html) for html in page_htmls)
+    if deduped_chars >= original_chars:
+        return result
+
+    os.makedirs(output_dir, exist_ok=True)
+    pages = [_write(output_dir, html, os.path.basename(path)) for html, path in zip(page_htmls, paths)]
+    result.update(shared=_write(output_dir, shared_html, "shared.html"), pages=pages, fragments=len(fragments),
+                  deduped_chars=deduped_chars)
+    prune_cache(output_dir, max_files, max_bytes, keep=[result["shared"]] + pages)
+    return result
+
+
+def prune_cache(output_dir=SNAPDIFF_DIR, max_files=MAX_CACHE_FILES, max_bytes=MAX_CACHE_BYTES, keep=()):
+    """Remove the least recently used files until the cache is within both limits."""
+    if not os.path.isdir(output_dir):
+        return
+    files = [os.path.join(output_dir, name) for name in os.listdir(output_dir)
+             if os.path.isfile(os.path.join(output_dir, name))]
+    files.sort(key=os.path.getmtime)
+    sizes = {path: os.path.getsize(path) for path in files}
+    total = sum(sizes.values())
+
+    remaining = len(files)
+    for path in files:
+        if remaining <= max_files and total <= max_bytes:
+            break
+        if path in keep:
+            continue
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        remaining -= 1
+        total -= sizes[path]
+
+
+def _write(output_dir, text, name):
+    # Named by content so identical inputs reuse the same file (and the same upload)
+    digest = hashlib.sha256(text.encode("utf-8")).hexdigest()[:12]
+    stem, ext = os.path.splitext(name)
+    path = os.path.join(output_dir, f"{stem}_{digest}{ext or '.html'}")
+    if os.path.exists(path):
+        # Mark as recently used so pruning keeps it
+        os.utime(path)
+    else:
+        write_atomic(path, text)
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Deduplicate subtrees shared across page snapshots")
+    parser.add_argument("paths", nargs="+")
+    parser.add_argument("--output-dir", default=SNAPDIFF_DIR)
+    parser.add_argument("--min-chars", type=int, default=MIN_SHARED_CHARS)
+    parser.add_argument("--max-files", type=int, default=MAX_CACHE_FILES)
+    args = parser.parse_args(argv)
+
+    result = dedupe_snapshots(args.paths, args.output_dir, args.min_chars, args.max_files)
+    before = sum(estimate_file_tokens(path) for path in args.paths)
+    after = sum(estimate_file_tokens(path) for path in [result["shared"]] + result["pages"] if path)
+    print(f"{result['fragments']} shared fragments, {result['original_chars']} -> {result['deduped_chars']} chars "
+          f"(~{before} -> ~{after} tokens)")
+    for path in [result["shared"]] + result["pages"]:
+        if path:
+            print(f"  {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
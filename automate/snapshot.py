@@ -4,44 +4,44 @@ from urllib.parse import urlparse
 import hashlib
 from pathlib import Path
 
-import os
-import requests
-from urllib.parse import urlparse
-import hashlib
-from pathlib import Path
-from bs4 import BeautifulSoup
+from automate.htmlparse import fetch_body
 
+SNAPS_DIR = "../data/snaps/"
 
-def fetch_and_save_html(url, output_dir="../data/snaps/"):
-    try:
-        Path(output_dir).mkdir(parents=True, exist_ok=True)
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) '
+                  'Chrome/91.0.4472.124 Safari/537.36'
+}
+
+
+def snapshot_filename(url):
+    parsed_url = urlparse(url)
+    domain = parsed_url.netloc
+    path = parsed_url.path.strip('/')
 
-        parsed_url = urlparse(url)
-        domain = parsed_url.netloc
-        path = parsed_url.path.strip('/')
+    url_hash = hashlib.md5(url.encode()).hexdigest()[:8]
 
-        url_hash = hashlib.md5(url.encode()).hexdigest()[:8]
+    if path:
+        return f"{domain}_{path.replace('/', '_')}_{url_hash}.html"
+    return f"{domain}_{url_hash}.html"
 
-        if path:
-            filename = f"{domain}_{path.replace('/', '_')}_{url_hash}.html"
-        else:
-            filename = f"{domain}_{url_hash}.html"
 
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) '
-                          'Chrome/91.0.4472.124 Safari/537.36'
-        }
-        response = requests.get(url, headers=headers, timeout=30)
-        response.raise_for_status()
+def fetch_static_html(url, parser="bs4", distilled=False):
+    return fetch_body(url, parser, distilled, headers=HEADERS, timeout=30)
 
-        soup = BeautifulSoup(response.text, 'html.parser')
-        body_tag = soup.body
 
-        body_content = str(body_tag) if body_tag else response.text
+def save_snapshot(url, body_content, output_dir=SNAPS_DIR):
+    Path(output_dir).mkdir(parents=True, exist_ok=True)
+    file_path = os.path.join(output_dir, snapshot_filename(url))
+    with open(file_path, 'w', encoding='utf-8') as f:
+        f.write(body_content)
+    return file_path
 
-        file_path = os.path.join(output_dir, filename)
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.write(body_content)
+
+def fetch_and_save_html(url, output_dir=SNAPS_DIR, parser="bs4", distilled=False):
+    try:
+        body_content = fetch_static_html(url, parser, distilled)
+        file_path = save_snapshot(url, body_content, output_dir)
 
         print(f"Successfully saved HTML body from {url} to {file_path}")
         return file_path
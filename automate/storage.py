@@ -0,0 +1,42 @@
+import json
+import os
+import tempfile
+
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(ROOT_DIR, "data")
+
+
+def data_path(*parts):
+    """Path under the repository's data/ directory."""
+    return os.path.join(DATA_DIR, *parts)
+
+
+def write_atomic(path, content):
+    """Replace ``path`` with ``content`` (str or bytes) so no reader ever sees a partial file.
+
+    Each call writes to its own temporary file in the same directory, so
+    concurrent writers do not collide, and syncs it before the rename, so a
+    crash leaves either the old or the new content.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+    try:
+        if isinstance(content, bytes):
+            f = os.fdopen(fd, 'wb')
+        else:
+            f = os.fdopen(fd, 'w', encoding='utf-8')
+        with f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def write_json_atomic(path, data, indent=2):
+    write_atomic(path, json.dumps(data, indent=indent))
@@ -0,0 +1,173 @@
+import argparse
+import json
+import os
+import threading
+
+from automate.storage import data_path, write_atomic, write_json_atomic
+
+
+TELEMETRY_DIR = data_path("telemetry")
+
+DURATION_BUCKETS = (0.5, 1, 2.5, 5, 10, 20, 40, 80)
+
+
+class FallbackTelemetry:
+    """Counters and duration histograms for fallback healing, per suite and locator.
+
+    Stats accumulate across runs in ``fallback.json``; every save also writes
+    ``fallback.prom`` in the Prometheus text exposition format.
+    """
+
+    def __init__(self, suite, directory=TELEMETRY_DIR):
+        self.suite = suite
+        self.directory = directory
+        self.locators = {}
+        self._lock = threading.Lock()
+
+    def observe_step(self, action, locator_value):
+        with self._lock:
+            self._entry(self.suite, action, locator_value)["steps"] += 1
+
+    def observe_fallback(self, action, locator_value, tried, family, duration, found):
+        with self._lock:
+            entry = self._entry(self.suite, action, locator_value)
+            entry["fallbacks"] += 1
+            entry["healed"] += 1 if found else 0
+            entry["strategies_tried"] += tried
+            entry["seconds_sum"] += duration
+            for i, bound in enumerate(DURATION_BUCKETS):
+                if duration <= bound:
+                    entry["seconds_buckets"][i] += 1
+            if family:
+                entry["families"][family] = entry["families"].get(family, 0) + 1
+
+    def save(self):
+        path = os.path.join(self.directory, "fallback.json")
+        merged = load_stats(path)
+        with self._lock:
+            for key, entry in self.locators.items():
+                merged[key] = merge_entries(merged.get(key), entry)
+            self.locators = {}
+
+        os.makedirs(self.directory, exist_ok=True)
+        write_json_atomic(path, merged)
+        write_atomic(os.path.join(self.directory, "fallback.prom"), to_prometheus(merged))
+
+    def _entry(self, suite, action, locator_value):
+        key = stats_key(suite, action, locator_value)
+        if key not in self.locators:
+            self.locators[key] = new_entry(suite, action, locator_value)
+        return self.locators[key]
+
+
+def new_entry(suite, action, locator_value):
+    return {
+        "suite": suite,
+        "action": action,
+        "locator": locator_value,
+        "steps": 0,
+        "fallbacks": 0,
+        "healed": 0,
+        "strategies_tried": 0,
+        "seconds_sum": 0.0,
+        "seconds_buckets": [0] * len(DURATION_BUCKETS),
+        "families": {},
+    }
+
+
+def merge_entries(base, entry):
+    if not base:
+        return entry
+    merged = dict(base)
+    for field in ("steps", "fallbacks", "healed", "strategies_tried", "seconds_sum"):
+        merged[field] = base[field] + entry[field]
+    merged["seconds_buckets"] = [a + b for a, b in zip(base["seconds_buckets"], entry["seconds_buckets"])]
+    merged["families"] = dict(base["families"])
+    for family, count in entry["families"].items():
+        merged["families"][family] = merged["families"].get(family, 0) + count
+    return merged
+
+
+def stats_key(suite, action, locator_value):
+    return f"{suite}|{action}|{locator_value}"
+
+
+def load_stats(path=os.path.join(TELEMETRY_DIR, "fallback.json")):
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"Error loading fallback telemetry from {path}: {e}")
+        return {}
+
+
+def worst_locators(stats, limit=10):
+    """Locators ranked by total time spent in fallback healing."""
+    entries = [entry for entry in stats.values() if entry["fallbacks"]]
+    return sorted(entries, key=lambda entry: entry["seconds_sum"], reverse=True)[:limit]
+
+
+def to_prometheus(stats):
+    metrics = {
+        "shaster_steps_total": ("counter", "Steps executed per locator"),
+        "shaster_fallback_invocations_total": ("counter", "Fallback invocations after the primary locator failed"),
+        "shaster_fallback_healed_total": ("counter", "Fallback invocations that found an element"),
+        "shaster_fallback_strategies_tried_total": ("counter", "Candidate locators probed by the fallback"),
+        "shaster_fallback_wins_total": ("counter", "Winning strategy family of healed fallbacks"),
+        "shaster_fallback_seconds": ("histogram", "Time spent in the fallback per invocation"),
+    }
+    lines = {name: [f"# HELP {name} {help_text}", f"# TYPE {name} {metric_type}"]
+             for name, (metric_type, help_text) in metrics.items()}
+
+    for entry in stats.values():
+        labels = _labels(suite=entry["suite"], action=entry["action"], locator=entry["locator"])
+        lines["shaster_steps_total"].append(f"shaster_steps_total{{{labels}}} {entry['steps']}")
+        lines["shaster_fallback_invocations_total"].append(
+            f"shaster_fallback_invocations_total{{{labels}}} {entry['fallbacks']}")
+        lines["shaster_fallback_healed_total"].append(f"shaster_fallback_healed_total{{{labels}}} {entry['healed']}")
+        lines["shaster_fallback_strategies_tried_total"].append(
+            f"shaster_fallback_strategies_tried_total{{{labels}}} {entry['strategies_tried']}")
+        for family, count in sorted(entry["families"].items()):
+            lines["shaster_fallback_wins_total"].append(
+                f"shaster_fallback_wins_total{{{labels},{_labels(family=family)}}} {count}")
+
+        histogram = lines["shaster_fallback_seconds"]
+        for bound, count in zip(DURATION_BUCKETS, entry["seconds_buckets"]):
+            histogram.append(f"shaster_fallback_seconds_bucket{{{labels},le=\"{bound}\"}} {count}")
+        histogram.append(f"shaster_fallback_seconds_bucket{{{labels},le=\"+Inf\"}} {entry['fallbacks']}")
+        histogram.append(f"shaster_fallback_seconds_sum{{{labels}}} {entry['seconds_sum']:.3f}")
+        histogram.append(f"shaster_fallback_seconds_count{{{labels}}} {entry['fallbacks']}")
+
+    return "\n".join(line for name in metrics for line in lines[name]) + "\n"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Show the locators that cost the most fallback time")
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--suite")
+    args = parser.parse_args(argv)
+
+    stats = load_stats()
+    if args.suite:
+        stats = {key: entry for key, entry in stats.items() if entry["suite"] == args.suite}
+
+    for entry in worst_locators(stats, args.limit):
+        families = ", ".join(f"{family}={count}" for family, count in sorted(entry["families"].items()))
+        print(f"{entry['seconds_sum']:.1f}s  {entry['fallbacks']}/{entry['steps']} fallbacks  "
+              f"{entry['healed']} healed  {entry['suite']} | {entry['action']} {entry['locator']}"
+              f"{'  [' + families + ']' if families else ''}")
+    return 0
+
+
+def _labels(**labels):
+    return ",".join(f'{name}="{_escape(str(value))}"' for name, value in labels.items())
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,164 @@
+import re
+from functools import lru_cache
+
+
+# Suites repeat the same locators across tests and retries, so a few thousand
+# entries cover even large runs while keeping memory bounded.
+CACHE_SIZE = 4096
+
+# Brackets and quotes never belong to a URL in the case files; parentheses can,
+# so unbalanced closing ones are trimmed afterwards.
+URL_PATTERN = re.compile(r'https?://[^\s"\'<>\[\]`]+')
+URL_TRAILING = '.,;:!?*_'
+
+UPPER_PATTERN = re.compile(r'([A-Z])')
+SNAKE_PATTERN = re.compile(r'_([a-z])')
+KEBAB_PATTERN = re.compile(r'-([a-z])')
+CAMEL_PART_PATTERN = re.compile(r'[A-Z][a-z]*')
+LEADING_LOWER_PATTERN = re.compile(r'^[a-z]+')
+
+TAG_NAME_PATTERN = re.compile(r'\/([a-zA-Z0-9_-]+)(?:\[|\/?$|$)')
+ATTR_EQUALS_PATTERN = re.compile(r'\[@([^=]+)=[\'\"]([^\'\"]+)[\'\"]\]')
+ATTR_CONTAINS_PATTERN = re.compile(r'contains\(@([^,]+),\s*[\'\"]([^\'\"]+)[\'\"]\)')
+ATTR_STARTS_WITH_PATTERN = re.compile(r'starts-with\(@([^,]+),\s*[\'\"]([^\'\"]+)[\'\"]\)')
+ATTR_ENDS_WITH_PATTERN = re.compile(r'ends-with\(@([^,]+),\s*[\'\"]([^\'\"]+)[\'\"]\)')
+SIMPLE_ATTR_PATTERN = re.compile(r'\[([a-zA-Z0-9_-]+)=[\'\"]([^\'\"]+)[\'\"]\]')
+LEADING_TAG_PATTERN = re.compile(r'//([a-zA-Z0-9_-]+)')
+SPAN_TEXT_PATTERN = re.compile(r'//([a-zA-Z0-9_-]+)/span\[contains\(text\(\),\s*[\'\"]([^\'\"]+)[\'\"]\)\]')
+DIRECT_TEXT_PATTERN = re.compile(r'//([a-zA-Z0-9_-]+)\[contains\(text\(\),\s*[\'\"]([^\'\"]+)[\'\"]\)\]')
+
+NON_ATTRIBUTES = ('contains', 'starts-with', 'ends-with', 'text()')
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def case_variations(text):
+    """Spellings of an identifier or label worth trying: case changes plus snake/camel conversions."""
+    if not text or not isinstance(text, str):
+        return ()
+
+    variations = [text, text.lower(), text.upper(), text.capitalize()]
+
+    if any(c.isupper() for c in text) and not text.isupper():
+        snake_case = UPPER_PATTERN.sub(lambda x: '_' + x.group(1).lower(), text)
+        if snake_case.startswith('_'):
+            snake_case = snake_case[1:]
+        variations.append(snake_case)
+    elif '_' in text:
+        variations.append(SNAKE_PATTERN.sub(lambda x: x.group(1).upper(), text))
+
+    if '-' in text:
+        variations.append(KEBAB_PATTERN.sub(lambda x: x.group(1).upper(), text))
+        variations.append(text.replace('-', '_'))
+
+    return tuple(dict.fromkeys(variations))
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def split_identifier(identifier):
+    """Split an identifier into parts on underscores, dashes and camelCase humps."""
+    if not identifier or not isinstance(identifier, str):
+        return ()
+
+    parts = []
+    if '_' in identifier:
+        parts.extend(identifier.split('_'))
+    if '-' in identifier:
+        parts.extend(identifier.split('-'))
+    if any(c.isupper() for c in identifier) and not identifier.isupper():
+        parts.extend(LEADING_LOWER_PATTERN.findall(identifier))
+        parts.extend(CAMEL_PART_PATTERN.findall(identifier))
+
+    return tuple(part for part in dict.fromkeys(parts) if part)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def extract_words(value):
+    """Words of a multi-word attribute value, longer than one character."""
+    words = []
+
+    if ' ' in value:
+        words.extend(w for w in value.split() if len(w) > 1)
+    if '_' in value:
+        words.extend(w for w in value.split('_') if len(w) > 1)
+    if '-' in value:
+        words.extend(w for w in value.split('-') if len(w) > 1)
+
+    if any(c.isupper() for c in value) and not value.isupper():
+        first_part = LEADING_LOWER_PATTERN.findall(value)
+        if first_part and len(first_part[0]) > 1:
+            words.append(first_part[0])
+        words.extend(w.lower() for w in CAMEL_PART_PATTERN.findall(value) if len(w) > 1)
+
+    return tuple(dict.fromkeys(words))
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def extract_tag_name(xpath):
+    matches = TAG_NAME_PATTERN.findall(xpath)
+    return matches[-1] if matches else None
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _xpath_attribute_items(xpath):
+    attributes = {}
+    for pattern in (ATTR_EQUALS_PATTERN, ATTR_CONTAINS_PATTERN, ATTR_STARTS_WITH_PATTERN, ATTR_ENDS_WITH_PATTERN):
+        for attr_name, attr_value in pattern.findall(xpath):
+            attributes[attr_name] = attr_value
+    for attr_name, attr_value in SIMPLE_ATTR_PATTERN.findall(xpath):
+        if attr_name not in NON_ATTRIBUTES:
+            attributes[attr_name] = attr_value
+    return tuple(attributes.items())
+
+
+def xpath_attributes(xpath):
+    """Attribute name to value pairs referenced by an XPath's predicates."""
+    # A fresh dict per call so callers cannot mutate the cached result
+    return dict(_xpath_attribute_items(xpath))
+
+
+def xpath_attribute_value(xpath, attribute):
+    if f"@{attribute}=" in xpath:
+        return xpath.split(f"@{attribute}=")[1].split("]")[0].strip("'\"")
+    return xpath_attributes(xpath).get(attribute)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def extract_text_value(xpath):
+    """Text a locator matches on through text()= or contains(text(), ...)."""
+    if "text()=" in xpath:
+        return xpath.split("text()=")[1].strip("'\"[]")
+    elif "contains(text()," in xpath:
+        start_index = xpath.find("contains(text(),") + len("contains(text(),")
+        end_index = xpath.find(")", start_index)
+        if 0 < start_index < end_index:
+            return xpath[start_index:end_index].strip().strip("'\"")
+    return None
+
+
+def extract_urls(content):
+    """URLs in markdown text, including ``[https://...]`` and ``[label](https://...)`` forms."""
+    return [_trim_url(url) for url in URL_PATTERN.findall(content)]
+
+
+def _trim_url(url):
+    # Sentence punctuation, markdown emphasis and the closing paren of a link are not part of the URL
+    while url:
+        if url[-1] in URL_TRAILING:
+            url = url[:-1]
+        elif url[-1] == ')' and url.count(')') > url.count('('):
+            url = url[:-1]
+        else:
+            break
+    return url
+
+
+def cache_info():
+    return {function.__name__: function.cache_info()
+            for function in (case_variations, split_identifier, extract_words, extract_tag_name,
+                             _xpath_attribute_items, extract_text_value)}
+
+
+def clear_caches():
+    for function in (case_variations, split_identifier, extract_words, extract_tag_name,
+                     _xpath_attribute_items, extract_text_value):
+        function.cache_clear()
@@ -0,0 +1,109 @@
+import json
+import os
+import threading
+from urllib.parse import urlparse
+
+from automate.storage import data_path, write_json_atomic
+
+
+DEFAULT_TIMINGS_PATH = data_path("timings.json")
+
+
+class TimeoutController:
+    """Learns wait budgets per (origin, action) from observed latencies.
+
+    Samples are persisted to a JSON file so the budgets carry over between runs.
+    Waits that time out are recorded at the budget they ran out of, so once
+    enough of them do the budget widens by ``margin``.
+    Until an origin/action pair has enough samples the caller's default is used.
+    Saving merges the samples taken since loading into the file, so several
+    processes sharing it (e.g. distributed workers) do not drop each other's.
+    """
+
+    def __init__(self, path=DEFAULT_TIMINGS_PATH, percentile=0.95, margin=2.0, floor=0.25, cap=30.0,
+                 min_samples=5, max_samples=200):
+        self.path = path
+        self.percentile = percentile
+        self.margin = margin
+        self.floor = floor
+        self.cap = cap
+        self.min_samples = min_samples
+        self.max_samples = max_samples
+        self.samples = {}
+        # Samples taken since the file was last read or written
+        self._new = {}
+        self._lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        self.samples = self._read()
+
+    def save(self):
+        if not self.path:
+            return
+        with self._lock:
+            samples = self._read()
+            for key, values in self._new.items():
+                merged = samples.setdefault(key, [])
+                merged.extend(values)
+                del merged[:max(0, len(merged) - self.max_samples)]
+            write_json_atomic(self.path, {"samples": samples})
+            self.samples = samples
+            self._new = {}
+
+    def _read(self):
+        if not self.path or not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return {key: list(values) for key, values in data.get("samples", {}).items()}
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Error loading timings from {self.path}: {e}")
+            return {}
+
+    def record(self, url, action, seconds):
+        key = self._key(url, action)
+        with self._lock:
+            sample = round(seconds, 3)
+            self._new.setdefault(key, []).append(sample)
+            values = self.samples.setdefault(key, [])
+            values.append(sample)
+            if len(values) > self.max_samples:
+                del values[:len(values) - self.max_samples]
+
+    def record_timeout(self, url, action, budget):
+        """Count a wait that ran out of ``budget`` as taking exactly that long.
+
+        The real latency was at least the budget, so this is a censored sample;
+        without it a budget learned on fast runs could only ever shrink and would
+        never recover once the page gets slower.
+        """
+        if budget < self.budget(url, action, budget):
+            # Cut short by the test's time budget, says nothing about the page
+            return
+        self.record(url, action, budget)
+
+    def budget(self, url, action, default):
+        key = self._key(url, action)
+        with self._lock:
+            values = list(self.samples.get(key, []))
+
+        if len(values) < self.min_samples:
+            return default
+
+        values.sort()
+        index = min(len(values) - 1, int(round(self.percentile * (len(values) - 1))))
+        return min(self.cap, max(self.floor, values[index] * self.margin))
+
+    def _key(self, url, action):
+        return f"{get_origin(url)}|{action}"
+
+
+def get_origin(url):
+    if not url:
+        return ""
+    if not url.startswith(('http://', 'https://')) and "://" not in url:
+        url = 'https://' + url
+    parsed_url = urlparse(url)
+    return parsed_url.netloc or parsed_url.scheme
@@ -0,0 +1,191 @@
+import os
+from urllib.parse import urlsplit
+
+
+# Recycle once the driver and browser processes together, or the page's JS heap, pass these
+MAX_RSS_MB = 1500
+MAX_HEAP_MB = 512
+
+HEAP_SCRIPT = "return window.performance && performance.memory ? performance.memory.usedJSHeapSize : null;"
+STORAGE_SCRIPT = """
+var dump = function(storage) {
+    var items = {};
+    for (var i = 0; i < storage.length; i++) { var key = storage.key(i); items[key] = storage.getItem(key); }
+    return items;
+};
+try { return JSON.stringify({local: dump(window.localStorage), session: dump(window.sessionStorage)}); }
+catch (e) { return null; }
+"""
+RESTORE_STORAGE_SCRIPT = """
+var state = JSON.parse(arguments[0]);
+try {
+    Object.keys(state.local).forEach(function(key) { window.localStorage.setItem(key, state.local[key]); });
+    Object.keys(state.session).forEach(function(key) { window.sessionStorage.setItem(key, state.session[key]); });
+} catch (e) {}
+"""
+
+
+def driver_rss(driver):
+    """Resident memory in bytes of the driver service and the browser it started, or None if unknown."""
+    process = getattr(getattr(driver, "service", None), "process", None)
+    if process is None:
+        return None
+    return process_tree_rss(process.pid)
+
+
+def process_tree_rss(pid):
+    """Resident memory in bytes of a process and all its descendants, or None off Linux."""
+    if not os.path.isdir("/proc"):
+        return None
+
+    children = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", 'r') as f:
+                # The command name may contain spaces, so split after its closing parenthesis
+                fields = f.read().rsplit(")", 1)[1].split()
+            children.setdefault(int(fields[1]), []).append(int(entry))
+        except (OSError, IndexError, ValueError):
+            continue
+
+    page_size = os.sysconf("SC_PAGE_SIZE")
+    total = 0
+    stack = [pid]
+    while stack:
+        current = stack.pop()
+        try:
+            with open(f"/proc/{current}/statm", 'r') as f:
+                total += int(f.read().split()[1]) * page_size
+        except (OSError, IndexError, ValueError):
+            continue
+        stack.extend(children.get(current, []))
+    return total
+
+
+def js_heap(driver):
+    """Used JS heap of the current page in bytes; only Chromium-based browsers expose it."""
+    try:
+        return driver.execute_script(HEAP_SCRIPT)
+    except Exception:
+        return None
+
+
+def save_session_state(driver):
+    """URL, cookies and web storage of the current page, enough to carry a login over to a new session."""
+    state = {"url": None, "cookies": [], "storage": None}
+    try:
+        state["url"] = driver.current_url
+        state["cookies"] = driver.get_cookies()
+        state["storage"] = driver.execute_script(STORAGE_SCRIPT)
+    except Exception as e:
+        print(f"Could not save session state: {e}")
+    return state
+
+
+def restore_session_state(driver, state):
+    url = state.get("url")
+    if not url or not url.startswith("http"):
+        return
+    scheme, host = urlsplit(url)[:2]
+    # Cookies and storage can only be set on the origin that is loaded
+    driver.get(f"{scheme}://{host}/")
+    restored = 0
+    for cookie in state.get("cookies", []):
+        if cookie.get("sameSite") not in (None, "Strict", "Lax", "None"):
+            cookie = {key: value for key, value in cookie.items() if key != "sameSite"}
+        try:
+            driver.add_cookie(cookie)
+            restored += 1
+        except Exception:
+            pass
+    if state.get("storage"):
+        driver.execute_script(RESTORE_STORAGE_SCRIPT, state["storage"])
+    driver.get(url)
+    skipped = len(state.get("cookies", [])) - restored
+    print(f"Restored session at {url} ({restored} cookies" + (f", {skipped} from other domains skipped)"
+                                                               if skipped else ")"))
+
+
+class MemoryWatchdog:
+    """Samples browser memory between tests and recycles the session when it grows too large.
+
+    ``samples`` holds one entry per test with the process tree RSS and JS heap
+    after it ran, the growth over the previous test, and whether the session
+    was recycled afterwards.
+    """
+
+    def __init__(self, max_rss_mb=MAX_RSS_MB, max_heap_mb=MAX_HEAP_MB):
+        self.max_rss = max_rss_mb * 1024 * 1024 if max_rss_mb else None
+        self.max_heap = max_heap_mb * 1024 * 1024 if max_heap_mb else None
+        self.samples = []
+        self.recycles = 0
+
+    def sample(self, driver, test_name):
+        rss = driver_rss(driver)
+        heap = js_heap(driver)
+        previous = self.samples[-1] if self.samples and not self.samples[-1]["recycled"] else None
+        sample = {
+            "test": test_name,
+            "rss_mb": _mb(rss),
+            "heap_mb": _mb(heap),
+            "rss_delta_mb": _delta(rss, previous, "rss_mb"),
+            "heap_delta_mb": _delta(heap, previous, "heap_mb"),
+            "recycled": False,
+        }
+        self.samples.append(sample)
+        return sample
+
+    def over_limit(self, sample):
+        reasons = []
+        if self.max_rss and sample["rss_mb"] is not None and sample["rss_mb"] * 1024 * 1024 > self.max_rss:
+            reasons.append(f"RSS {sample['rss_mb']} MB")
+        if self.max_heap and sample["heap_mb"] is not None and sample["heap_mb"] * 1024 * 1024 > self.max_heap:
+            reasons.append(f"JS heap {sample['heap_mb']} MB")
+        return reasons
+
+    def recycle(self, driver, new_driver, reasons):
+        """Quit ``driver`` and return a session from ``new_driver()`` carrying over its state."""
+        print(f"Recycling browser session ({', '.join(reasons)})")
+        state = save_session_state(driver)
+        try:
+            driver.quit()
+        except Exception:
+            pass
+        driver = new_driver()
+        try:
+            restore_session_state(driver, state)
+        except Exception as e:
+            print(f"Could not restore session state: {e}")
+        self.recycles += 1
+        if self.samples:
+            self.samples[-1]["recycled"] = True
+        return driver
+
+    def report(self):
+        if not self.samples:
+            return
+        print("\nMemory per test (RSS of driver + browser, JS heap of the page):")
+        for sample in self.samples:
+            print(f"  {sample['test']}: RSS {_format(sample['rss_mb'], sample['rss_delta_mb'])}, "
+                  f"heap {_format(sample['heap_mb'], sample['heap_delta_mb'])}"
+                  + (" -> recycled" if sample["recycled"] else ""))
+        if self.recycles:
+            print(f"Session recycled {self.recycles} time(s)")
+
+
+def _mb(value):
+    return round(value / (1024 * 1024), 1) if value is not None else None
+
+
+def _delta(value, previous, key):
+    if value is None or not previous or previous[key] is None:
+        return None
+    return round(_mb(value) - previous[key], 1)
+
+
+def _format(value, delta):
+    if value is None:
+        return "n/a"
+    return f"{value} MB" + (f" ({delta:+} MB)" if delta is not None else "")
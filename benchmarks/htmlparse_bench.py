@@ -0,0 +1,116 @@
+"""Time and peak RSS of each snapshot HTML parser on a large generated page.
+
+Run from the repository root:
+
+    python -m benchmarks.htmlparse_bench --megabytes 8
+
+Each parser runs in a fresh subprocess so peak RSS is not shared between them.
+"""
+import argparse
+import functools
+import http.server
+import importlib.util
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from automate.htmlparse import PARSERS, fetch_body
+
+
+BLOCK = """
+<div class="row" data-row="{i}">
+  <h3>Section {i}</h3>
+  <p>Lorem ipsum dolor sit amet, <b>consectetur</b> adipiscing elit &amp; sed do eiusmod tempor.</p>
+  <label for="field-{i}">Field {i}</label><input id="field-{i}" name="field{i}" type="text">
+  <button class="btn primary" data-testid="save-{i}"><span>Save {i}</span></button>
+  <a href="/item/{i}">Open item {i}</a>
+  <svg viewBox="0 0 10 10"><path d="M0 0L10 10"/></svg>
+  <script>window.rows = (window.rows || 0) + {i};</script>
+</div>
+"""
+
+
+def build_page(path, megabytes):
+    target = megabytes * 1024 * 1024
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("<!DOCTYPE html><html><head><title>Large page</title>"
+                "<style>.row { padding: 4px; }</style></head><body>")
+        i = 0
+        while f.tell() < target:
+            f.write(BLOCK.format(i=i))
+            i += 1
+        f.write("</body></html>")
+
+
+def measure(url, parser, distilled):
+    start = time.perf_counter()
+    body = fetch_body(url, parser, distilled)
+    seconds = time.perf_counter() - start
+    # ru_maxrss is in KiB on Linux
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {"seconds": seconds, "peak_rss_mb": peak / 1024, "output_kb": len(body or "") / 1024}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--megabytes", type=int, default=8)
+    parser.add_argument("--parsers", nargs="+", default=list(PARSERS))
+    parser.add_argument("--child", nargs=3, metavar=("URL", "PARSER", "DISTILLED"), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        url, name, distilled = args.child
+        print(json.dumps(measure(url, name, distilled == "1")))
+        return 0
+
+    with tempfile.TemporaryDirectory() as directory:
+        build_page(os.path.join(directory, "large.html"), args.megabytes)
+        handler = functools.partial(_QuietHandler, directory=directory)
+        server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{server.server_address[1]}/large.html"
+
+        baseline = _run_child(url, "stream", "0", only_import=True)
+        print(f"{args.megabytes} MB page; interpreter baseline {baseline['peak_rss_mb']:.0f} MB RSS")
+        for name in args.parsers:
+            if name != "stream" and importlib.util.find_spec(name) is None:
+                print(f"{name:7} skipped, not installed")
+                continue
+            for distilled in ("0", "1"):
+                try:
+                    result = _run_child(url, name, distilled)
+                except RuntimeError as e:
+                    print(f"{name:7}{' distilled' if distilled == '1' else '':10} unavailable: {e}")
+                    continue
+                print(f"{name:7}{' distilled' if distilled == '1' else '':10} {result['seconds']:7.2f}s  "
+                      f"peak {result['peak_rss_mb']:7.0f} MB  output {result['output_kb']:9.0f} KB")
+        server.shutdown()
+    return 0
+
+
+def _run_child(url, name, distilled, only_import=False):
+    if only_import:
+        code = ("import json, resource, automate.htmlparse, requests, bs4; "
+                "print(json.dumps({'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}))")
+        command = [sys.executable, "-c", code]
+    else:
+        command = [sys.executable, "-m", "benchmarks.htmlparse_bench", "--child", url, name, distilled]
+    completed = subprocess.run(command, capture_output=True, text=True)
+    if completed.returncode != 0:
+        raise RuntimeError(completed.stderr.strip().splitlines()[-1])
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+class _QuietHandler(http.server.SimpleHTTPRequestHandler):
+
+    def log_message(self, format, *args):
+        pass
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,107 @@
+"""Per-step cost of building fallback candidates before the shared text helpers, and with cold and warm caches.
+
+Run from the repository root of a git checkout:
+
+    python -m benchmarks.textutils_bench --repeat 200
+
+The baseline is the FallbackHandler as it was before automate/textutils.py was
+added, loaded from git history. The shared helpers only pay off on repeated
+locators: with cold caches the memoisation is pure overhead and building is
+slower than the baseline (about x0.7); with warm caches it is faster (about x1.2).
+"""
+import argparse
+import contextlib
+import glob
+import json
+import os
+import subprocess
+import time
+import types
+
+from automate.fallback_handler import FallbackHandler
+from automate.storage import ROOT_DIR, data_path
+from automate.textutils import cache_info, clear_caches
+
+
+SUITES_GLOB = data_path("autos", "*.json")
+
+
+def load_steps(pattern=SUITES_GLOB):
+    steps = []
+    for path in sorted(glob.glob(pattern)):
+        with open(path, 'r', encoding='utf-8') as f:
+            for test in json.load(f):
+                for step in test.get("steps", []):
+                    if step.get("action") in ("click", "input", "select", "waitForElementVisible"):
+                        steps.append(step)
+    return steps
+
+
+def build_all(handler, steps, cold):
+    start = time.perf_counter()
+    for step in steps:
+        if cold:
+            clear_caches()
+        locator = step.get("locator", {})
+        handler.build_strategies(step["action"], locator.get("type"), locator.get("value"),
+                                 step.get("input_value"))
+    return time.perf_counter() - start
+
+
+def baseline_revision():
+    """The commit before automate/textutils.py was added."""
+    added = subprocess.run(["git", "log", "--diff-filter=A", "--format=%H", "--", "automate/textutils.py"],
+                           cwd=ROOT_DIR, capture_output=True, text=True, check=True).stdout.split()
+    if not added:
+        raise RuntimeError("automate/textutils.py is not in the git history")
+    return resolve_revision(f"{added[-1]}^")
+
+
+def resolve_revision(revision):
+    return subprocess.run(["git", "rev-parse", "--verify", f"{revision}^{{commit}}"], cwd=ROOT_DIR,
+                          capture_output=True, text=True, check=True).stdout.strip()
+
+
+def load_baseline(revision):
+    """FallbackHandler class from ``revision``, loaded as a module of its own next to the current one."""
+    source = subprocess.run(["git", "show", f"{revision}:automate/fallback_handler.py"], cwd=ROOT_DIR,
+                            capture_output=True, text=True, check=True).stdout
+    module = types.ModuleType("baseline_fallback_handler")
+    exec(compile(source, f"{revision}:automate/fallback_handler.py", "exec"), module.__dict__)
+    return module.FallbackHandler
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=200, help="How many times the suites are replayed")
+    parser.add_argument("--suites", default=SUITES_GLOB, help="Glob of suite JSON files")
+    parser.add_argument("--baseline", help="Git revision to compare against (default: before textutils.py)")
+    args = parser.parse_args(argv)
+
+    steps = load_steps(args.suites) * args.repeat
+    if not steps:
+        print(f"No fallback-capable steps found in {args.suites}")
+        return 1
+
+    revision = resolve_revision(args.baseline) if args.baseline else baseline_revision()
+    baseline_handler = load_baseline(revision)(None)
+    handler = FallbackHandler(None)
+    # The handler logs every candidate family it builds; keep that out of the timings
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        baseline = build_all(baseline_handler, steps, cold=False)
+        cold = build_all(handler, steps, cold=True)
+        clear_caches()
+        warm = build_all(handler, steps, cold=False)
+
+    print(f"{len(steps)} steps")
+    print(f"baseline ({revision[:12]}): {baseline / len(steps) * 1e6:8.1f} us/step")
+    print(f"cold caches:   {cold / len(steps) * 1e6:8.1f} us/step  (x{baseline / cold:.1f} vs baseline)")
+    print(f"warm caches:   {warm / len(steps) * 1e6:8.1f} us/step  (x{baseline / warm:.1f} vs baseline)")
+    print("Below x1.0 the caches cost more than they save; they only pay off on repeated locators.")
+    for name, info in cache_info().items():
+        print(f"  {name}: {info.hits} hits, {info.misses} misses, {info.currsize} cached")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,26 @@
+import gzip
+import os
+
+from automate.artifacts import ArtifactCollector
+
+
+def test_retries_keep_the_first_failure(tmp_path):
+    artifacts = ArtifactCollector("suite", root=str(tmp_path))
+    artifacts.add("Login", dom="<p>first</p>")
+    artifacts.add("Login", dom="<p>retry</p>")
+    artifacts.close()
+
+    assert sorted(artifacts.index) == ["Login (attempt 1)", "Login (attempt 2)"]
+    first = os.path.join(artifacts.run_dir, artifacts.index["Login (attempt 1)"]["dom"])
+    with gzip.open(first, 'rt', encoding='utf-8') as f:
+        assert f.read() == "<p>first</p>"
+
+
+def test_writer_survives_unexpected_errors(tmp_path):
+    artifacts = ArtifactCollector("suite", root=str(tmp_path))
+    # Not JSON serialisable, so writing the console log raises TypeError
+    artifacts.add("Broken", console={object()})
+    artifacts.add("Login", dom="<p>page</p>")
+    artifacts.close()
+
+    assert "Login (attempt 1)" in artifacts.index
@@ -0,0 +1,59 @@
+import asyncio
+import json
+
+from automate import async_backend
+
+
+class FakeService:
+
+    url = "http://127.0.0.1:1"
+
+    async def start(self):
+        return self
+
+    async def stop(self):
+        pass
+
+
+class FakeDriver:
+
+    async def quit(self):
+        pass
+
+
+def test_a_session_that_fails_to_start_fails_only_its_test(tmp_path, monkeypatch):
+    started = []
+
+    async def start(server_url, browser, headless):
+        started.append(browser)
+        if len(started) == 2:
+            raise async_backend.WebDriverException("session not created")
+        return FakeDriver()
+
+    monkeypatch.setattr(async_backend, "AsyncDriverService", lambda browser: FakeService())
+    monkeypatch.setattr(async_backend.AsyncWebDriver, "start", start)
+    path = tmp_path / "suite.json"
+    path.write_text(json.dumps([{"testName": f"Test {i}", "steps": []} for i in range(3)]))
+
+    results = asyncio.run(async_backend.run_tests_async(str(path), concurrency=1, adaptive_timeouts=False))
+    assert results["Test 0"] == results["Test 2"] == "PASS"
+    assert results["Test 1"].startswith("FAIL") and "session not created" in results["Test 1"]
+
+
+class EmptyPage:
+
+    async def find_elements(self, by_type, value):
+        return []
+
+
+def test_waits_that_time_out_widen_the_budget():
+    timeouts = async_backend.TimeoutController(path=None)
+    url = "https://example.com/login"
+    for _ in range(20):
+        timeouts.record(url, "click", 0.05)
+    budget = timeouts.budget(url, "click", 10)
+
+    element = asyncio.run(async_backend._wait_for_element(EmptyPage(), "id", "missing", budget, timeouts, "click",
+                                                          url))
+    assert element is None
+    assert timeouts.samples["example.com|click"][-1] == budget
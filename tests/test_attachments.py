@@ -0,0 +1,84 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+import requests
+
+from automate.attachments import AttachmentUploader, LocalFileServer, upload_namespace
+
+
+class ResumableClient:
+    """Uploads with the resumable protocol the files API (and LocalFileServer) speaks."""
+
+    def __init__(self, base_url):
+        self.base_url = base_url
+        self.files = self
+
+    def upload(self, file, config):
+        start = requests.post(f"{self.base_url}/upload/v1beta/files", json={"file": {
+            "displayName": config["display_name"]}}, headers={
+            "X-Goog-Upload-Protocol": "resumable", "X-Goog-Upload-Command": "start",
+            "X-Goog-Upload-Header-Content-Type": config["mime_type"]})
+        with open(file, 'rb') as f:
+            final = requests.post(start.headers["X-Goog-Upload-URL"], data=f.read(), headers={
+                "X-Goog-Upload-Command": "upload, finalize", "X-Goog-Upload-Offset": "0"})
+        resource = final.json()["file"]
+        return SimpleNamespace(name=resource["name"], uri=resource["uri"], mime_type=resource["mimeType"],
+                               expiration_time=None)
+
+
+@pytest.fixture
+def server():
+    with LocalFileServer() as server:
+        yield server
+
+
+@pytest.fixture
+def snapshot(tmp_path):
+    path = tmp_path / "page.html"
+    path.write_text("<html><body><button id='go'>Go</button></body></html>")
+    return str(path)
+
+
+def test_second_part_reuses_the_upload(server, snapshot, tmp_path):
+    cache = str(tmp_path / "uploads.json")
+    uploader = AttachmentUploader(ResumableClient(server.url), cache, upload_namespace("key", server.url))
+
+    first = uploader.part(snapshot)
+    assert uploader.part(snapshot) == first
+    # A later run reads the reference back from the cache file
+    later = AttachmentUploader(ResumableClient(server.url), cache, upload_namespace("key", server.url))
+    assert later.part(snapshot) == first
+    assert server.uploads == 1
+    assert first["file_data"]["file_uri"].startswith(server.url)
+    assert not uploader._hash_locks
+
+
+def test_other_accounts_upload_again_and_share_the_cache_file(server, snapshot, tmp_path):
+    cache = str(tmp_path / "uploads.json")
+    first = AttachmentUploader(ResumableClient(server.url), cache, upload_namespace("key-a", server.url))
+    second = AttachmentUploader(ResumableClient(server.url), cache, upload_namespace("key-b", server.url))
+
+    first.part(snapshot)
+    second.part(snapshot)
+    assert server.uploads == 2
+    with open(cache, 'r', encoding='utf-8') as f:
+        assert len(json.load(f)) == 2
+
+
+def test_forgotten_references_are_uploaded_again(server, snapshot, tmp_path):
+    uploader = AttachmentUploader(ResumableClient(server.url), str(tmp_path / "uploads.json"))
+
+    part = uploader.part(snapshot)
+    assert uploader.forget({part["file_data"]["file_uri"]}) == 1
+    assert uploader.part(snapshot) != part
+    assert server.uploads == 2
+
+
+def test_sdk_client_against_the_local_server(server, snapshot, tmp_path):
+    genai = pytest.importorskip("google.genai")
+    client = genai.Client(api_key="test", http_options={"base_url": server.url})
+    uploader = AttachmentUploader(client, str(tmp_path / "uploads.json"), upload_namespace("test", server.url))
+
+    assert uploader.part(snapshot) == uploader.part(snapshot)
+    assert server.uploads == 1
@@ -0,0 +1,70 @@
+import pytest
+
+from automate.backends import BackendRouter, ModelBackend, StubBackend, default_router
+from automate.responses import parse_response
+
+
+class Flaky(ModelBackend):
+
+    def __init__(self, name, tier="fast", fail=False):
+        self.name = name
+        self.tier = tier
+        self.fail = fail
+        self.calls = 0
+
+    def generate(self, request):
+        self.calls += 1
+        if self.fail:
+            raise RuntimeError("503 unavailable")
+        return self.name
+
+
+REQUEST = {"prompt": "Generate", "markdown": "## Case 1\n1. Open https://example.com", "pages": []}
+
+
+def test_small_requests_go_to_fast_backends():
+    router = BackendRouter([Flaky("strong", "strong"), Flaky("fast", "fast")])
+    assert router.classify(REQUEST) == "fast"
+    assert router.generate(REQUEST) == "fast"
+    assert router.classify(dict(REQUEST, markdown="\n".join(["- step"] * 100))) == "strong"
+
+
+def test_failing_backend_fails_over_and_cools_down():
+    broken, spare = Flaky("broken", fail=True), Flaky("spare")
+    router = BackendRouter([broken, spare], min_calls=3, cooldown=60.0)
+    # New backends are tried first so they get measured; then the faster one leads
+    router.stats["spare"].latency = 1.0
+
+    for _ in range(3):
+        assert router.generate(REQUEST) == "spare"
+    assert broken.calls == 3
+    assert router.order("fast") == [spare, broken]
+    assert router.generate(REQUEST) == "spare"
+    assert broken.calls == 3
+    assert router.report()["broken"]["failure_rate"] == 1.0
+
+
+def test_every_backend_failing_raises():
+    router = BackendRouter([Flaky("a", fail=True), Flaky("b", fail=True)])
+    with pytest.raises(RuntimeError, match="All model backends failed: a: 503 unavailable; b: 503 unavailable"):
+        router.generate(REQUEST)
+
+
+def test_stub_backend_turns_cases_into_a_valid_suite():
+    markdown = ("## Login\n"
+                "### Steps:\n"
+                "- Go to https://example.com/login\n"
+                "- Enter \"ada@outlook.com\" into the Email field\n"
+                "- Click \"Sign in\" button\n")
+    parsed = parse_response(StubBackend().generate({"markdown": markdown}))
+    assert parsed["errors"] == []
+    assert [step["action"] for step in parsed["suite"][0]["steps"]] == ["goto", "input", "click"]
+
+
+def test_no_key_and_no_stub_is_an_error(monkeypatch):
+    for name in ("SHASTER_BACKEND", "GEMINI_API_KEY", "GOOGLE_API_KEY"):
+        monkeypatch.delenv(name, raising=False)
+    with pytest.raises(RuntimeError, match="GEMINI_API_KEY"):
+        default_router()
+    monkeypatch.setenv("SHASTER_BACKEND", "stub")
+    assert [backend.name for backend in default_router().backends] == ["stub"]
@@ -0,0 +1,93 @@
+import functools
+import json
+
+import pytest
+
+from automate import artifacts, automate
+from automate.checkpoint import CheckpointJournal
+
+
+class Interrupted(Exception):
+    """Stands in for the process being killed mid-run."""
+
+
+TESTS = [{"testName": name, "steps": []} for name in ("Prepare: Login", "Case 1", "Case 2", "Case 3")]
+
+
+class FakeDriver:
+
+    current_url = "https://example.com/account"
+
+    def get(self, url):
+        self.current_url = url
+
+    def get_cookies(self):
+        return [{"name": "sid", "value": "1"}]
+
+    def add_cookie(self, cookie):
+        pass
+
+    def execute_script(self, *args):
+        return None
+
+    def quit(self):
+        pass
+
+
+def test_journal_returns_finished_tests(tmp_path):
+    journal = CheckpointJournal("suite", TESTS, root=str(tmp_path))
+    journal.begin()
+    journal.record("Prepare: Login", "PASS", 1.0, session={"url": "https://example.com/"})
+    journal.record("Case 1", "FAIL: boom", 2.0)
+    journal.close()
+    # A line cut short by the crash is ignored
+    with open(journal.path, 'a', encoding='utf-8') as f:
+        f.write('{"type": "test", "name": "Ca')
+
+    resumed = CheckpointJournal("suite", TESTS, root=str(tmp_path))
+    finished = resumed.begin(resume=True)
+    resumed.close()
+    assert {name: entry["result"] for name, entry in finished.items()} == {"Prepare: Login": "PASS",
+                                                                            "Case 1": "FAIL: boom"}
+    assert resumed.session == {"url": "https://example.com/"}
+
+
+def test_journal_ignores_a_changed_suite(tmp_path):
+    journal = CheckpointJournal("suite", TESTS, root=str(tmp_path))
+    journal.begin()
+    journal.record("Prepare: Login", "PASS", 1.0)
+    journal.close()
+
+    changed = CheckpointJournal("suite", TESTS[:2], root=str(tmp_path))
+    assert changed.begin(resume=True) == {}
+    changed.close()
+
+
+def test_resume_skips_finished_tests(tmp_path, monkeypatch):
+    suite = tmp_path / "suite.json"
+    suite.write_text(json.dumps(TESTS))
+    monkeypatch.setattr(automate, "CheckpointJournal", functools.partial(CheckpointJournal, root=str(tmp_path)))
+    monkeypatch.setattr(automate, "setup_webdriver", lambda *args, **kwargs: FakeDriver())
+    monkeypatch.setattr(artifacts, "ARTIFACTS_DIR", str(tmp_path / "artifacts"))
+    ran = []
+    interrupt = ["Case 2"]
+
+    def run_single_test(driver, test, *args):
+        ran.append(test["testName"])
+        if test["testName"] in interrupt:
+            interrupt.clear()
+            raise Interrupted()
+        return "PASS"
+
+    monkeypatch.setattr(automate, "run_single_test", run_single_test)
+    options = dict(adaptive_timeouts=False, track_flakiness=False, record_results=False, collect_telemetry=False)
+    with pytest.raises(Interrupted):
+        automate.run_tests_from_file(str(suite), **options)
+    assert ran == ["Prepare: Login", "Case 1", "Case 2"]
+
+    ran.clear()
+    results = automate.run_tests_from_file(str(suite), resume=True, **options)
+    assert ran == ["Case 2", "Case 3"]
+    assert results == {test["testName"]: "PASS" for test in TESTS}
+    # A completed suite leaves no checkpoint behind
+    assert not (tmp_path / "suite.jsonl").exists()
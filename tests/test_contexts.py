@@ -0,0 +1,35 @@
+import json
+
+from automate import contexts
+
+
+class FakePool:
+
+    def __init__(self, *args):
+        self.opened = 0
+
+    def start(self):
+        return self
+
+    def stop(self):
+        pass
+
+    def open_context(self):
+        self.opened += 1
+        if self.opened == 2:
+            raise RuntimeError("browser is gone")
+        return object()
+
+    def close_context(self, driver):
+        pass
+
+
+def test_a_context_that_fails_to_open_fails_only_its_test(tmp_path, monkeypatch):
+    monkeypatch.setattr(contexts, "BrowserContextPool", FakePool)
+    monkeypatch.setattr(contexts, "run_single_test", lambda *args: "PASS")
+    path = tmp_path / "suite.json"
+    path.write_text(json.dumps([{"testName": f"Test {i}", "steps": []} for i in range(3)]))
+
+    results = contexts.run_tests_multiplexed(str(path), max_contexts=1, adaptive_timeouts=False,
+                                             track_flakiness=False, record_results=False, collect_telemetry=False)
+    assert sorted(results.values()) == ["FAIL: could not open a browser context: browser is gone", "PASS", "PASS"]
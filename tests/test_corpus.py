@@ -0,0 +1,66 @@
+import os
+
+from automate import corpus
+from automate.corpus import Corpus, corpus_urls, parse_markdown
+
+
+SECTIONS = """## Login flow
+### Steps:
+- Go to https://example.com/login
+- Enter "ada@outlook.com" into the Email field
+- Click on the "Sign in" button
+"""
+
+LABELLED = """**Test Case ID:** SHOP-001
+**Title:** Buy a pair of shoes
+**Preconditions:**
+- Tester has an account:
+  - **Username:** ada@outlook.com
+  - **Password:** CorrectHorse42
+
+**Test Steps:**
+
+1. **Open the shop:**
+   - Navigate to [https://shop.example.com/].
+   - **Expected Result:** The home page loads.
+2. **Search:**
+   - Type "shoes" in the search field.
+"""
+
+
+def test_case_sections_with_bullet_steps():
+    model = parse_markdown(SECTIONS)
+    assert [case["name"] for case in model["cases"]] == ["Login flow"]
+    assert [step["text"] for step in model["cases"][0]["steps"]] == [
+        "Go to https://example.com/login", 'Enter "ada@outlook.com" into the Email field',
+        'Click on the "Sign in" button']
+    assert model["credentials"] == [{"field": "Email", "value": "ada@outlook.com"}]
+    assert model["urls"] == ["https://example.com/login"]
+
+
+def test_labelled_case_with_numbered_steps():
+    model = parse_markdown(LABELLED)
+    assert (model["case_id"], model["title"]) == ("SHOP-001", "Buy a pair of shoes")
+    assert model["credentials"] == [{"field": "Username", "value": "ada@outlook.com"},
+                                    {"field": "Password", "value": "CorrectHorse42"}]
+    steps = model["cases"][0]["steps"]
+    assert [(step["number"], step["text"]) for step in steps] == [(1, "Open the shop"), (2, "Search")]
+    assert steps[0]["expected"] == ["The home page loads."]
+    assert steps[1]["actions"] == ['Type "shoes" in the search field.']
+
+
+def test_unchanged_files_come_from_the_cache(tmp_path, monkeypatch):
+    cases = tmp_path / "cases"
+    cases.mkdir()
+    (cases / "login.md").write_text(SECTIONS)
+    (cases / "shop.md").write_text(LABELLED)
+    cache_path = str(tmp_path / "corpus.json")
+
+    models = Corpus(str(cases), cache_path).load()
+    assert corpus_urls(models) == ["https://example.com/login", "https://shop.example.com/"]
+
+    parsed = []
+    monkeypatch.setattr(corpus, "parse_case_file", lambda path: parsed.append(os.path.basename(path)) or {})
+    (cases / "shop.md").write_text(LABELLED + "3. Check out\n")
+    assert Corpus(str(cases), cache_path).load()["login.md"] == models["login.md"]
+    assert parsed == ["shop.md"]
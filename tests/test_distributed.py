@@ -0,0 +1,108 @@
+import json
+import os
+import subprocess
+import sys
+import threading
+
+import pytest
+
+from automate import artifacts
+from automate.distributed import Coordinator, Worker, work_units
+
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(autouse=True)
+def artifacts_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(artifacts, "ARTIFACTS_DIR", str(tmp_path / "artifacts"))
+
+
+def make_test(name, steps, independent=True):
+    return {"testName": name, "independent": independent,
+            "steps": [{"action": "waitForElementVisible", "locator": {"type": "id", "value": f"{name}-{j}"}}
+                      for j in range(steps)]}
+
+
+def write_suite(tmp_path, name, step_counts, tests=None):
+    tests = tests or [make_test(f"Test {i}", steps) for i, steps in enumerate(step_counts)]
+    path = tmp_path / f"{name}.json"
+    path.write_text(json.dumps(tests))
+    return str(path)
+
+
+def start_coordinator(paths, **kwargs):
+    return Coordinator(paths, "127.0.0.1", 0, track_flakiness=False, record_results=False, **kwargs).start()
+
+
+def wait_for(coordinator, timeout):
+    results = {}
+    waiter = threading.Thread(target=lambda: results.update(coordinator.wait()), daemon=True)
+    waiter.start()
+    waiter.join(timeout)
+    assert not waiter.is_alive(), "coordinator did not finish"
+    return results
+
+
+def spawn_worker(port, *extra):
+    return subprocess.Popen([sys.executable, "-m", "automate.distributed", "worker", "--port", str(port),
+                             "--dry-run", *extra], cwd=ROOT_DIR, stdout=subprocess.DEVNULL)
+
+
+def test_tests_longer_than_the_connect_timeout(tmp_path):
+    # Each test takes 6 s, longer than the 5 s timeout the worker connects with
+    coordinator = start_coordinator([write_suite(tmp_path, "slow", [2, 2])])
+    worker = Worker("127.0.0.1", coordinator.port, dry_run=True, step_delay=3.0, heartbeat_interval=1.0)
+    threading.Thread(target=worker.run, daemon=True).start()
+
+    results = wait_for(coordinator, 30)
+    assert results == {"slow": {"Test 0": "PASS", "Test 1": "PASS"}}
+    assert worker.received == 2
+
+
+def test_requeue_after_worker_crash(tmp_path):
+    coordinator = start_coordinator([write_suite(tmp_path, "suite", [3] * 6)])
+    crashing = spawn_worker(coordinator.port, "--crash-after", "1")
+    crashing.wait(timeout=30)
+    survivor = spawn_worker(coordinator.port)
+    try:
+        results = wait_for(coordinator, 30)
+    finally:
+        survivor.wait(timeout=10)
+
+    assert crashing.returncode == 1
+    assert results == {"suite": {f"Test {i}": "PASS" for i in range(6)}}
+
+
+def test_abort_fails_tests_nobody_can_run(tmp_path):
+    coordinator = start_coordinator([write_suite(tmp_path, "suite", [1, 1])])
+    crashing = spawn_worker(coordinator.port, "--crash-after", "1")
+    crashing.wait(timeout=30)
+    coordinator.abort("every worker process exited")
+
+    results = wait_for(coordinator, 10)
+    assert results["suite"]["Test 0"] == "PASS"
+    assert results["suite"]["Test 1"] == "FAIL: every worker process exited"
+
+
+def test_dependent_tests_stay_together():
+    tests = [make_test("Prepare: Login", 1, False), make_test("Search", 1), make_test("Checkout", 1, False)]
+    assert work_units(tests) == [[tests[0], tests[2]], [tests[1]]]
+
+
+def test_unit_is_rerun_after_a_crash_and_reported_once(tmp_path):
+    tests = [make_test("Prepare: Login", 1, False), make_test("Case 1", 1, False), make_test("Case 2", 1, False),
+             make_test("Long independent", 6)]
+    coordinator = start_coordinator([write_suite(tmp_path, "suite", None, tests)])
+    # The independent test is longer and goes out first; the worker dies on receiving the dependent unit
+    crashing = spawn_worker(coordinator.port, "--crash-after", "1")
+    crashing.wait(timeout=30)
+    survivor = Worker("127.0.0.1", coordinator.port, dry_run=True)
+    threading.Thread(target=survivor.run, daemon=True).start()
+
+    results = wait_for(coordinator, 30)
+    assert crashing.returncode == 1
+    assert results == {"suite": {test["testName"]: "PASS" for test in tests}}
+    # The three dependent tests arrive as one unit
+    assert survivor.received == 1
+
@@ -0,0 +1,45 @@
+import pytest
+from selenium.common.exceptions import NoSuchElementException
+
+from automate.fallback_handler import FallbackHandler
+
+
+@pytest.mark.parametrize("attribute", ["id", "name", "data-testid"])
+def test_input_attributes_produce_candidates(attribute):
+    handler = FallbackHandler(None)
+    strategies = handler._input_strategies({"type": "xpath", "value": f"//input[@{attribute}='login-email']"})
+
+    for candidate in (f"//input[@{attribute}='login-email']", f"//input[contains(@{attribute}, 'loginEmail')]",
+                      f"//input[contains(@{attribute}, 'email')]"):
+        assert ("xpath", candidate) in strategies
+        assert handler._families[("xpath", candidate)] == "attributes"
+
+
+class FakePage:
+
+    def __init__(self, match):
+        self.match = match
+        self.current_url = "https://example.com/form"
+
+    def find_element(self, by_type, value):
+        if (by_type, value) != self.match:
+            raise NoSuchElementException(value)
+        return object()
+
+    def execute_script(self, script, *args):
+        return None
+
+
+def test_cache_keeps_the_locator_that_matched():
+    locator = {"type": "id", "value": "country"}
+    candidates = FallbackHandler(None)._select_strategies(locator, None)
+    page = FakePage(candidates[2])
+    handler = FallbackHandler(page, timeout=0.01, fallback_delay=0, plan_candidates=False)
+
+    assert handler.execute_fallback_script("select", "id", "country") is not None
+    assert handler.strategy_cache == {"select_id_country": candidates[2]}
+    assert handler.fallback_log[-1]["winner"] == candidates[2][1]
+
+    handler.execute_fallback_script("select", "id", "country")
+    assert handler.fallback_log[-1]["family"] == "cache"
+    assert handler.fallback_log[-1]["tried"] == 1
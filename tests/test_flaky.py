@@ -0,0 +1,18 @@
+from automate.flaky import FlakyHistory
+
+
+def flaky_history(*test_names):
+    history = FlakyHistory(path=None, min_runs=4)
+    for test_name in test_names:
+        for passed in (True, False, True, False):
+            history.record("suite", test_name, passed)
+    return history
+
+
+def test_only_independent_quarantined_tests_move_to_the_end():
+    tests = [{"testName": "Prepare: Login"}, {"testName": "Case 1"}, {"testName": "Case 2", "independent": True},
+             {"testName": "Case 3"}]
+    history = flaky_history("Prepare: Login", "Case 2")
+
+    ordered = [test["testName"] for test in history.order_tests("suite", tests)]
+    assert ordered == ["Prepare: Login", "Case 1", "Case 3", "Case 2"]
@@ -0,0 +1,50 @@
+import json
+
+from automate.healing import collect_heals, heal_confidence, write_back_heals
+
+
+SUITE = [{"testName": "Login", "steps": [
+    {"action": "goto", "locator": {"type": "url", "value": "https://example.com"}},
+    {"action": "click", "locator": {"type": "xpath", "value": "//button[@id='signin']"}},
+    {"action": "input", "locator": {"type": "id", "value": "mail"}, "input_value": "ada@example.com"},
+]}]
+
+
+def fallback(before, winner, family, matches=1, by="xpath"):
+    return {"locator": before, "found": True, "winner": winner, "winner_by": by, "family": family, "matches": matches}
+
+
+def step_log():
+    return [
+        {"index": 0, "outcome": "PASS", "fallbacks": []},
+        {"index": 1, "outcome": "PASS", "fallbacks": [fallback("//button[@id='signin']", "//button[@id='sign-in']",
+                                                               "case_variations")]},
+        {"index": 2, "outcome": "PASS", "fallbacks": [fallback("mail", "//input[contains(@id, 'mail')]",
+                                                               "separate_words", matches=2)]},
+    ]
+
+
+def test_confidence_drops_with_ambiguous_matches():
+    assert heal_confidence("contains", 1) == 0.8
+    assert heal_confidence("contains", 3) == 0.56
+    assert heal_confidence("unknown", 10) == 0.2
+
+
+def test_only_confident_heals_are_written_back(tmp_path):
+    path = tmp_path / "suite.json"
+    path.write_text(json.dumps(SUITE))
+    heals = collect_heals("Login", step_log())
+    assert [heal["confidence"] for heal in heals] == [0.85, 0.35]
+
+    applied = write_back_heals(str(path), heals, min_confidence=0.6, log_dir=str(tmp_path / "log"))
+    assert [heal["step"] for heal in applied] == [1]
+    steps = json.loads(path.read_text())[0]["steps"]
+    assert steps[1]["locator"] == {"type": "xpath", "value": "//button[@id='sign-in']"}
+    assert steps[2]["locator"] == {"type": "id", "value": "mail"}
+    logged = [json.loads(line) for line in (tmp_path / "log" / "suite.jsonl").read_text().splitlines()]
+    assert [(entry["suite"], entry["step"]) for entry in logged] == [("suite", 1)]
+
+    # Lowering the threshold applies the rest; the step already healed no longer matches its "before"
+    applied = write_back_heals(str(path), heals, min_confidence=0.3, log_dir=str(tmp_path / "log"))
+    assert [heal["step"] for heal in applied] == [2]
+    assert write_back_heals(str(path), heals, min_confidence=0.9, log_dir=str(tmp_path / "log")) == []
@@ -0,0 +1,67 @@
+from html.parser import HTMLParser
+
+import pytest
+
+from automate.htmlparse import PARSERS, VOID_TAGS, extract_body
+
+
+PAGE = """<!DOCTYPE html>
+<html><head><title>Shop</title><script>var tracking = 1;</script></head>
+<body>
+  <nav><div class="logo">Shop &amp; more</div><div role="link" tabindex="0">Deals</div></nav>
+  <form id="search">
+    <label for="q">Search <script>label()</script>products</label>
+    <input id="q" name="q" placeholder="What are you looking for?">
+    <button type="submit"><svg viewBox="0 0 10 10"><path d="M0 0h10"/></svg>Go</button>
+  </form>
+  <div><p>Just text</p><a href="/cart">Cart</a></div>
+  <style>.hidden { display: none; }</style>
+</body></html>
+"""
+
+
+class _Shape(HTMLParser):
+    """Tags, attributes and text of a fragment, independent of how it was serialised."""
+
+    def __init__(self):
+        super().__init__()
+        self.items = []
+
+    def handle_starttag(self, tag, attrs):
+        self.items.append(("<", tag, tuple(sorted(attrs))))
+
+    def handle_endtag(self, tag):
+        # Some serialisers close void elements (<input/>), others do not
+        if tag not in VOID_TAGS:
+            self.items.append((">", tag))
+
+    def handle_data(self, data):
+        if data.strip():
+            self.items.append(("text", " ".join(data.split())))
+
+
+def shape(markup):
+    parser = _Shape()
+    parser.feed(markup)
+    parser.close()
+    return parser.items
+
+
+def available(parser):
+    if parser != "stream":
+        pytest.importorskip(parser)
+    return parser
+
+
+@pytest.mark.parametrize("parser", PARSERS)
+def test_parsers_distil_the_same_elements(parser):
+    expected = shape('<div role="link" tabindex="0">Deals</div>'
+                     '<form id="search"><label for="q">Search products</label>'
+                     '<input id="q" name="q" placeholder="What are you looking for?">'
+                     '<button type="submit">Go</button></form><a href="/cart">Cart</a>')
+    assert shape(extract_body([PAGE], available(parser), distilled=True)) == expected
+
+
+@pytest.mark.parametrize("parser", PARSERS)
+def test_parsers_keep_the_whole_body(parser):
+    assert shape(extract_body([PAGE], available(parser))) == shape(extract_body([PAGE.encode("utf-8")]))
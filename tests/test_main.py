@@ -0,0 +1,20 @@
+import json
+
+import main
+
+
+SUITE = [{"testName": "Login", "steps": [{"action": "goto", "locator": {"type": "url", "value": "https://example.com"}}]}]
+
+
+def test_only_runnable_suites_are_saved(tmp_path, monkeypatch):
+    monkeypatch.setattr(main, "AUTOS_DIR", str(tmp_path))
+    assert main.save_response_to_json(json.dumps(SUITE), "cases/login.md") == "login.json"
+
+    assert main.save_response_to_json("Error processing with Gemini: quota exceeded", "cases/login.md") is None
+    assert main.save_response_to_json(json.dumps([{"testName": "Login", "steps": []}]), "cases/login.md") is None
+    assert json.loads((tmp_path / "login.json").read_text()) == SUITE
+
+
+def test_suites_resolve_under_the_data_directory(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    assert main.resolve_suite("login.json") == main.data_path("autos", "login.json")
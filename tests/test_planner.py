@@ -0,0 +1,60 @@
+from selenium.webdriver.common.by import By
+
+from automate.planner import can_match, estimate_cost, plan_candidates
+
+
+SUMMARY = {
+    "tags": ["html", "body", "form", "input", "button"],
+    "attrs": {"id": ["email", "submit"], "class": ["btn primary"], "href": []},
+    "texts": ["Sign in"],
+    "long_attrs": [],
+    "long_texts": False,
+    "truncated": False,
+}
+
+
+def summary(**changes):
+    return dict(SUMMARY, **changes)
+
+
+def test_candidates_the_page_cannot_match_are_pruned():
+    assert can_match(By.XPATH, "//input[@id='email']", SUMMARY)
+    assert not can_match(By.XPATH, "//input[@id='username']", SUMMARY)
+    assert not can_match(By.XPATH, "//select[@id='email']", SUMMARY)
+    assert can_match(By.XPATH, "//button[contains(@class, 'primary')]", SUMMARY)
+    assert not can_match(By.XPATH, "//button[contains(text(), 'Log in')]", SUMMARY)
+    # Negations can match without the literal being on the page
+    assert can_match(By.XPATH, "//input[not(@id='username')]", SUMMARY)
+    assert can_match(By.ID, "username", SUMMARY)
+    assert can_match(By.XPATH, "//input[@id='username']", summary(truncated=True))
+
+
+def test_values_too_long_to_summarise_are_unknown():
+    long_classes = summary(attrs={"id": ["email"], "class": []}, long_attrs=["class"])
+    assert can_match(By.XPATH, "//button[contains(@class, 'primary')]", long_classes)
+    assert can_match(By.XPATH, "//button[contains(translate(@class, 'AB', 'ab'), 'primary')]", long_classes)
+    assert not can_match(By.XPATH, "//input[@id='username']", long_classes)
+
+    long_texts = summary(long_texts=True)
+    assert can_match(By.XPATH, "//button[contains(text(), 'Log in')]", long_texts)
+    assert can_match(By.XPATH, "//button[text()='Log in']", long_texts)
+
+
+def test_whole_document_scans_cost_more():
+    assert estimate_cost(By.ID, "email") == 1.0
+    assert estimate_cost(By.XPATH, "//input[@id='email']") == 1.0
+    assert estimate_cost(By.XPATH, "//*[contains(@id, 'email')]") == 3.5
+    assert estimate_cost(By.XPATH, "//*[contains(translate(@id, 'E', 'e'), 'email')]") == 4.5
+
+
+def test_plan_keeps_order_and_stops_at_the_budget():
+    strategies = [(By.XPATH, "//input[@id='email']"), (By.XPATH, "//input[ @id = 'email' ]"),
+                  (By.XPATH, "//input[@id='username']"), (By.XPATH, "//*[contains(@id, 'email')]"),
+                  (By.ID, "email"), (By.XPATH, "//form//input")]
+
+    assert plan_candidates(strategies, SUMMARY, primary="//input[@id = 'email']") == [
+        (By.XPATH, "//*[contains(@id, 'email')]"), (By.ID, "email"), (By.XPATH, "//form//input")]
+    assert plan_candidates(strategies, SUMMARY, max_cost=5) == [
+        (By.XPATH, "//input[@id='email']"), (By.XPATH, "//*[contains(@id, 'email')]")]
+    # The first candidate is always kept, even over budget
+    assert plan_candidates(strategies[3:], None, max_cost=1) == [(By.XPATH, "//*[contains(@id, 'email')]")]
@@ -0,0 +1,75 @@
+import json
+
+from automate.prompts import PromptPlanner, merge_suites, run_chunks, split_cases
+
+
+MARKDOWN = """# Shop
+
+Preamble shared by every case.
+
+## Case 1: Login
+1. Open the login page
+2. Enter the email
+
+## Case 2: Search
+- Search for "shoes"
+- Open the first result
+
+## Case 3: Checkout
+1. Add to cart
+"""
+
+
+def test_cases_keep_the_preamble():
+    cases = split_cases(MARKDOWN)
+    assert len(cases) == 3
+    assert all(case.startswith("# Shop\n\nPreamble shared by every case.\n\n## Case ") for case in cases)
+    assert "Search for" in cases[1] and "Add to cart" not in cases[1]
+    assert split_cases("No cases here") == ["No cases here"]
+
+
+def test_large_outputs_are_split_by_case():
+    assert [chunk["split"] for chunk in PromptPlanner().plan(MARKDOWN, [])] == [None]
+
+    # Room for about two steps of output per call
+    chunks = PromptPlanner(max_output_tokens=200, output_headroom=1.0).plan(MARKDOWN, [], note="Be brief.")
+    assert [chunk["split"] for chunk in chunks] == ["case"] * 3
+    assert ["## Case 2: Search" in chunk["markdown"] for chunk in chunks] == [False, True, False]
+    assert all(chunk["note"] == "Be brief." for chunk in chunks)
+
+
+def test_pages_that_do_not_fit_are_split_by_page(tmp_path):
+    pages = []
+    for index in range(3):
+        page = tmp_path / f"page{index}.html"
+        page.write_text("<div></div>" * 2000)
+        pages.append(str(page))
+    shared = tmp_path / "shared.html"
+    shared.write_text("<nav></nav>")
+
+    chunks = PromptPlanner(context_tokens=12000, input_headroom=1.0).plan(MARKDOWN, pages, [str(shared)])
+    assert [chunk["split"] for chunk in chunks] == ["page"] * 3
+    assert [chunk["pages"] for chunk in chunks] == [[str(shared), page] for page in pages]
+    assert "pages 2-2 of 3" in chunks[1]["note"]
+
+
+def test_page_splits_concatenate_steps_and_case_splits_keep_the_first():
+    first = [{"testName": "Login", "steps": [{"action": "goto"}]}]
+    second = [{"testName": "Login", "steps": [{"action": "click"}]}, {"testName": "Search", "steps": []}]
+
+    assert merge_suites([first, second], by_page=True) == [
+        {"testName": "Login", "steps": [{"action": "goto"}, {"action": "click"}]}, {"testName": "Search", "steps": []}]
+    assert merge_suites([first, second]) == [first[0], second[1]]
+
+
+def test_chunks_are_generated_and_merged_in_order():
+    goto = {"action": "goto", "locator": {"type": "url", "value": "https://example.com"}}
+    chunks = [{"markdown": f"## Case {i}", "pages": [], "note": "", "split": "case"} for i in range(3)]
+
+    def generate(chunk):
+        if chunk["markdown"] == "## Case 1":
+            raise RuntimeError("quota exceeded")
+        return json.dumps([{"testName": chunk["markdown"], "steps": [goto]}])
+
+    suite = run_chunks(chunks, generate)
+    assert [test["testName"] for test in suite] == ["## Case 0", "## Case 2"]
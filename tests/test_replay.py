@@ -0,0 +1,83 @@
+import json
+import shutil
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from automate import replay
+from automate.replay import ReplayProxy
+
+
+pytestmark = pytest.mark.skipif(not shutil.which("openssl"), reason="openssl creates the proxy certificate")
+
+
+class Upstream(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self._answer(f"page {self.path}".encode("utf-8"))
+
+    def do_POST(self):
+        self._answer(b"echo " + self.rfile.read(int(self.headers.get("Content-Length") or 0)))
+
+    def _answer(self, body):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def upstream():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Upstream)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def client(proxy):
+    session = requests.Session()
+    session.trust_env = False
+    session.proxies = {"http": f"http://{proxy.address}"}
+    return session
+
+
+FORM = {"Content-Type": "application/x-www-form-urlencoded"}
+
+
+def chunked(*parts):
+    # A generator body makes requests send it with Transfer-Encoding: chunked
+    yield from parts
+
+
+def test_record_then_replay_without_the_network(tmp_path, monkeypatch, upstream):
+    monkeypatch.setattr(replay, "CERT_DIR", str(tmp_path / "certs"))
+    har = str(tmp_path / "suite.har")
+
+    with ReplayProxy(har, mode="record") as proxy:
+        session = client(proxy)
+        assert session.get(f"{upstream}/page?v=1").text == "page /page?v=1"
+        assert session.post(f"{upstream}/api", data=chunked(b"user=", b"ada"), headers=FORM).text == "echo user=ada"
+    assert proxy.report()["requests"] == 2
+    with open(har, 'r', encoding='utf-8') as f:
+        assert json.load(f)["log"]["entries"][1]["request"]["postData"]["text"] == "user=ada"
+
+    with ReplayProxy(har, mode="replay") as proxy:
+        session = client(proxy)
+        assert session.get(f"{upstream}/page?v=1").text == "page /page?v=1"
+        assert session.post(f"{upstream}/api", data=chunked(b"user", b"=ada"), headers=FORM).text == "echo user=ada"
+        # Same path with another cache buster only matches loosely
+        assert session.get(f"{upstream}/page?v=2").text == "page /page?v=1"
+        assert session.get(f"{upstream}/missing").status_code == 404
+
+    report = proxy.report()
+    assert (report["hits"], report["loose_hits"]) == (3, 1)
+    with open(str(tmp_path / "suite.misses.json"), 'r', encoding='utf-8') as f:
+        assert json.load(f) == [{"method": "GET", "url": f"{upstream}/missing"}]
@@ -0,0 +1,48 @@
+import json
+
+from automate.responses import generate_suite, parse_response, repair_truncated
+
+
+def goto(url):
+    return {"action": "goto", "locator": {"type": "url", "value": url}}
+
+
+def click(value):
+    return {"action": "click", "locator": {"type": "id", "value": value}}
+
+
+SUITE = [{"testName": "Login", "steps": [goto("https://example.com"), click("login")]},
+         {"testName": "Search", "steps": [goto("https://example.com/search"), click("search"), click("first")]}]
+
+
+def test_cut_inside_a_string_keeps_the_complete_values():
+    text = '[{"testName": "Login", "steps": [{"action": "go'
+    repaired, truncated = repair_truncated(text)
+    assert truncated
+    assert json.loads(repaired) == [{"testName": "Login"}]
+    assert repair_truncated('[1, 2] trailing') == ("[1, 2]", False)
+
+
+def test_truncated_response_drops_the_partial_step():
+    text = "```json\n" + json.dumps(SUITE, indent=2)
+    cut = text[:text.index('"first"') + 3]
+
+    parsed = parse_response(cut)
+    assert parsed["truncated"]
+    assert parsed["errors"] == []
+    assert parsed["suite"] == [SUITE[0], {"testName": "Search", "steps": SUITE[1]["steps"][:2]}]
+
+
+def test_truncated_suite_is_completed_by_a_continuation():
+    full = json.dumps(SUITE)
+    responses = [full[:full.index('"first"') + 3], json.dumps([{"testName": "Search", "steps": [click("first")]}])]
+    notes = []
+
+    def generate(note):
+        notes.append(note)
+        return responses.pop(0)
+
+    suite, errors = generate_suite(generate)
+    assert suite == SUITE
+    assert errors == []
+    assert "after step 2" in notes[1]
@@ -0,0 +1,38 @@
+import xml.etree.ElementTree as ET
+from datetime import datetime, timedelta, timezone
+
+from automate.results import ResultsStore, RunRecorder, step_trends, to_junit_xml
+
+
+def step(index, duration, outcome="PASS", error=None):
+    return {"index": index, "action": "click", "locator": f"#button-{index}", "outcome": outcome,
+            "duration": duration, "fallbacks": [], "error": error}
+
+
+def test_junit_reports_the_final_attempt_of_each_test():
+    recorder = RunRecorder("shop")
+    recorder.add_test("Login", "FAIL: Element not found", 2.0, [step(0, 2.0, "FAIL", "Element not found")])
+    recorder.add_test("Search", "FAIL: Timeout", 1.5, [step(0, 1.5, "FAIL", "Timeout")])
+    recorder.add_test("Login", "PASS", 1.0, [step(0, 1.0)], attempt=1)
+
+    suite = ET.fromstring(to_junit_xml(recorder.finish())).find("testsuite")
+    assert (suite.get("tests"), suite.get("failures"), suite.get("time")) == ("2", "1", "2.500")
+    login, search = suite.findall("testcase")
+    assert login.find("failure") is None
+    assert login.find("system-out").text == "fallbacks=0 attempt=1"
+    assert search.find("failure").get("message") == "Timeout"
+    assert search.find("failure").text == "step 1 click #button-0: FAIL - Timeout"
+
+
+def test_steps_that_got_slower_are_reported(tmp_path):
+    store = ResultsStore(str(tmp_path / "runs.jsonl"))
+    now = datetime.now(timezone.utc)
+    for days_ago, durations in ((10, (1.0, 2.0)), (9, (1.0, 2.0)), (2, (1.0, 3.0)), (1, (1.2, 3.0))):
+        run = RunRecorder("shop").run
+        run["started_at"] = (now - timedelta(days=days_ago)).isoformat(timespec="seconds")
+        run["tests"] = [{"name": "Login", "steps": [step(index, duration) for index, duration in enumerate(durations)]}]
+        store.append(run)
+
+    trends = step_trends(store, days=7)
+    assert [(trend["step"], trend["before"], trend["after"], trend["ratio"]) for trend in trends] == [(2, 2.0, 3.0, 1.5)]
+    assert step_trends(store, days=7, suite="other") == []
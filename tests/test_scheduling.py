@@ -0,0 +1,25 @@
+from automate.scheduling import ASSERTIONS, PRECONDITION, dependent_steps, plan_steps
+
+
+def step(action, **extra):
+    return {"action": action, "locator": {"type": "id", "value": action}, **extra}
+
+
+def test_only_trailing_waits_are_batched():
+    steps = [step("goto"), step("waitForElementVisible"), step("click"), step("waitForElementVisible"),
+             step("waitForElementVisible")]
+
+    assert plan_steps(steps) == [{"kind": PRECONDITION, "indices": [0]}, {"kind": PRECONDITION, "indices": [1]},
+                                 {"kind": PRECONDITION, "indices": [2]}, {"kind": ASSERTIONS, "indices": [3, 4]}]
+    # A wait guarding later steps stops the test when it fails
+    assert dependent_steps(steps, 1) == [2, 3, 4]
+    assert dependent_steps(steps, 3) == []
+
+
+def test_independent_marks_override_the_position():
+    steps = [step("goto"), step("waitForElementVisible", independent=True), step("click"),
+             step("waitForElementVisible", independent=False)]
+
+    assert plan_steps(steps) == [{"kind": PRECONDITION, "indices": [0]}, {"kind": ASSERTIONS, "indices": [1]},
+                                 {"kind": PRECONDITION, "indices": [2]}, {"kind": PRECONDITION, "indices": [3]}]
+    assert dependent_steps(steps, 1) == []
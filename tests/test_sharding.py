@@ -0,0 +1,34 @@
+from automate.results import ResultsStore, RunRecorder
+from automate.sharding import DurationModel, TEST_OVERHEAD, plan_shards
+
+
+def record(store, suite, durations):
+    recorder = RunRecorder(suite)
+    for name, duration in durations.items():
+        recorder.add_test(name, "PASS", duration)
+    store.append(recorder.finish())
+
+
+def test_unknown_tests_are_estimated_from_their_steps(tmp_path):
+    store = ResultsStore(str(tmp_path / "runs.jsonl"))
+    for duration in (5.0, 9.0, 7.0):
+        record(store, "suite", {"Known": duration})
+    tests = [{"testName": "Known", "steps": [{}] * 3}, {"testName": "New", "steps": [{}] * 6}]
+
+    model = DurationModel({"suite": tests}, store)
+    assert model.estimate("suite", tests[0]) == 7.0
+    # 2 s per step learned from "Known", whose median is 7 s for 3 steps
+    assert model.estimate("suite", tests[1]) == TEST_OVERHEAD + 6 * 2.0
+
+
+def test_longest_tests_are_spread_across_shards(tmp_path):
+    store = ResultsStore(str(tmp_path / "runs.jsonl"))
+    durations = {"Short 1": 1.0, "Short 2": 1.0, "Short 3": 1.0, "Short 4": 1.0, "Long 1": 6.0, "Long 2": 6.0}
+    record(store, "suite", durations)
+    tests = [{"testName": name, "steps": []} for name in durations]
+
+    plan = plan_shards([("suite", test) for test in tests], 2, DurationModel({"suite": tests}, store))
+    assert [shard["estimate"] for shard in plan] == [8.0, 8.0]
+    for shard in plan:
+        names = [test["testName"] for _, test in shard["items"]]
+        assert names[0].startswith("Long") and all(name.startswith("Short") for name in names[1:])
@@ -0,0 +1,53 @@
+import os
+import re
+
+from automate.snapdiff import dedupe_snapshots, prune_cache
+
+
+NAV = ("<nav class='top'  id=main-nav><a href=\"/a?x=1&amp;y=2\">Home &copy;&nbsp;</a>"
+       "<a href='/b'>About us and more</a><ul><li>One<li>Two</ul></nav>")
+
+
+def write_pages(tmp_path, bodies):
+    paths = []
+    for index, body in enumerate(bodies):
+        path = tmp_path / f"page{index}.html"
+        path.write_text(f"<!DOCTYPE html>\n<html><body>\n{body}\n</body></html>\n")
+        paths.append(str(path))
+    return paths
+
+
+def expand(page_path, shared_path):
+    with open(shared_path, 'r', encoding='utf-8') as f:
+        fragments = dict(re.findall(r'<section data-shared-id="(S\d+)">(.*?)</section>\n', f.read(), re.S))
+    with open(page_path, 'r', encoding='utf-8') as f:
+        return re.sub(r'<shared-ref data-shared-id="(S\d+)"></shared-ref>', lambda m: fragments[m.group(1)],
+                      f.read())
+
+
+def test_fragments_keep_the_original_markup(tmp_path):
+    paths = write_pages(tmp_path, [f"{NAV}\n<main><h1 data-x='{i}'>Page {i}</h1><br></main>" for i in range(3)])
+
+    result = dedupe_snapshots(paths, str(tmp_path / "out"))
+    assert result["fragments"] == 1
+    for original, page in zip(paths, result["pages"]):
+        with open(original, 'r', encoding='utf-8') as f:
+            assert expand(page, result["shared"]) == f.read()
+
+
+def test_deeply_nested_pages(tmp_path):
+    deep = "<div>" * 5000 + "x" * 200 + "</div>" * 5000
+    paths = write_pages(tmp_path, [deep + "<p>one</p>", deep + "<p>two</p>"])
+
+    result = dedupe_snapshots(paths, str(tmp_path / "out"))
+    assert result["fragments"] == 1
+
+
+def test_prune_cache_keeps_recent_files(tmp_path):
+    for index in range(5):
+        path = tmp_path / f"page_{index}.html"
+        path.write_text("x" * 10)
+        os.utime(path, (index, index))
+
+    prune_cache(str(tmp_path), max_files=2, keep=[str(tmp_path / "page_0.html")])
+    assert sorted(os.listdir(tmp_path)) == ["page_0.html", "page_4.html"]
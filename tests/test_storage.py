@@ -0,0 +1,40 @@
+import json
+import os
+import threading
+
+from automate.storage import write_atomic, write_json_atomic
+
+
+def test_concurrent_writers_do_not_collide(tmp_path):
+    path = str(tmp_path / "state.json")
+    errors = []
+
+    def write(index):
+        try:
+            for _ in range(50):
+                write_json_atomic(path, {"writer": index})
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=write, args=(index,)) for index in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+    with open(path, 'r', encoding='utf-8') as f:
+        assert json.load(f)["writer"] in range(4)
+    assert os.listdir(tmp_path) == ["state.json"]
+
+
+def test_failed_write_keeps_the_old_content(tmp_path):
+    path = str(tmp_path / "state.json")
+    write_atomic(path, "old")
+    try:
+        write_json_atomic(path, {"bad": object()})
+    except TypeError:
+        pass
+    with open(path, 'r', encoding='utf-8') as f:
+        assert f.read() == "old"
+    assert os.listdir(tmp_path) == ["state.json"]
@@ -0,0 +1,44 @@
+import json
+
+from automate.telemetry import FallbackTelemetry, load_stats, to_prometheus, worst_locators
+
+
+def observe(directory, suite="shop"):
+    telemetry = FallbackTelemetry(suite, directory=str(directory))
+    telemetry.observe_step("click", "#login")
+    telemetry.observe_step("click", "#login")
+    telemetry.observe_fallback("click", "#login", tried=4, family="text", duration=1.5, found=True)
+    telemetry.observe_step("fill", 'input[name="q"]')
+    telemetry.observe_fallback("fill", 'input[name="q"]', tried=9, family=None, duration=30.0, found=False)
+    telemetry.save()
+
+
+def test_saves_merge_with_earlier_runs(tmp_path):
+    observe(tmp_path)
+    observe(tmp_path)
+
+    stats = load_stats(str(tmp_path / "fallback.json"))
+    login = stats["shop|click|#login"]
+    assert (login["steps"], login["fallbacks"], login["healed"], login["strategies_tried"]) == (4, 2, 2, 8)
+    assert login["seconds_sum"] == 3.0
+    assert login["seconds_buckets"] == [0, 0, 2, 2, 2, 2, 2, 2]
+    assert login["families"] == {"text": 2}
+    assert [entry["locator"] for entry in worst_locators(stats)] == ['input[name="q"]', "#login"]
+
+
+def test_prometheus_output_escapes_labels_and_closes_histograms(tmp_path):
+    observe(tmp_path)
+
+    prom = (tmp_path / "fallback.prom").read_text(encoding="utf-8")
+    assert prom == to_prometheus(json.loads((tmp_path / "fallback.json").read_text(encoding="utf-8")))
+    lines = prom.splitlines()
+    assert "# TYPE shaster_fallback_seconds histogram" in lines
+    login = 'suite="shop",action="click",locator="#login"'
+    search = 'suite="shop",action="fill",locator="input[name=\\"q\\"]"'
+    assert f"shaster_steps_total{{{login}}} 2" in lines
+    assert f'shaster_fallback_wins_total{{{login},family="text"}} 1' in lines
+    assert f'shaster_fallback_seconds_bucket{{{login},le="2.5"}} 1' in lines
+    assert f'shaster_fallback_seconds_bucket{{{search},le="20"}} 0' in lines
+    assert f'shaster_fallback_seconds_bucket{{{search},le="+Inf"}} 1' in lines
+    assert f"shaster_fallback_seconds_sum{{{search}}} 30.000" in lines
+    assert f"shaster_fallback_healed_total{{{search}}} 0" in lines
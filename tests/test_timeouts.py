@@ -0,0 +1,37 @@
+from automate.timeouts import TimeoutController
+
+
+URL = "https://example.com/login"
+
+
+def test_budget_recovers_after_timeouts():
+    timeouts = TimeoutController(path=None)
+    for _ in range(20):
+        timeouts.record(URL, "click", 0.5)
+    assert timeouts.budget(URL, "click", 10) == 1.0
+
+    # The page got slower than the learned budget: every wait now times out
+    for _ in range(3):
+        timeouts.record_timeout(URL, "click", timeouts.budget(URL, "click", 10))
+    assert timeouts.budget(URL, "click", 10) == 2.0
+
+
+def test_waits_cut_short_by_the_test_budget_are_not_recorded():
+    timeouts = TimeoutController(path=None)
+    for _ in range(20):
+        timeouts.record(URL, "click", 0.5)
+
+    timeouts.record_timeout(URL, "click", 0.2)
+    assert len(timeouts.samples["example.com|click"]) == 20
+
+
+def test_concurrent_savers_keep_each_others_timings(tmp_path):
+    path = str(tmp_path / "timings.json")
+    first, second = TimeoutController(path), TimeoutController(path)
+    first.record("https://a.example", "click", 0.5)
+    second.record("https://b.example", "click", 0.7)
+    first.save()
+    second.save()
+    second.save()
+
+    assert TimeoutController(path).samples == {"a.example|click": [0.5], "b.example|click": [0.7]}
@@ -0,0 +1,79 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from automate import watchdog
+from automate.watchdog import MemoryWatchdog, process_tree_rss
+
+
+MB = 1024 * 1024
+
+
+class FakeDriver:
+
+    def __init__(self, url="https://example.com/account", cookies=(), storage=None):
+        self.current_url = url
+        self.cookies = list(cookies)
+        self.storage = storage
+        self.visited = []
+        self.quit_called = False
+
+    def get_cookies(self):
+        return list(self.cookies)
+
+    def add_cookie(self, cookie):
+        self.cookies.append(cookie)
+
+    def get(self, url):
+        self.visited.append(url)
+        self.current_url = url
+
+    def execute_script(self, script, *args):
+        if script == watchdog.STORAGE_SCRIPT:
+            return self.storage
+        if script == watchdog.RESTORE_STORAGE_SCRIPT:
+            self.storage = args[0]
+        return None
+
+    def quit(self):
+        self.quit_called = True
+
+
+@pytest.mark.skipif(not os.path.isdir("/proc"), reason="reads /proc")
+def test_process_tree_rss_counts_children():
+    child = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(10)"])
+    try:
+        assert process_tree_rss(os.getpid()) > process_tree_rss(child.pid) > 0
+    finally:
+        child.kill()
+        child.wait()
+
+
+def test_growth_over_the_limits_asks_for_a_recycle(monkeypatch):
+    reading = {}
+    monkeypatch.setattr(watchdog, "driver_rss", lambda driver: reading["rss"])
+    monkeypatch.setattr(watchdog, "js_heap", lambda driver: reading["heap"])
+    memory = MemoryWatchdog(max_rss_mb=600, max_heap_mb=200)
+
+    reading.update(rss=400 * MB, heap=100 * MB)
+    assert memory.over_limit(memory.sample(None, "Test 1")) == []
+    reading.update(rss=700 * MB, heap=300 * MB)
+    sample = memory.sample(None, "Test 2")
+    assert (sample["rss_delta_mb"], sample["heap_delta_mb"]) == (300.0, 200.0)
+    assert memory.over_limit(sample) == ["RSS 700.0 MB", "JS heap 300.0 MB"]
+
+
+def test_recycle_carries_the_session_over():
+    old = FakeDriver(cookies=[{"name": "sid", "value": "1", "sameSite": "Unknown"}], storage='{"local": {}}')
+    new = FakeDriver(url="data:,")
+    memory = MemoryWatchdog()
+    memory.samples.append({"recycled": False})
+
+    assert memory.recycle(old, lambda: new, ["RSS 2000 MB"]) is new
+    assert old.quit_called
+    assert new.visited == ["https://example.com/", "https://example.com/account"]
+    assert new.cookies == [{"name": "sid", "value": "1"}]
+    assert new.storage == '{"local": {}}'
+    assert memory.recycles == 1 and memory.samples[-1]["recycled"]